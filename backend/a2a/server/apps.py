@@ -1,6 +1,12 @@
-from fastapi import FastAPI, Request
+from fastapi import FastAPI, Request, Response
+from fastapi.responses import JSONResponse, StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
 from ..types import AgentCard
+from runtime import loop_monitor, cpu_offloader, profiler, memory_diagnostics
+from runtime.memory import SHARED
+from runtime.admin import admin_router, wants_profile
+from runtime.log_pipeline import logging_metrics
+from .faults import FaultInjectionMiddleware, fault_injector, faults_router
 
 class A2AStarletteApplication:
     def __init__(self, agent_card: AgentCard, http_handler):
@@ -8,6 +14,8 @@ class A2AStarletteApplication:
         self.http_handler = http_handler
         self.app = FastAPI(title=agent_card.name, version=agent_card.version)
         
+        # Injected latency and failures (FAULTS_CONFIG, /admin/faults); inert without rules
+        self.app.add_middleware(FaultInjectionMiddleware, injector=fault_injector)
         self.app.add_middleware(
             CORSMiddleware,
             allow_origins=["*"],
@@ -17,8 +25,57 @@ class A2AStarletteApplication:
         )
         
         self.setup_routes()
+        self.app.include_router(admin_router())
+        self.app.include_router(faults_router(fault_injector))
+        memory_diagnostics.register_source("agent", self.memory_usage)
+    
+    def memory_usage(self):
+        """Task store, in-flight requests and executor caches (not tied to a conversation)"""
+        executor = self.http_handler.agent_executor
+        usage = getattr(executor, "memory_usage", dict)()
+        return {SHARED: {
+            "task_store": self.http_handler.task_store.tasks,
+            "in_flight": self.http_handler.single_flight.in_flight,
+            **usage
+        }}
+    
+    async def _handle(self, request: Request, response: Response):
+        """Handle a message, profiling it when asked to"""
+        if not wants_profile(request, await request.json()):
+            return await self.http_handler.handle(request)
+        async with profiler.profile_request(f"{self.agent_card.name} {request.url.path}") as session:
+            response.headers["X-Profile-Id"] = session.id
+            return await self.http_handler.handle(request)
+    
+    async def _handle_stream(self, request: Request) -> StreamingResponse:
+        events = await self.http_handler.handle_stream(request)
+        if not wants_profile(request, await request.json()):
+            return StreamingResponse(events, media_type="application/x-ndjson")
+        
+        # The profile covers producing the events, not just opening the stream
+        session = profiler.start_session(f"{self.agent_card.name} {request.url.path}")
+        
+        async def profiled():
+            try:
+                async for chunk in events:
+                    yield chunk
+            finally:
+                profiler.stop_session(session)
+        
+        return StreamingResponse(profiled(), media_type="application/x-ndjson",
+                                 headers={"X-Profile-Id": session.id})
     
     def setup_routes(self):
+        @self.app.on_event("startup")
+        async def startup():
+            loop_monitor.start()
+            self.http_handler.start_warm_up()
+            
+        @self.app.on_event("shutdown")
+        async def shutdown():
+            loop_monitor.stop()
+            cpu_offloader.shutdown()
+            
         @self.app.get("/")
         async def root():
             return {
@@ -32,14 +89,42 @@ class A2AStarletteApplication:
         async def health():
             return {"status": "healthy"}
             
+        @self.app.get("/ready")
+        async def ready():
+            readiness = self.http_handler.readiness()
+            status_code = 200 if readiness["status"] == "ready" else 503
+            return JSONResponse(readiness, status_code=status_code)
+            
+        @self.app.get("/metrics")
+        async def metrics():
+            return {
+                **self.http_handler.get_metrics(),
+                "event_loop": loop_monitor.get_metrics(),
+                "cpu_offload": cpu_offloader.get_metrics(),
+                "profiler": profiler.get_metrics(),
+                "logging": logging_metrics(),
+                "faults": fault_injector.get_metrics()
+            }
+            
         @self.app.post("/")
-        async def handle_request(request: Request):
-            return await self.http_handler.handle(request)
+        async def handle_request(request: Request, response: Response):
+            return await self._handle(request, response)
             
         @self.app.post("/message")
-        async def handle_message(request: Request):
+        async def handle_message(request: Request, response: Response):
             # Alias for / for compatibility
-            return await self.http_handler.handle(request)
+            return await self._handle(request, response)
+            
+        @self.app.post("/cancel")
+        async def cancel_message(request: Request):
+            # Stop work on a message the caller no longer waits for
+            body = await request.json()
+            return {"cancelled": self.http_handler.cancel(str(body.get("message_id", "")))}
+            
+        @self.app.post("/message/stream")
+        async def handle_message_stream(request: Request):
+            # Newline-delimited JSON events, ending with {"event": "result"}
+            return await self._handle_stream(request)
             
     def build(self):
         return self.app
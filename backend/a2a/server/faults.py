@@ -0,0 +1,345 @@
+"""
+Fault Injection
+
+ASGI middleware for agent services that makes A2A requests misbehave on
+purpose, so retries, timeouts and breakers in the orchestrator can be
+exercised and tail latency measured. Faults are chosen per action:
+
+- latency: a delay drawn from a distribution, before the request is handled
+- error_rate: answer with an error status without handling the request
+- timeout_rate: hold the request for hang_ms, then answer 504
+- truncate_rate: cut the response body off halfway and drop the connection
+- drip_rate: send the response in small chunks with pauses in between
+
+Rules come from FAULTS_CONFIG (a JSON file path, or inline JSON) and can be
+replaced at runtime through PUT /admin/faults. Example:
+
+    {"seed": 7, "rules": [
+        {"action": "generate_code", "latency": {"dist": "lognormal", "p50_ms": 300, "p99_ms": 4000},
+         "error_rate": 0.05, "timeout_rate": 0.01},
+        {"action": "*", "drip_rate": 0.1, "drip": {"chunk_bytes": 64, "interval_ms": 200}}
+    ]}
+
+The first rule whose action matches (or is "*") applies. Choices are seeded
+from the seed, the action and the request's arrival order for that action,
+so the same sequence of requests sees the same faults.
+"""
+
+import asyncio
+import json
+import logging
+import math
+import os
+import random
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+from fastapi import APIRouter, Depends, HTTPException, Request
+from runtime.admin import require_admin
+
+logger = logging.getLogger(__name__)
+
+# Routes that carry A2A messages
+A2A_PATHS = ("/", "/message", "/message/stream")
+
+# z-score of the 99th percentile, for fitting a lognormal to p50/p99
+_Z99 = 2.326
+
+LATENCY_DISTRIBUTIONS = ("fixed", "uniform", "exponential", "lognormal", "pareto")
+
+
+def sample_latency(spec: Dict[str, Any], rng: random.Random) -> float:
+    """Delay in milliseconds drawn from a latency spec"""
+    dist = spec.get("dist", "fixed")
+    if dist == "fixed":
+        delay = spec.get("ms", 0)
+    elif dist == "uniform":
+        delay = rng.uniform(spec.get("min_ms", 0), spec["max_ms"])
+    elif dist == "exponential":
+        delay = rng.expovariate(1 / spec["mean_ms"])
+    elif dist == "lognormal":
+        mu = math.log(spec["p50_ms"])
+        sigma = (math.log(spec["p99_ms"]) - mu) / _Z99
+        delay = rng.lognormvariate(mu, sigma)
+    else:
+        # Heavy tail: min_ms most of the time, occasionally far more
+        delay = spec["min_ms"] * rng.paretovariate(spec.get("alpha", 1.5))
+    return min(delay, spec.get("max_ms", delay))
+
+
+@dataclass
+class FaultRule:
+    """Faults applied to one action ("*" for any)"""
+    action: str = "*"
+    latency: Optional[Dict[str, Any]] = None
+    error_rate: float = 0.0
+    error_status: int = 503
+    timeout_rate: float = 0.0
+    hang_ms: float = 600000
+    truncate_rate: float = 0.0
+    drip_rate: float = 0.0
+    drip: Dict[str, Any] = field(default_factory=lambda: {"chunk_bytes": 64, "interval_ms": 100})
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "FaultRule":
+        """Validated rule; raises ValueError on bad config"""
+        if not isinstance(data, dict):
+            raise ValueError("Fault rule must be an object")
+        unknown = set(data) - set(cls.__dataclass_fields__)
+        if unknown:
+            raise ValueError(f"Unknown fault rule fields: {sorted(unknown)}")
+        rule = cls(**data)
+
+        rates = (rule.error_rate, rule.timeout_rate, rule.truncate_rate, rule.drip_rate)
+        if any(rate < 0 for rate in rates) or sum(rates) > 1:
+            raise ValueError(f"Fault rates for {rule.action!r} must be non-negative and sum to at most 1")
+        if rule.latency is not None:
+            dist = rule.latency.get("dist", "fixed")
+            if dist not in LATENCY_DISTRIBUTIONS:
+                raise ValueError(f"Unknown latency distribution {dist!r}")
+            try:
+                sample_latency(rule.latency, random.Random(0))
+            except (KeyError, ValueError, ZeroDivisionError, TypeError) as e:
+                raise ValueError(f"Bad latency spec for {rule.action!r}: {e!r}")
+        return rule
+
+
+@dataclass
+class Fault:
+    """What happens to one request"""
+    action: str
+    delay: float = 0.0
+    kind: Optional[str] = None  # error, timeout, truncate, drip
+
+
+class FaultInjector:
+    """Fault rules and the per-request choice"""
+
+    def __init__(self, config: Optional[Dict[str, Any]] = None):
+        self.seed: Any = 0
+        self.rules: List[FaultRule] = []
+        self.arrivals: Dict[str, int] = {}
+        self.stats: Dict[str, Dict[str, float]] = {}
+        if config:
+            self.configure(config)
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.rules)
+
+    def configure(self, config: Dict[str, Any]):
+        """Replace the rules; raises ValueError and keeps the old ones on bad config"""
+        if not isinstance(config, dict):
+            raise ValueError("Fault config must be an object")
+        try:
+            rules = [FaultRule.from_dict(rule) for rule in config.get("rules", [])]
+        except TypeError as e:
+            raise ValueError(f"Bad fault rule: {e}")
+        self.seed = config.get("seed", 0)
+        self.rules = rules
+        self.arrivals.clear()
+        self.stats.clear()
+        if rules:
+            logger.warning(f"Fault injection enabled for actions {[rule.action for rule in rules]}")
+
+    def clear(self):
+        self.configure({})
+
+    def config(self) -> Dict[str, Any]:
+        return {"seed": self.seed, "rules": [vars(rule) for rule in self.rules]}
+
+    def rule_for(self, action: str) -> Optional[FaultRule]:
+        for rule in self.rules:
+            if rule.action in (action, "*"):
+                return rule
+        return None
+
+    def decide(self, action: str) -> Optional[Fault]:
+        """Fault for the next request of an action, or None"""
+        rule = self.rule_for(action)
+        if rule is None:
+            return None
+
+        arrival = self.arrivals.get(action, 0)
+        self.arrivals[action] = arrival + 1
+        rng = random.Random(f"{self.seed}:{action}:{arrival}")
+
+        fault = Fault(action)
+        if rule.latency is not None:
+            fault.delay = sample_latency(rule.latency, rng) / 1000
+
+        roll = rng.random()
+        for kind, rate in (("error", rule.error_rate), ("timeout", rule.timeout_rate),
+                           ("truncate", rule.truncate_rate), ("drip", rule.drip_rate)):
+            if roll < rate:
+                fault.kind = kind
+                break
+            roll -= rate
+
+        stats = self.stats.setdefault(action, {"requests": 0, "delayed_ms": 0.0, "error": 0,
+                                               "timeout": 0, "truncate": 0, "drip": 0})
+        stats["requests"] += 1
+        stats["delayed_ms"] += fault.delay * 1000
+        if fault.kind:
+            stats[fault.kind] += 1
+        return fault
+
+    def get_metrics(self) -> Dict[str, Any]:
+        return {
+            "enabled": self.enabled,
+            "by_action": {action: {**stats, "delayed_ms": round(stats["delayed_ms"], 1)}
+                          for action, stats in self.stats.items()}
+        }
+
+
+def faults_from_env() -> FaultInjector:
+    """Injector configured from FAULTS_CONFIG (file path or inline JSON)"""
+    source = os.getenv("FAULTS_CONFIG", "").strip()
+    if not source:
+        return FaultInjector()
+    if source.startswith("{"):
+        return FaultInjector(json.loads(source))
+    with open(source, encoding="utf-8") as f:
+        return FaultInjector(json.load(f))
+
+
+async def _buffer_body(receive) -> Tuple[bytes, Any]:
+    """Read the request body and a receive callable that replays it"""
+    chunks = []
+    while True:
+        message = await receive()
+        if message["type"] != "http.request":
+            break
+        chunks.append(message.get("body", b""))
+        if not message.get("more_body"):
+            break
+    body = b"".join(chunks)
+    replayed = False
+
+    async def replay():
+        nonlocal replayed
+        if not replayed:
+            replayed = True
+            return {"type": "http.request", "body": body, "more_body": False}
+        return await receive()
+
+    return body, replay
+
+
+def _action_of(body: bytes) -> str:
+    try:
+        message = json.loads(body)
+        return str((message.get("content") or {}).get("action") or "unknown")
+    except (ValueError, AttributeError):
+        return "unknown"
+
+
+class FaultInjectionMiddleware:
+    """Raw ASGI middleware applying an injector's faults to A2A requests"""
+
+    def __init__(self, app, injector: FaultInjector):
+        self.app = app
+        self.injector = injector
+
+    async def __call__(self, scope, receive, send):
+        if (scope["type"] != "http" or scope["method"] != "POST"
+                or scope["path"] not in A2A_PATHS or not self.injector.enabled):
+            await self.app(scope, receive, send)
+            return
+
+        body, receive = await _buffer_body(receive)
+        fault = self.injector.decide(_action_of(body))
+        if fault is None:
+            await self.app(scope, receive, send)
+            return
+
+        if fault.delay:
+            await asyncio.sleep(fault.delay)
+        rule = self.injector.rule_for(fault.action)
+
+        if fault.kind == "error":
+            await self._respond(send, rule.error_status, "Injected fault")
+        elif fault.kind == "timeout":
+            await asyncio.sleep(rule.hang_ms / 1000)
+            await self._respond(send, 504, "Injected timeout")
+        elif fault.kind == "truncate":
+            await self.app(scope, receive, self._truncating(send))
+        elif fault.kind == "drip":
+            await self.app(scope, receive, self._dripping(send, rule.drip))
+        else:
+            await self.app(scope, receive, send)
+
+    @staticmethod
+    async def _respond(send, status: int, detail: str):
+        payload = json.dumps({"detail": detail, "injected": True}).encode("utf-8")
+        await send({"type": "http.response.start", "status": status,
+                    "headers": [(b"content-type", b"application/json"),
+                                (b"content-length", str(len(payload)).encode())]})
+        await send({"type": "http.response.body", "body": payload})
+
+    @staticmethod
+    def _truncating(send):
+        """Send half the body, then stop; the server drops the unfinished response"""
+        done = False
+
+        async def wrapped(message):
+            nonlocal done
+            if message["type"] != "http.response.body":
+                await send(message)
+                return
+            if done:
+                return
+            done = True
+            # Streams are cut after their first chunk, whole bodies at half their size
+            body = message.get("body", b"")
+            if not message.get("more_body"):
+                body = body[:len(body) // 2]
+            await send({"type": "http.response.body", "body": body, "more_body": True})
+
+        return wrapped
+
+    @staticmethod
+    def _dripping(send, drip: Dict[str, Any]):
+        """Forward the body in small chunks with pauses"""
+        size = max(1, int(drip.get("chunk_bytes", 64)))
+        interval = drip.get("interval_ms", 100) / 1000
+
+        async def wrapped(message):
+            if message["type"] != "http.response.body":
+                await send(message)
+                return
+            body, more = message.get("body", b""), message.get("more_body", False)
+            for offset in range(0, len(body), size):
+                await send({"type": "http.response.body", "body": body[offset:offset + size], "more_body": True})
+                await asyncio.sleep(interval)
+            if not more:
+                await send({"type": "http.response.body", "body": b"", "more_body": False})
+
+        return wrapped
+
+
+def faults_router(injector: FaultInjector) -> APIRouter:
+    """Admin routes to inspect and change fault rules"""
+    router = APIRouter(prefix="/admin", dependencies=[Depends(require_admin)])
+
+    @router.get("/faults")
+    async def get_faults():
+        return {**injector.config(), **injector.get_metrics()}
+
+    @router.put("/faults")
+    async def set_faults(request: Request):
+        try:
+            injector.configure(await request.json())
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        return {**injector.config(), **injector.get_metrics()}
+
+    @router.delete("/faults")
+    async def clear_faults():
+        injector.clear()
+        return injector.get_metrics()
+
+    return router
+
+
+# Global instance
+fault_injector = faults_from_env()
@@ -1,16 +1,266 @@
-from typing import Any, Dict
-from fastapi import Request
+from typing import Any, AsyncIterator, Dict, Optional
+from fastapi import HTTPException, Request
+import asyncio
+import json
+import logging
+import os
+import time
+from contextlib import contextmanager
+from protocol.bus import message_bus
+from protocol.coalescing import SingleFlight, request_key, load_coalesce_policy
+from protocol.hedging import HEDGE_METADATA_KEY
+from protocol.deadline import (
+    DEADLINE_METADATA_KEY, DeadlineExceeded, bounded, bounded_stream, deadline_scope, from_metadata
+)
+from protocol.recorder import TrafficRecorder, recorder_from_env
+from runtime.log_pipeline import bind_log_fields
+from runtime.offload import estimate_size
+
+logger = logging.getLogger(__name__)
 
 class DefaultRequestHandler:
-    def __init__(self, agent_executor, task_store):
+    def __init__(self, agent_executor, task_store, coalesce_actions: Optional[Dict[str, bool]] = None,
+                 recorder: Optional[TrafficRecorder] = None):
         self.agent_executor = agent_executor
         self.task_store = task_store
+        # Progress notifications get this long to go out ahead of the reply they precede
+        self.flush_timeout = float(os.getenv("NOTIFY_FLUSH_TIMEOUT", "0.2"))
+        # Identical concurrent requests from any caller share one execution
+        self.coalesce_actions = load_coalesce_policy() if coalesce_actions is None else coalesce_actions
+        self.single_flight = SingleFlight()
+        # Opt-in log of every message handled, for replay (A2A_RECORD_* env vars)
+        self.recorder = recorder or recorder_from_env("server")
+        # Running work by message id, so callers can cancel what they gave up on
+        self.running: Dict[str, Dict[str, Any]] = {}
+        self._cancelled: set = set()
+        # Typical duration per action, to estimate the work a cancel saved
+        self._durations: Dict[str, float] = {}
+        self.cancel_stats: Dict[str, Any] = {"requests": 0, "cancelled": 0, "not_running": 0,
+                                             "elapsed_seconds": 0.0, "reclaimed_seconds": 0.0}
+        # Background warm-up of heavy imports and LLM clients
+        self.warm_up_task: Optional[asyncio.Task] = None
+        self.warm_up_error: Optional[str] = None
+        self.warm_up_seconds: Optional[float] = None
+        
+    def start_warm_up(self):
+        """Warm the executor up in the background so the service can bind immediately"""
+        if self.warm_up_task is None:
+            self.warm_up_task = asyncio.get_running_loop().create_task(self._warm_up())
+    
+    async def _warm_up(self):
+        start = time.perf_counter()
+        warm_up = getattr(self.agent_executor, "warm_up", None)
+        try:
+            if warm_up is not None:
+                await warm_up()
+        except Exception as e:
+            self.warm_up_error = str(e)
+            logger.error(f"Warm-up failed: {e}")
+        self.warm_up_seconds = time.perf_counter() - start
+        logger.info(f"Warm-up finished in {self.warm_up_seconds:.2f}s")
+    
+    def readiness(self) -> Dict[str, Any]:
+        """Readiness state, separate from liveness"""
+        if self.warm_up_task is None or not self.warm_up_task.done():
+            status = "warming_up"
+        elif self.warm_up_error:
+            status = "error"
+        else:
+            status = "ready"
+        return {
+            "status": status,
+            "warm_up_seconds": self.warm_up_seconds,
+            "error": self.warm_up_error
+        }
         
+    @staticmethod
+    def _bind_log_fields(body: Any):
+        """Tag this request's log records with its conversation and message ids"""
+        if isinstance(body, dict):
+            bind_log_fields(
+                conversation_id=(body.get("metadata") or {}).get("conversation_id"),
+                message_id=body.get("message_id")
+            )
+    
     async def handle(self, request: Request):
         """Handle incoming HTTP request"""
         body = await request.json()
+        self._bind_log_fields(body)
+        
+        # Requests arriving during warm-up wait for it instead of racing it
+        if self.warm_up_task is not None and not self.warm_up_task.done():
+            await asyncio.shield(self.warm_up_task)
+        
+        if self.recorder is None:
+            return await self._execute(body)
+        
+        started, clock = time.time(), time.perf_counter()
+        try:
+            result = await self._execute(body)
+        except Exception as e:
+            self._record(body, started, clock, "error", error=str(e))
+            raise
+        self._record(body, started, clock, "ok", response_bytes=estimate_size(result))
+        return result
+    
+    @staticmethod
+    def _budget(body: Any) -> Optional[float]:
+        """Seconds left of the caller's deadline; 504 when it has already passed"""
+        budget = from_metadata(body.get("metadata")) if isinstance(body, dict) else None
+        if budget is not None and budget <= 0:
+            raise HTTPException(status_code=504, detail="Deadline exceeded before the request was handled")
+        return budget
+    
+    async def _execute(self, body: Dict[str, Any]):
+        """Run the request within the deadline it carries, as work the caller can cancel"""
+        budget = self._budget(body)
+        with deadline_scope(budget):
+            work = asyncio.ensure_future(bounded(self._dispatch(body), "request"))
+        
+        message_id = body.get("message_id") if isinstance(body, dict) else None
+        action = (body.get("content") or {}).get("action", "unknown") if isinstance(body, dict) else "unknown"
+        with self._track(message_id, action, work):
+            try:
+                return await work
+            except DeadlineExceeded as e:
+                raise HTTPException(status_code=504, detail=str(e))
+            except asyncio.CancelledError:
+                if message_id in self._cancelled:
+                    raise HTTPException(status_code=499, detail="Cancelled by the caller")
+                raise
+    
+    @contextmanager
+    def _track(self, message_id: Optional[str], action: str, task: asyncio.Future):
+        """Register running work for `cancel`, and learn how long the action takes"""
+        if not message_id:
+            yield
+            return
+        started = time.perf_counter()
+        self.running[message_id] = {"task": task, "action": action, "started": started}
+        try:
+            yield
+            elapsed = time.perf_counter() - started
+            average = self._durations.get(action)
+            self._durations[action] = elapsed if average is None else 0.8 * average + 0.2 * elapsed
+        finally:
+            # A retry of the same message may have registered itself since
+            if self.running.get(message_id, {}).get("task") is task:
+                del self.running[message_id]
+                self._cancelled.discard(message_id)
+    
+    def cancel(self, message_id: str) -> bool:
+        """Cancel running work for a message; False when it is not running here"""
+        self.cancel_stats["requests"] += 1
+        entry = self.running.get(message_id)
+        if entry is None or entry["task"].done() or message_id in self._cancelled:
+            self.cancel_stats["not_running"] += 1
+            return False
+        
+        self._cancelled.add(message_id)
+        entry["task"].cancel()
+        elapsed = time.perf_counter() - entry["started"]
+        reclaimed = max(0.0, self._durations.get(entry["action"], elapsed) - elapsed)
+        self.cancel_stats["cancelled"] += 1
+        self.cancel_stats["elapsed_seconds"] += elapsed
+        self.cancel_stats["reclaimed_seconds"] += reclaimed
+        logger.info(f"Cancelled {entry['action']} {message_id} after {elapsed:.2f}s (~{reclaimed:.2f}s saved)")
+        return True
+    
+    async def _dispatch(self, body: Dict[str, Any]):
+        content = body.get("content", {}) if isinstance(body, dict) else {}
+        action = content.get("action")
+        # A hedged duplicate exists to race the original, so it must not join it
+        hedge = isinstance(body, dict) and (body.get("metadata") or {}).get(HEDGE_METADATA_KEY)
         
         # Pass full body to executor
-        result = await self.agent_executor.execute(body)
+        if action and self.coalesce_actions.get(action) and not hedge:
+            key = request_key(getattr(self.agent_executor, "name", "agent"), action, content.get("parameters", {}),
+                              (body.get("metadata") or {}).get("conversation_id"))
+            # Shared work runs until its last waiter's deadline, not the first caller's
+            metadata = {k: v for k, v in (body.get("metadata") or {}).items() if k != DEADLINE_METADATA_KEY}
+            shared = {**body, "metadata": metadata}
+            result = await self.single_flight.do(key, lambda: self.agent_executor.execute(shared), label=action)
+        else:
+            result = await self.agent_executor.execute(body)
+        
+        # Deliver progress notifications before the response they precede, without holding it up
+        await message_bus.flush(self.flush_timeout)
         
         return result
+    
+    def _record(self, body: Any, started: float, clock: float, status: str, **details):
+        self.recorder.record("server", body, getattr(self.agent_executor, "name", "agent"),
+                             started, time.perf_counter() - clock, status, **details)
+    
+    async def handle_stream(self, request: Request) -> AsyncIterator[bytes]:
+        """Handle incoming HTTP request, streaming NDJSON events"""
+        body = await request.json()
+        self._bind_log_fields(body)
+        
+        if self.warm_up_task is not None and not self.warm_up_task.done():
+            await asyncio.shield(self.warm_up_task)
+        budget = self._budget(body)
+        
+        async def events():
+            stream = getattr(self.agent_executor, "stream", None)
+            if stream is None:
+                # Executors without streaming answer with a single result event
+                result = await self.agent_executor.execute(body)
+                await message_bus.flush(self.flush_timeout)
+                yield (json.dumps({"event": "result", "result": result}) + "\n").encode("utf-8")
+                return
+            
+            async for event in stream(body):
+                await message_bus.flush(self.flush_timeout)
+                yield (json.dumps(event) + "\n").encode("utf-8")
+        
+        # Past the deadline the stream ends with an error event instead of running on
+        async def bounded_events():
+            try:
+                async for chunk in bounded_stream(events(), "stream", seconds=budget):
+                    yield chunk
+            except DeadlineExceeded as e:
+                yield (json.dumps({"event": "error", "error": str(e), "status": 504}) + "\n").encode("utf-8")
+        
+        chunks = events() if budget is None else bounded_events()
+        if isinstance(body, dict) and body.get("message_id"):
+            chunks = self._tracked_stream(body, chunks)
+        if self.recorder is None:
+            return chunks
+        return self._recorded_stream(body, chunks)
+    
+    async def _tracked_stream(self, body: Dict[str, Any], chunks: AsyncIterator[bytes]) -> AsyncIterator[bytes]:
+        """Stream that `cancel` stops by cancelling the task sending it"""
+        action = (body.get("content") or {}).get("action", "unknown")
+        with self._track(body["message_id"], action, asyncio.current_task()):
+            async for chunk in chunks:
+                yield chunk
+    
+    async def _recorded_stream(self, body: Any, chunks: AsyncIterator[bytes]) -> AsyncIterator[bytes]:
+        started, clock = time.time(), time.perf_counter()
+        count, size, status, error = 0, 0, "ok", None
+        try:
+            async for chunk in chunks:
+                count += 1
+                size += len(chunk)
+                yield chunk
+        except Exception as e:
+            status, error = "error", str(e)
+            raise
+        finally:
+            self._record(body, started, clock, status, response_bytes=size, events=count, error=error)
+    
+    def get_metrics(self) -> Dict[str, Any]:
+        """Request handling metrics"""
+        metrics = {
+            "coalescing": self.single_flight.get_metrics(),
+            "cancellation": {
+                **self.cancel_stats,
+                "elapsed_seconds": round(self.cancel_stats["elapsed_seconds"], 2),
+                "reclaimed_seconds": round(self.cancel_stats["reclaimed_seconds"], 2),
+                "running": len(self.running)
+            }
+        }
+        if self.recorder is not None:
+            metrics["recorder"] = self.recorder.get_stats()
+        return metrics
@@ -1,13 +1,16 @@
-from typing import Dict, Any
-from langchain_google_genai import ChatGoogleGenerativeAI
-from langgraph.graph import StateGraph, END
+from typing import Dict, Any, AsyncIterator, Optional
 from typing_extensions import TypedDict
 from dotenv import load_dotenv
 import os
+import json
+import logging
 from agents.base_agent import BaseAgent
+from agents.spec import SPEC_SCHEMA, SPEC_OPEN, SPEC_CLOSE, SpecStreamParser, SpecError, TaskSpec, parse_spec
 
 load_dotenv()
 
+logger = logging.getLogger(__name__)
+
 
 class AnalystState(TypedDict):
     user_request: str
@@ -25,13 +28,18 @@ class AnalystAgentExecutor(BaseAgent):
         api_key = os.getenv("GOOGLE_API_KEY")
         if api_key:
             os.environ["GOOGLE_API_KEY"] = api_key
-            
-        self.llm = ChatGoogleGenerativeAI(
+    
+    def _build_llm(self):
+        from langchain_google_genai import ChatGoogleGenerativeAI
+        
+        return ChatGoogleGenerativeAI(
             model="gemini-2.5-flash"
         )
         
     async def execute(self, task_data: Dict[str, Any]) -> Dict[str, Any]:
         """Execute task based on input data"""
+        self.bind_request(task_data)
+        
         # Handle standard A2A message format
         content = task_data.get("content", {})
         action = content.get("action")
@@ -43,28 +51,87 @@ class AnalystAgentExecutor(BaseAgent):
         
         return {"error": f"Unknown action: {action}"}
     
+    async def stream(self, task_data: Dict[str, Any]) -> AsyncIterator[Dict[str, Any]]:
+        """Stream task events: the spec as soon as it is complete, then explanation deltas"""
+        self.bind_request(task_data)
+        
+        content = task_data.get("content", {})
+        action = content.get("action")
+        parameters = content.get("parameters", {})
+        
+        if action != "analyze_request":
+            yield {"event": "result", "result": await self.execute(task_data)}
+            return
+        
+        async for event in self.analyze(parameters.get("user_request", "")):
+            yield event
+    
     async def process(self, user_request: str) -> Dict[str, Any]:
         """Process user request and create development task"""
+        result: Dict[str, Any] = {}
+        async for event in self.analyze(user_request):
+            if event["event"] == "result":
+                result = event["result"]
+        return result
+    
+    async def analyze(self, user_request: str) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Analyze a request, streaming structured events
         
+        Yields:
+            {"event": "task", "task": ..., "spec": ...} once the spec is complete,
+            {"event": "explanation", "text": ...} for each explanation delta,
+            {"event": "result", "result": ...} with the full analysis last
+        """
         prompt = f"""You are a System Analyst Agent. Analyze this user request and create a clear development task.
 
 User Request: {user_request}
 
-Provide:
-1. A brief analysis of what the user wants
-2. A clear, detailed task description for the Developer agent
+Respond in exactly two parts.
+
+Part 1 - the development spec, FIRST, as a single JSON object between {SPEC_OPEN} and {SPEC_CLOSE} tags, matching this JSON schema:
+{json.dumps(SPEC_SCHEMA)}
+
+Part 2 - after the closing tag, a brief explanation for the user of what will be built and why.
 
 Keep it concise but complete."""
         
-        result = await self.llm.ainvoke(prompt)
-        response = result.content if hasattr(result, 'content') else str(result)
+        parser = SpecStreamParser()
+        spec: Optional[TaskSpec] = None
+        
+        async for chunk in self.stream_llm(prompt):
+            text = chunk.content if hasattr(chunk, 'content') else str(chunk)
+            if not isinstance(text, str) or not text:
+                continue
+            for item in parser.feed(text):
+                if item["kind"] == "spec":
+                    try:
+                        spec = parse_spec(item["text"])
+                    except SpecError as e:
+                        logger.warning(f"Analyst spec rejected: {e}")
+                        continue
+                    yield {"event": "task", "task": spec.to_task(), "spec": spec.to_dict()}
+                else:
+                    yield {"event": "explanation", "text": item["text"]}
         
-        # Extract task (simple heuristic: last paragraph or full response)
-        lines = response.strip().split('\n')
-        task = '\n'.join(lines[-3:]) if len(lines) > 3 else response
+        explanation = parser.explanation.strip()
+        if spec is None:
+            # No usable spec: fall back to the free-text heuristic
+            response = (parser.close() or parser.explanation or parser.spec_text or "").strip()
+            lines = response.split('\n')
+            task = '\n'.join(lines[-3:]) if len(lines) > 3 else response
+            explanation = explanation or response
+            spec = TaskSpec(task=task)
+            if not parser.explanation:
+                yield {"event": "explanation", "text": explanation}
+            yield {"event": "task", "task": task, "spec": spec.to_dict()}
         
-        return {
-            "message": response,
-            "task": task,
-            "status": "analyzed"
+        yield {
+            "event": "result",
+            "result": {
+                "message": explanation or spec.summary or spec.task,
+                "task": spec.to_task(),
+                "spec": spec.to_dict(),
+                "status": "analyzed"
+            }
         }
@@ -1,8 +1,72 @@
 """Base Agent class"""
 
+import asyncio
+import threading
+from contextvars import ContextVar
+from typing import Dict, Any, AsyncIterator, Optional
+from protocol import Notification
+from protocol.bus import message_bus
+from protocol.deadline import bounded, bounded_stream, from_metadata, set_deadline
+
+# Request being executed by the current task, used to address notifications
+_current_request: ContextVar[Optional[Dict[str, Any]]] = ContextVar("current_request", default=None)
+
 
 class BaseAgent:
-    """Base class for all agents - provides common agent name storage"""
-    
+    """Base class for all agents - provides common agent name storage and a lazily built LLM"""
+
+    # Build the LLM client during warm-up rather than on first use
+    preload_llm = True
+
     def __init__(self, name: str):
         self.name = name
+        self._llm = None
+        self._llm_lock = threading.Lock()
+
+    def _build_llm(self):
+        """Create the LLM client (heavy imports belong here, not at module level)"""
+        raise NotImplementedError
+
+    @property
+    def llm(self):
+        """LLM client, built on first access"""
+        if self._llm is None:
+            with self._llm_lock:
+                if self._llm is None:
+                    self._llm = self._build_llm()
+        return self._llm
+
+    async def warm_up(self):
+        """Import dependencies and build clients off the event loop"""
+        if self.preload_llm:
+            await asyncio.to_thread(lambda: self.llm)
+
+    def memory_usage(self) -> Dict[str, Any]:
+        """Caches this agent holds, by name, for memory diagnostics"""
+        return {}
+
+    def bind_request(self, task_data: Dict[str, Any]):
+        """Remember the incoming request so progress can be reported against it, and its deadline"""
+        _current_request.set(task_data)
+        set_deadline(from_metadata(task_data.get("metadata")))
+
+    async def invoke_llm(self, prompt: str, llm: Any = None) -> Any:
+        """Call the LLM, bounded by the request's deadline"""
+        return await bounded((llm or self.llm).ainvoke(prompt), f"{self.name} LLM call")
+
+    def stream_llm(self, prompt: str, llm: Any = None) -> AsyncIterator[Any]:
+        """Stream LLM output chunks, bounded by the request's deadline"""
+        return bounded_stream((llm or self.llm).astream(prompt), f"{self.name} LLM stream")
+
+    def publish_progress(self, message: str, event: str = "progress", **data):
+        """Publish a progress notification for the request being executed"""
+        task_data = _current_request.get() or {}
+        metadata = task_data.get("metadata") or {}
+
+        message_bus.publish(Notification(
+            from_agent=self.name,
+            to_agent=task_data.get("from", "Orchestrator"),
+            event=event,
+            data={"message": message, **data},
+            conversation_id=metadata.get("conversation_id")
+        ))
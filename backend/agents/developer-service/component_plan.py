@@ -0,0 +1,158 @@
+"""
+Component Plan
+
+Splits a large app into component files before any code is written. The plan
+is the shared interface contract: every component's name, file and props, and
+the state App owns. Each component is then generated on its own against the
+contract, concurrently, and App.js imports and composes them, so generation
+time follows the largest component instead of the whole app.
+"""
+
+from dataclasses import dataclass, field
+from typing import Dict, Any, List
+import json
+import re
+
+COMPONENTS_DIR = "/components"
+
+_COMPONENT_NAME_RE = re.compile(r"^[A-Z][A-Za-z0-9]*$")
+
+
+class PlanError(ValueError):
+    """Plan does not describe a usable split"""
+
+
+@dataclass
+class ComponentSpec:
+    """One component file and its interface"""
+    name: str
+    description: str = ""
+    # Prop name → type and meaning
+    props: Dict[str, str] = field(default_factory=dict)
+
+    @property
+    def path(self) -> str:
+        return f"{COMPONENTS_DIR}/{self.name}.js"
+
+    @property
+    def import_line(self) -> str:
+        return f"import {self.name} from './components/{self.name}';"
+
+    def signature(self) -> str:
+        """How the component is used, e.g. <TodoList items={...} onToggle={...} />"""
+        props = " ".join(f"{prop}={{...}}" for prop in self.props)
+        return f"<{self.name} {props} />" if props else f"<{self.name} />"
+
+
+@dataclass
+class ComponentPlan:
+    """Components of an app and how App composes them"""
+    components: List[ComponentSpec]
+    state: List[Dict[str, str]] = field(default_factory=list)
+    layout: str = ""
+
+    @classmethod
+    def from_dict(cls, data: Any, max_components: int = 8) -> "ComponentPlan":
+        """Validate a planner answer and build a plan"""
+        if not isinstance(data, dict):
+            raise PlanError("Plan must be an object")
+        items = data.get("components")
+        if not isinstance(items, list):
+            raise PlanError("Plan requires a 'components' list")
+        if len(items) > max_components:
+            raise PlanError(f"Plan has {len(items)} components, at most {max_components} allowed")
+
+        components = []
+        for item in items:
+            if not isinstance(item, dict):
+                raise PlanError("Every component must be an object")
+            name = str(item.get("name") or "")
+            if not _COMPONENT_NAME_RE.match(name) or name == "App":
+                raise PlanError(f"Invalid component name {name!r}")
+            if any(c.name == name for c in components):
+                raise PlanError(f"Duplicate component {name!r}")
+            props = item.get("props") or {}
+            if not isinstance(props, dict):
+                raise PlanError(f"Props of {name!r} must be an object")
+            if not all(str(prop).isidentifier() for prop in props):
+                raise PlanError(f"Props of {name!r} must be identifiers")
+            components.append(ComponentSpec(
+                name=name,
+                description=str(item.get("description") or ""),
+                props={str(prop): str(detail) for prop, detail in props.items()}
+            ))
+
+        state = data.get("state") or []
+        if not isinstance(state, list):
+            raise PlanError("'state' must be a list")
+        return cls(
+            components=components,
+            state=[{k: str(v) for k, v in s.items()} for s in state if isinstance(s, dict) and s.get("name")],
+            layout=str(data.get("layout") or "")
+        )
+
+    def contract(self) -> str:
+        """The interface every generated file is written against"""
+        lines = ["Files:", "- /App.js: default export App, owns the state and composes the components"]
+        lines.extend(f"- {c.path}: default export {c.name}" for c in self.components)
+
+        lines.append("\nComponents (props are the ONLY interface between files):")
+        for c in self.components:
+            lines.append(f"- {c.name}: {c.description}" if c.description else f"- {c.name}")
+            lines.extend(f"    {prop}: {detail}" for prop, detail in c.props.items())
+            if not c.props:
+                lines.append("    (no props)")
+
+        if self.state:
+            lines.append("\nState owned by App:")
+            for s in self.state:
+                detail = ", ".join(v for k, v in s.items() if k != "name" and v)
+                lines.append(f"- {s['name']} ({detail})" if detail else f"- {s['name']}")
+        if self.layout:
+            lines.append(f"\nLayout: {self.layout}")
+        return "\n".join(lines)
+
+
+def parse_plan(text: str, max_components: int = 8) -> ComponentPlan:
+    """Parse a plan from JSON text, tolerating markdown code fences"""
+    text = re.sub(r"^\s*```(?:json)?\s*|\s*```\s*$", "", text.strip())
+    try:
+        data = json.loads(text)
+    except ValueError as e:
+        raise PlanError(f"Plan is not valid JSON: {e}")
+    return ComponentPlan.from_dict(data, max_components)
+
+
+def fallback_component(spec: ComponentSpec) -> str:
+    """Minimal component honouring the contract, used when generation returns nothing"""
+    params = f"{{ {', '.join(spec.props)} }}" if spec.props else ""
+    css_class = re.sub(r"(?<!^)(?=[A-Z])", "-", spec.name).lower()
+    text = re.sub(r"[{}<>]", "", spec.description) or spec.name
+    return f"""import React from 'react';
+
+export default function {spec.name}({params}) {{
+  return (
+    <div className="{css_class}">
+      <p>{text}</p>
+    </div>
+  );
+}}
+"""
+
+
+def stitch_imports(app_code: str, plan: ComponentPlan) -> str:
+    """Add the import of every planned component App.js does not import yet"""
+    missing = [
+        c.import_line for c in plan.components
+        if not re.search(rf"^\s*import\s+{c.name}\s+from\s", app_code, re.M)
+    ]
+    if not missing:
+        return app_code
+    lines = app_code.split("\n")
+    # After the last top-level import, or at the top
+    end = max((i for i, line in enumerate(lines) if line.startswith("import ")), default=-1)
+    # A multi-line import ends at its "from '...'" line
+    while 0 <= end < len(lines) - 1 and not re.search(r"""from\s*['"]|^import\s*['"]""", lines[end]):
+        end += 1
+    lines[end + 1:end + 1] = missing
+    return "\n".join(lines)
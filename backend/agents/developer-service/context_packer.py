@@ -0,0 +1,226 @@
+"""
+Prompt Context Packer
+
+Keeps Developer prompts within a token budget as generated apps grow. Code is
+split into top-level declarations. Then only the regions a prompt needs are
+packed: the JSX tree and the classNames in use for styling, and the
+components mentioned in errors or requests for edits. Declarations edited
+from a partial context are spliced back into the full file.
+"""
+
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Iterable
+import re
+
+# Top-level declarations start at column 0 in generated code
+_DECLARATION_RE = re.compile(
+    r"^(?:export\s+)?(?:default\s+)?(?:async\s+)?(?:function\*?|const|let|var|class)\s+([A-Za-z_$][\w$]*)",
+    re.M
+)
+_EXPORT_RE = re.compile(r"^export\s+default\s+([A-Za-z_$][\w$]*)\s*;?[ \t]*$", re.M)
+_TAG_RE = re.compile(r"<([A-Za-z][\w.]*)((?:\s+[^<>]*?)?)\s*/?>", re.S)
+_CLASSNAME_RE = re.compile(r"""className\s*=\s*(?:"([^"]*)"|'([^']*)'|\{\s*`([^`]*)`\s*\}|\{\s*['"]([^'"]*)['"]\s*\})""")
+_LINE_RE = re.compile(r"line (\d+)")
+
+ELIDED = "  // ... unchanged ..."
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count (about four characters per token)"""
+    return (len(text) + 3) // 4
+
+
+@dataclass
+class Region:
+    """A top-level block of a JS module"""
+    name: str
+    text: str
+    start_line: int
+    end_line: int
+
+    @property
+    def signature(self) -> str:
+        """First line of the declaration, with the body elided"""
+        first = self.text.split("\n", 1)[0].rstrip()
+        if first.endswith(("{", "(", "=>")):
+            return f"{first}\n{ELIDED}\n}}" if first.endswith("{") else f"{first}\n{ELIDED}"
+        return first
+
+
+def split_regions(code: str) -> List[Region]:
+    """Split a module into its import block and top-level declarations"""
+    regions: List[Region] = []
+    starts = [(m.start(), m.group(1)) for m in _DECLARATION_RE.finditer(code)]
+    # A trailing `export default App;` is its own region so edits cannot drop it
+    starts += [(m.start(), f"<export {m.group(1)}>") for m in _EXPORT_RE.finditer(code)]
+    starts.sort()
+
+    head_end = starts[0][0] if starts else len(code)
+    head = code[:head_end]
+    if head.strip():
+        regions.append(Region("<imports>", head.rstrip("\n"), 1, head.count("\n") + 1))
+
+    for i, (start, name) in enumerate(starts):
+        end = starts[i + 1][0] if i + 1 < len(starts) else len(code)
+        text = code[start:end].rstrip("\n")
+        first_line = code.count("\n", 0, start) + 1
+        regions.append(Region(name, text, first_line, first_line + text.count("\n")))
+    return regions
+
+
+def class_names(code: str) -> List[str]:
+    """Class names used in className attributes, in order of first use"""
+    seen: Dict[str, None] = {}
+    for match in _CLASSNAME_RE.finditer(code):
+        value = next(g for g in match.groups() if g is not None)
+        # Static parts of template literals only
+        value = re.sub(r"\$\{[^}]*\}", " ", value)
+        for name in value.split():
+            seen.setdefault(name, None)
+    return list(seen)
+
+
+def jsx_outline(code: str) -> List[str]:
+    """Opening JSX tags with their classNames, nested by depth"""
+    lines = []
+    depth = 0
+    position = 0
+    for match in _TAG_RE.finditer(code):
+        # Closing tags between matches reduce the depth
+        depth = max(0, depth - len(re.findall(r"</[A-Za-z]", code[position:match.start()])))
+        position = match.end()
+        tag, attributes = match.group(1), match.group(2) or ""
+        classes = class_names(attributes)
+        label = f"<{tag}" + (f' className="{" ".join(classes)}"' if classes else "") + ">"
+        lines.append("  " * depth + label)
+        if not match.group(0).endswith("/>"):
+            depth += 1
+    return lines
+
+
+def mentioned_regions(regions: List[Region], texts: Iterable[str]) -> List[str]:
+    """Declarations named in, or located by line numbers from, errors and requests"""
+    names = []
+    joined = "\n".join(texts)
+    # File paths in Tester errors ("/App.js: ...") do not name declarations
+    squashed = re.sub(r"[\s_-]+", "", re.sub(r"/[\w./-]+", "", joined)).lower()
+    lines = [int(n) for n in _LINE_RE.findall(joined)]
+    for region in regions:
+        if region.name.startswith("<") or len(region.name) < 3:
+            continue
+        if region.name.lower() in squashed or any(region.start_line <= n <= region.end_line for n in lines):
+            names.append(region.name)
+    return names
+
+
+def splice_declarations(code: str, updated: str) -> str:
+    """Replace declarations in code with same-named ones from updated; add new ones and imports"""
+    original = split_regions(code)
+    changes = {r.name: r for r in split_regions(updated)}
+
+    new_imports = []
+    if "<imports>" in changes:
+        existing = set(line.strip() for line in original[0].text.split("\n")) if original and original[0].name == "<imports>" else set()
+        new_imports = [
+            line for line in changes.pop("<imports>").text.split("\n")
+            if line.strip().startswith("import") and line.strip() not in existing
+        ]
+
+    parts = []
+    for region in original:
+        replacement = changes.pop(region.name, None)
+        if region.name == "<imports>":
+            parts.append("\n".join([region.text] + new_imports))
+            new_imports = []
+            continue
+        if replacement is not None and ELIDED.strip() not in replacement.text:
+            parts.append(replacement.text)
+        else:
+            parts.append(region.text)
+
+    # New declarations go before the default export, which is usually last
+    added = [r.text for r in changes.values() if ELIDED.strip() not in r.text]
+    if added:
+        index = next((i for i, r in enumerate(original) if r.text.startswith("export default")), len(parts))
+        parts[index:index] = added
+    if new_imports:
+        parts.insert(0, "\n".join(new_imports))
+    return "\n\n".join(part.strip("\n") for part in parts) + "\n"
+
+
+@dataclass
+class PackedContext:
+    """Code context assembled for a prompt"""
+    text: str
+    complete: bool
+    tokens: int
+    focus: List[str] = field(default_factory=list)
+
+
+class ContextPacker:
+    """Assemble prompt context within a token budget"""
+
+    def __init__(self, max_tokens: int = 4000, styles_max_tokens: int = 800):
+        self.max_tokens = max_tokens
+        self.styles_max_tokens = styles_max_tokens
+
+    def pack_code(self, code: str, texts: Iterable[str] = (), max_tokens: Optional[int] = None) -> PackedContext:
+        """
+        Pack a module for an edit
+
+        The whole module is used when it fits. Otherwise imports and the
+        declarations mentioned in the errors or request (the default export
+        when none are) are kept whole. Other declarations are reduced to
+        signatures while the budget allows.
+
+        Args:
+            code: Module source
+            texts: Errors or requests used to pick relevant declarations
+            max_tokens: Budget override
+
+        Returns:
+            PackedContext; complete is False when declarations were elided
+        """
+        budget = max_tokens or self.max_tokens
+        tokens = estimate_tokens(code)
+        if tokens <= budget:
+            return PackedContext(code, True, tokens)
+
+        regions = split_regions(code)
+        focus = mentioned_regions(regions, texts)
+        if not focus:
+            focus = [r.name for r in regions if r.text.startswith("export default")][:1]
+
+        chosen: Dict[str, str] = {}
+        used = 0
+        # Imports and focused declarations first, whole; then the rest as signatures
+        ordered = sorted(regions, key=lambda r: (r.name != "<imports>", r.name not in focus))
+        for region in ordered:
+            whole = region.name == "<imports>" or region.name in focus
+            text = region.text if whole else region.signature
+            cost = estimate_tokens(text)
+            if used + cost > budget and not whole:
+                continue
+            chosen[region.name] = text
+            used += cost
+
+        text = "\n\n".join(chosen[r.name] for r in regions if r.name in chosen)
+        return PackedContext(text, False, estimate_tokens(text), focus)
+
+    def pack_styles(self, code: str) -> PackedContext:
+        """Class names in use and the JSX structure, for stylesheet generation"""
+        names = class_names(code)
+        header = "Class names used: " + (", ".join(names) if names else "(none)")
+        outline = jsx_outline(code)
+
+        budget = self.styles_max_tokens - estimate_tokens(header)
+        kept = []
+        for line in outline:
+            budget -= estimate_tokens(line) + 1
+            if budget < 0:
+                kept.append("...")
+                break
+            kept.append(line)
+
+        text = header + "\n\nJSX structure:\n" + "\n".join(kept)
+        return PackedContext(text, budget >= 0, estimate_tokens(text))
@@ -1,15 +1,69 @@
-from typing import Dict, Any, List
-from langchain_google_genai import ChatGoogleGenerativeAI
-from langchain.agents import AgentExecutor, create_tool_calling_agent
-from langchain.tools import tool
-from langchain_core.prompts import ChatPromptTemplate
+from typing import Dict, Any, List, Optional
 from dotenv import load_dotenv
 import os
-import json
+import re
+import asyncio
+import logging
 from agents.base_agent import BaseAgent
+from agents.templates import template_registry, DEFAULT_STYLES, fallback_app
+from project_cache import ProjectSimilarityIndex
+from context_packer import ContextPacker, PackedContext, class_names, splice_declarations
+from component_plan import (
+    COMPONENTS_DIR, ComponentPlan, ComponentSpec, PlanError, fallback_component, parse_plan, stitch_imports
+)
+from runtime import cpu_offloader
 
 load_dotenv()
 
+logger = logging.getLogger(__name__)
+
+# Answer of an edit to a file the request does not concern
+UNCHANGED_MARKER = "UNCHANGED"
+
+
+def strip_code_fences(text: str) -> str:
+    """Remove a surrounding markdown code fence"""
+    text = text.strip()
+    if text.startswith("```"):
+        lines = text.split('\n')
+        if lines[0].startswith("```"):
+            lines = lines[1:]
+        if lines and lines[-1].strip() == "```":
+            lines = lines[:-1]
+        text = '\n'.join(lines)
+    return text
+
+
+def clean_code(code: str, task: str = "") -> str:
+    """Clean generated code"""
+    code = strip_code_fences(code)
+    
+    # Fallback if code is invalid
+    if not code or len(code) < 20:
+        code = fallback_app(task)
+    
+    return code
+
+
+def clean_css(css: str) -> str:
+    """Clean generated CSS"""
+    css = strip_code_fences(css)
+    
+    if not css or len(css) < 20:
+        css = DEFAULT_STYLES
+    
+    return css
+
+
+def clean_component(code: str, spec: ComponentSpec) -> str:
+    """Clean a generated component file"""
+    code = strip_code_fences(code)
+    
+    if not code or len(code) < 20:
+        code = fallback_component(spec)
+    
+    return code
+
 
 class DeveloperAgentExecutor(BaseAgent):
     """Developer Agent Executor with A2A protocol support and full project generation"""
@@ -21,100 +75,185 @@ class DeveloperAgentExecutor(BaseAgent):
         api_key = os.getenv("GOOGLE_API_KEY")
         if api_key:
             os.environ["GOOGLE_API_KEY"] = api_key
-            
-        self.llm = ChatGoogleGenerativeAI(
+        
+        # Clients for non-default sampling temperatures (repair candidates)
+        self._llm_variants: Dict[float, Any] = {}
+        
+        # Prompts carry only the code regions they need, within a token budget
+        self.context_packer = ContextPacker(
+            max_tokens=int(os.getenv("DEVELOPER_CONTEXT_TOKENS", "4000")),
+            styles_max_tokens=int(os.getenv("DEVELOPER_STYLES_CONTEXT_TOKENS", "800"))
+        )
+        
+        # Large apps are planned as components and generated concurrently
+        self.parallel_components = os.getenv("DEVELOPER_PARALLEL_COMPONENTS", "1") != "0"
+        self.plan_min_chars = int(os.getenv("DEVELOPER_PLAN_MIN_CHARS", "600"))
+        self.max_components = int(os.getenv("DEVELOPER_MAX_COMPONENTS", "8"))
+        
+        # Near-duplicate cache of previously generated projects
+        self.cache_hit_threshold = float(os.getenv("PROJECT_CACHE_HIT_THRESHOLD", "0.85"))
+        self.cache_seed_threshold = float(os.getenv("PROJECT_CACHE_SEED_THRESHOLD", "0.5"))
+        self.project_index = ProjectSimilarityIndex(
+            max_entries=int(os.getenv("PROJECT_CACHE_SIZE", "256")),
+            persist_path=os.getenv("PROJECT_CACHE_PATH")
+        )
+    
+    async def warm_up(self):
+        """Build the LLM client and load the persisted project index"""
+        await super().warm_up()
+        await asyncio.to_thread(self.project_index.load)
+    
+    def memory_usage(self) -> Dict[str, Any]:
+        return {"project_cache": self.project_index.entries}
+    
+    def _build_llm(self, temperature: float = 0.7):
+        from langchain_google_genai import ChatGoogleGenerativeAI
+        
+        return ChatGoogleGenerativeAI(
             model="gemini-2.5-flash",
-            temperature=0.7
+            temperature=temperature
         )
+    
+    def _llm_for(self, temperature: Optional[float] = None):
+        """LLM client for a sampling temperature (clients are reused per temperature)"""
+        if temperature is None:
+            return self.llm
+        with self._llm_lock:
+            if temperature not in self._llm_variants:
+                self._llm_variants[temperature] = self._build_llm(temperature)
+            return self._llm_variants[temperature]
+    
+    @staticmethod
+    def _usage(result: Any, prompt: str, output: str) -> Dict[str, int]:
+        """Token usage reported by the model, estimated when unavailable"""
+        usage = getattr(result, "usage_metadata", None) or {}
+        input_tokens = usage.get("input_tokens") or len(prompt) // 4
+        output_tokens = usage.get("output_tokens") or len(output) // 4
+        return {
+            "input_tokens": input_tokens,
+            "output_tokens": output_tokens,
+            "total_tokens": input_tokens + output_tokens
+        }
         
     async def execute(self, task_data: Dict[str, Any]) -> Dict[str, Any]:
         """Execute task based on input data"""
+        self.bind_request(task_data)
+        
         # Handle standard A2A message format
         content = task_data.get("content", {})
         action = content.get("action")
         parameters = content.get("parameters", {})
+        # Caller can expand static files from the shared template registry
+        accept_file_refs = parameters.get("accept_file_refs", False)
         
         if action == "generate_code":
             task = parameters.get("task", "")
-            return await self.generate_complete_project(task)
+            user_request = parameters.get("user_request")
+            scaffold = parameters.get("scaffold")
+            return await self.generate_complete_project(task, user_request, scaffold, accept_file_refs)
             
         elif action == "modify_code":
             current_files = parameters.get("current_files", {})
             modification_request = parameters.get("modification_request", "")
             task_context = parameters.get("task_context", "")
-            return await self.modify_code(current_files, modification_request, task_context)
+            return await self.modify_code(current_files, modification_request, task_context, accept_file_refs)
             
         elif action == "fix_bug":
             files = parameters.get("files", {})
             errors = parameters.get("errors", [])
-            return await self.fix_bug(files, errors)
+            return await self.fix_bug(
+                files, errors, accept_file_refs,
+                temperature=parameters.get("temperature"),
+                candidate=parameters.get("candidate", 0)
+            )
             
         return {"error": f"Unknown action: {action}"}
     
-    async def generate_complete_project(self, task: str) -> Dict[str, Any]:
+    async def generate_complete_project(self, task: str, user_request: str = None,
+                                        scaffold: str = None, accept_file_refs: bool = False) -> Dict[str, Any]:
         """Generate complete React project with all necessary files"""
+        template = template_registry.get(scaffold)
         
-        # Generate App.js
-        app_code = await self._generate_app_code(task)
-        
-        # Generate index.js
-        index_code = """import React from 'react';
-import { createRoot } from 'react-dom/client';
-import App from './App';
-import './styles.css';
-
-const root = createRoot(document.getElementById('root'));
-root.render(<App />);
-"""
+        # Paraphrased requests reuse (or start from) a previously generated project
+        cache_key = user_request or task
+        cached, similarity = self.project_index.lookup(cache_key, min_similarity=self.cache_seed_threshold)
+        same_scaffold = cached is not None and all(
+            cached.files.get(path) == f.content for path, f in template.files.items()
+        )
         
-        # Generate package.json
-        package_json = {
-            "name": "generated-app",
-            "version": "1.0.0",
-            "dependencies": {
-                "react": "^18.3.0",
-                "react-dom": "^18.3.0"
-            },
-            "devDependencies": {},
-            "scripts": {
-                "start": "react-scripts start",
-                "build": "react-scripts build"
+        if cached and same_scaffold and similarity >= self.cache_hit_threshold:
+            logger.info(f"Project cache hit ({similarity:.2f}) for '{cache_key[:60]}' ~ '{cached.text[:60]}'")
+            return {
+                **self._files_response(dict(cached.files), accept_file_refs),
+                "status": "success",
+                "scaffold": template.name,
+                "cache": {"hit": True, "similarity": round(similarity, 3), "source": cached.text}
             }
-        }
         
-        # Generate index.html
-        html = """<!DOCTYPE html>
-<html lang="en">
-<head>
-    <meta charset="UTF-8">
-    <meta name="viewport" content="width=device-width, initial-scale=1.0">
-    <title>Generated App</title>
-</head>
-<body>
-    <div id="root"></div>
-</body>
-</html>"""
+        reference_files = cached.files if cached else {}
+        
+        # Large apps: App.js and one file per component, generated concurrently
+        plan = await self._plan_components(task, template.prompt_hint) if self._should_plan(task) else None
+        if plan:
+            self.publish_progress(
+                f"Generating {len(plan.components)} components in parallel...", stage="app",
+                components=[c.name for c in plan.components]
+            )
+            app_files = await self._generate_components(task, plan, reference_files, template.prompt_hint)
+        else:
+            self.publish_progress("Starting code generation...", stage="app")
+            app_files = {
+                "/App.js": await self._generate_app_code(task, reference_files.get("/App.js"), template.prompt_hint)
+            }
         
         # Generate styles.css
-        styles = await self._generate_styles(task, app_code)
+        self.publish_progress("Generating styles...", stage="styles")
+        styles = await self._generate_styles(task, "\n\n".join(app_files.values()))
+        
+        # Static scaffold files are pre-serialized once at startup
+        files = {
+            **app_files,
+            **template.contents(),
+            "/styles.css": styles
+        }
+        
+        self.project_index.add(cache_key, files)
+        await self.project_index.asave()
         
         return {
-            "files": {
-                "/App.js": app_code,
-                "/index.js": index_code,
-                "/package.json": json.dumps(package_json, indent=2),
-                "/index.html": html,
-                "/styles.css": styles
-            },
-            "status": "success"
+            **self._files_response(files, accept_file_refs),
+            "status": "success",
+            "scaffold": template.name,
+            "cache": {
+                "hit": False,
+                "similarity": round(similarity, 3),
+                "seeded_from": cached.text if cached else None
+            }
         }
     
-    async def _generate_app_code(self, task: str) -> str:
-        """Generate App.js code"""
+    def _files_response(self, files: Dict[str, str], accept_file_refs: bool) -> Dict[str, Any]:
+        """Build the files part of a response, sending static files by reference when allowed"""
+        if not accept_file_refs:
+            return {"files": files}
+        
+        dynamic, refs = template_registry.split_static(files)
+        return {"files": dynamic, "file_refs": refs}
+    
+    async def _generate_app_code(self, task: str, reference_code: str = None,
+                                 scaffold_hint: str = "") -> str:
+        """Generate App.js code, optionally starting from a similar previous app"""
+        reference = f"\n{scaffold_hint}\n" if scaffold_hint else ""
+        if reference_code:
+            reference += f"""
+A similar app was generated previously. Use it as a starting point and adapt it
+to the task - keep what fits, change what differs:
+{reference_code}
+"""
+        
         prompt = f"""Generate a complete, working React component for this task:
 
 Task: {task}
-
+{reference}
 IMPORTANT RULES:
 1. Generate ONLY pure JavaScript/React code - NO markdown, NO code fences, NO explanations
 2. Start directly with imports (e.g., "import React...")
@@ -140,21 +279,179 @@ export default function App() {{
 
 Now generate code for the task above:"""
         
-        result = await self.llm.ainvoke(prompt)
+        result = await self.invoke_llm(prompt)
         code = result.content if hasattr(result, 'content') else str(result)
         
-        return self._clean_code(code, task)
+        return await self._clean_code(code, task)
+    
+    def _should_plan(self, task: str) -> bool:
+        """Only requests large enough to pay for the planning call are split"""
+        return self.parallel_components and len(task) >= self.plan_min_chars
+    
+    async def _plan_components(self, task: str, scaffold_hint: str = "") -> Optional[ComponentPlan]:
+        """Split the app into components with a shared props contract, or None for a single App.js"""
+        self.publish_progress("Planning components...", stage="plan")
+        hint = f"\n{scaffold_hint}\n" if scaffold_hint else ""
+        prompt = f"""Plan the component files of a React app before it is written.
+
+Task: {task}
+{hint}
+Split the app into 2 to {self.max_components} presentational components. App owns the
+shared state and passes it down; components talk to each other only through
+props and callbacks given by App. Each component is written separately by
+someone who sees only this plan, so props must be complete and precise.
+
+Return ONLY JSON, no explanations, no markdown fences:
+{{
+  "components": [
+    {{"name": "PascalCaseName", "description": "what it renders and does",
+      "props": {{"propName": "type and meaning, e.g. (id: number) => void, called when ..."}}}}
+  ],
+  "state": [{{"name": "stateName", "type": "type", "purpose": "what it holds"}}],
+  "layout": "how App arranges the components"
+}}
+
+If the app is too small to split, return {{"components": []}}."""
+        
+        result = await self.invoke_llm(prompt, self._llm_for(0.2))
+        text = result.content if hasattr(result, 'content') else str(result)
+        
+        try:
+            plan = parse_plan(text, self.max_components)
+        except PlanError as e:
+            logger.warning(f"Component plan rejected, generating a single App.js: {e}")
+            return None
+        if len(plan.components) < 2:
+            logger.info("No component split planned, generating a single App.js")
+            return None
+        
+        logger.info(f"Planned components: {', '.join(c.name for c in plan.components)}")
+        return plan
+    
+    async def _generate_components(self, task: str, plan: ComponentPlan,
+                                   reference_files: Dict[str, str], scaffold_hint: str = "") -> Dict[str, str]:
+        """Generate App.js and every component file concurrently against the plan's contract"""
+        contract = plan.contract()
+        # A previous single-file App.js would pull everything back into one file
+        split_before = any(path.startswith(f"{COMPONENTS_DIR}/") for path in reference_files)
+        jobs = [self._generate_app_shell(
+            task, plan, contract, reference_files.get("/App.js") if split_before else None, scaffold_hint
+        )]
+        jobs.extend(
+            self._generate_component(task, spec, contract, reference_files.get(spec.path))
+            for spec in plan.components
+        )
+        
+        results = await self._run_concurrently(jobs)
+        
+        files = {"/App.js": results[0]}
+        files.update((spec.path, code) for spec, code in zip(plan.components, results[1:]))
+        return files
+    
+    @staticmethod
+    async def _run_concurrently(jobs: List[Any]) -> List[Any]:
+        """Await coroutines concurrently; when one fails the rest are cancelled"""
+        tasks = [asyncio.ensure_future(job) for job in jobs]
+        try:
+            return await asyncio.gather(*tasks)
+        except BaseException:
+            for t in tasks:
+                t.cancel()
+            raise
+    
+    async def _generate_component(self, task: str, spec: ComponentSpec, contract: str,
+                                  reference_code: str = None) -> str:
+        """Generate one component file"""
+        reference = ""
+        if reference_code:
+            reference = f"""
+A similar component was generated previously. Use it as a starting point and
+adapt it to the contract:
+{reference_code}
+"""
+        
+        prompt = f"""Generate one component file of a React app. The other files are being
+written at the same time against the same interface contract.
+
+App task: {task}
+
+Interface contract:
+{contract}
+
+Write {spec.path}, the "{spec.name}" component: {spec.description}
+It is rendered by App as: {spec.signature()}
+{reference}
+IMPORTANT RULES:
+1. Generate ONLY pure JavaScript/React code - NO markdown, NO code fences, NO explanations
+2. Start directly with imports (e.g., "import React from 'react';")
+3. Export a default function component named "{spec.name}"
+4. Take exactly the props in the contract; keep any other state local to this component
+5. Do NOT import App or the other components
+6. Use className for styling (CSS classes will be in styles.css), with class names specific to this component
+7. Do NOT include any text before or after the code
+8. Do NOT wrap code in ```react or ``` blocks
+
+Now generate {spec.path}:"""
+        
+        result = await self.invoke_llm(prompt)
+        code = result.content if hasattr(result, 'content') else str(result)
+        
+        return await cpu_offloader.run(clean_component, code, spec, size=len(code))
+    
+    async def _generate_app_shell(self, task: str, plan: ComponentPlan, contract: str,
+                                  reference_code: str = None, scaffold_hint: str = "") -> str:
+        """Generate App.js composing the planned components"""
+        reference = f"\n{scaffold_hint}\n" if scaffold_hint else ""
+        if reference_code:
+            reference += f"""
+A similar App.js was generated previously. Use it as a starting point and
+adapt it to the contract:
+{reference_code}
+"""
+        imports = "\n".join(c.import_line for c in plan.components)
+        usage = "\n".join(c.signature() for c in plan.components)
+        
+        prompt = f"""Generate App.js of a React app whose components are being written in
+separate files at the same time.
+
+Task: {task}
+{reference}
+Interface contract:
+{contract}
+
+IMPORTANT RULES:
+1. Generate ONLY pure JavaScript/React code - NO markdown, NO code fences, NO explanations
+2. Start with these imports, plus the React hooks you use:
+import React, {{ useState }} from 'react';
+{imports}
+3. Export a default function component named "App"
+4. App owns the state in the contract and passes it down as props
+5. Render the components with exactly the props in the contract:
+{usage}
+6. Do NOT define the components in this file
+7. Use className for styling (CSS classes will be in styles.css)
+8. Do NOT include any text before or after the code
+
+Now generate App.js:"""
+        
+        result = await self.invoke_llm(prompt)
+        code = result.content if hasattr(result, 'content') else str(result)
+        
+        code = await self._clean_code(code, task)
+        return stitch_imports(code, plan)
     
     async def _generate_styles(self, task: str, app_code: str = "") -> str:
         """Generate CSS styles"""
+        structure = (await cpu_offloader.run(self.context_packer.pack_styles, app_code, size=len(app_code))).text
         prompt = f"""Generate modern CSS for this React app.
 
 Task: {task}
 
 App Code Structure:
-{app_code[:500]}...
+{structure}
 
 Generate clean, modern CSS with:
+- A rule for every class name used above
 - Responsive design
 - Good color scheme (use CSS variables)
 - Proper spacing and typography
@@ -163,97 +460,52 @@ Generate clean, modern CSS with:
 
 Return ONLY CSS code, no explanations, no markdown fences."""
         
-        result = await self.llm.ainvoke(prompt)
+        result = await self.invoke_llm(prompt)
         css = result.content if hasattr(result, 'content') else str(result)
         
         # Clean CSS
-        css = css.strip()
-        if css.startswith("```"):
-            lines = css.split('\n')
-            if lines[0].startswith("```"):
-                lines = lines[1:]
-            if lines and lines[-1].strip() == "```":
-                lines = lines[:-1]
-            css = '\n'.join(lines)
-        
-        if not css or len(css) < 20:
-            css = """/* Default styles */
-:root {
-  --primary-color: #6366f1;
-  --secondary-color: #8b5cf6;
-  --bg-color: #ffffff;
-  --text-color: #1f2937;
-}
-
-* {
-  margin: 0;
-  padding: 0;
-  box-sizing: border-box;
-}
-
-body {
-  font-family: -apple-system, BlinkMacSystemFont, 'Segoe UI', 'Roboto', sans-serif;
-  background: var(--bg-color);
-  color: var(--text-color);
-}
-
-.app-container {
-  max-width: 1200px;
-  margin: 0 auto;
-  padding: 2rem;
-}
-
-button {
-  background: var(--primary-color);
-  color: white;
-  border: none;
-  padding: 0.75rem 1.5rem;
-  border-radius: 0.5rem;
-  cursor: pointer;
-  font-size: 1rem;
-  transition: all 0.2s;
-}
-
-button:hover {
-  background: var(--secondary-color);
-  transform: translateY(-2px);
-}
-"""
+        css = await cpu_offloader.run(clean_css, css, size=len(css))
         
         return css
     
-    def _clean_code(self, code: str, task: str = "") -> str:
-        """Clean generated code"""
-        code = code.strip()
-        
-        # Remove markdown code fences
-        if code.startswith("```"):
-            lines = code.split('\n')
-            if lines[0].startswith("```"):
-                lines = lines[1:]
-            if lines and lines[-1].strip() == "```":
-                lines = lines[:-1]
-            code = '\n'.join(lines)
-        
-        # Fallback if code is invalid
-        if not code or len(code) < 20:
-            code = f"""import React from 'react';
-
-export default function App() {{
-  return (
-    <div className="app-container">
-      <h1>Task: {task}</h1>
-      <p>Code generation in progress...</p>
-    </div>
-  );
-}}"""
-        
-        return code
+    async def _clean_code(self, code: str, task: str = "") -> str:
+        """Clean generated code (off the event loop for large outputs)"""
+        return await cpu_offloader.run(clean_code, code, task, size=len(code))
+    
+    @staticmethod
+    def _edit_sections(packed: PackedContext, component: str = "App") -> Dict[str, str]:
+        """Code heading and output rule for a packed edit prompt"""
+        if packed.complete:
+            return {
+                "heading": "Current App Code:" if component == "App" else f"Current Code of the {component} component:",
+                "output": f"Generate the complete file. Start directly with imports and export a default function component named \"{component}\""
+            }
+        return {
+            "heading": (
+                "Current App Code (large file: the declarations relevant to this change are shown in full, "
+                "others are abbreviated with \"// ... unchanged ...\" or omitted):"
+            ),
+            "output": (
+                "Return ONLY the complete top-level declarations you change or add (whole functions or consts), "
+                "plus any new import lines. Do NOT return unchanged or abbreviated declarations"
+            )
+        }
+    
+    async def _apply_edit(self, path: str, current_code: str, output: str, packed: PackedContext) -> str:
+        """Turn model output into the new file, splicing partial edits into the full code"""
+        if not packed.complete:
+            updated = strip_code_fences(output)
+            output = await cpu_offloader.run(splice_declarations, current_code, updated, size=len(current_code))
+        if self._component_of(path) == "App":
+            return await self._clean_code(output)
+        # A component file keeps its code (and the props contract) rather than becoming a fallback App
+        code = strip_code_fences(output)
+        return code if len(code) >= 20 else current_code
     
     async def modify_code(self, current_files: Dict[str, str], 
-                         modification_request: str, task_context: str) -> Dict[str, Any]:
+                         modification_request: str, task_context: str,
+                         accept_file_refs: bool = False) -> Dict[str, Any]:
         """Modify existing code based on user request"""
-        current_app = current_files.get("/App.js", "")
         current_css = current_files.get("/styles.css", "")
         
         # Determine if this is a styling request
@@ -263,20 +515,91 @@ export default function App() {{
         
         if is_styling:
             # Generate new CSS
-            new_css = await self._generate_styles(modification_request, current_app)
+            self.publish_progress("Updating styles...", stage="styles")
+            # Split projects keep class names in their component files too
+            app_code = "\n\n".join(
+                code for path, code in current_files.items()
+                if path == "/App.js" or path.startswith(f"{COMPONENTS_DIR}/")
+            )
+            new_css = await self._generate_styles(modification_request, app_code)
             return {
-                "files": {
+                **self._files_response({
                     **current_files,
                     "/styles.css": new_css
-                },
+                }, accept_file_refs),
                 "status": "modified"
             }
         else:
-            # Modify App.js
-            prompt = f"""You are modifying an existing React application.
+            # Modify App.js, or the component files of a split project the request is about
+            self.publish_progress("Modifying code...", stage="app")
+            targets = self._edit_targets(current_files, modification_request)
+            edits = await self._run_concurrently([
+                self._modify_file(current_files, path, modification_request, task_context, optional=len(targets) > 1)
+                for path in targets
+            ])
+            
+            return {
+                **self._files_response({
+                    **current_files,
+                    **{path: code for path, code in zip(targets, edits) if code is not None}
+                }, accept_file_refs),
+                "status": "modified"
+            }
+    
+    @staticmethod
+    def _component_of(path: str) -> str:
+        """Component a module exports: App, or the name of a split-out component file"""
+        if path.startswith(f"{COMPONENTS_DIR}/"):
+            return os.path.splitext(os.path.basename(path))[0]
+        return "App"
+    
+    @classmethod
+    def _edit_targets(cls, files: Dict[str, str], request: str) -> List[str]:
+        """
+        Files a content edit applies to
 
-Current App Code:
-{current_app}
+        Single-file apps edit App.js. Split projects edit the components the
+        request names (by component name or one of their class names), or App.js
+        and every component when it names none.
+        """
+        components = [p for p in files if p.startswith(f"{COMPONENTS_DIR}/") and p.endswith((".js", ".jsx"))]
+        if not components:
+            return ["/App.js"]
+        
+        text = request.lower()
+        named = []
+        for path in components:
+            name = cls._component_of(path)
+            words = re.sub(r"(?<!^)(?=[A-Z])", " ", name).lower()
+            mentions = {name.lower(), words, words.replace(" ", "-")}
+            mentions.update(c.lower() for c in class_names(files[path]) if len(c) > 3)
+            if any(m in text for m in mentions):
+                named.append(path)
+        return named or ["/App.js"] + components
+    
+    async def _modify_file(self, files: Dict[str, str], path: str, modification_request: str,
+                           task_context: str, optional: bool = False) -> Optional[str]:
+        """Apply a modification request to one file; None when an optional edit leaves it unchanged"""
+        current_code = files.get(path, "")
+        packed = await cpu_offloader.run(
+            self.context_packer.pack_code, current_code, [modification_request, task_context],
+            size=len(current_code)
+        )
+        sections = self._edit_sections(packed, self._component_of(path))
+        
+        split = ""
+        if any(p.startswith(f"{COMPONENTS_DIR}/") for p in files):
+            others = [p for p in files if p != path and (p == "/App.js" or p.startswith(f"{COMPONENTS_DIR}/"))]
+            split = f"""
+This is {path} of an app split into component files (the others are
+{", ".join(others)}, edited separately). Keep the props passed between files as they are.
+"""
+        unchanged = f"\n7. If this file needs no change for the request, return only the word {UNCHANGED_MARKER}" if optional else ""
+        
+        prompt = f"""You are modifying an existing React application.
+{split}
+{sections["heading"]}
+{packed.text}
 
 User's modification request: {modification_request}
 
@@ -284,43 +607,54 @@ Context: {task_context}
 
 IMPORTANT RULES:
 1. Generate ONLY pure JavaScript/React code - NO markdown, NO code fences
-2. Start directly with imports
+2. {sections["output"]}
 3. Keep all existing functionality and ADD the requested modifications
-4. Export a default function component named "App"
-5. Use className for styling
-6. Do NOT include any text before or after the code
-7. Do NOT wrap code in ```react or ``` blocks
+4. Use className for styling
+5. Do NOT include any text before or after the code
+6. Do NOT wrap code in ```react or ``` blocks{unchanged}
 
-Provide the complete modified code:"""
-            
-            result = await self.llm.ainvoke(prompt)
-            modified_code = result.content if hasattr(result, 'content') else str(result)
-            modified_code = self._clean_code(modified_code)
-            
-            return {
-                "files": {
-                    **current_files,
-                    "/App.js": modified_code
-                },
-                "status": "modified"
-            }
+Provide the modified code:"""
+        
+        result = await self.invoke_llm(prompt)
+        modified_code = result.content if hasattr(result, 'content') else str(result)
+        if optional and strip_code_fences(modified_code).strip() == UNCHANGED_MARKER:
+            return None
+        return await self._apply_edit(path, current_code, modified_code, packed)
+    
+    @staticmethod
+    def _target_file(files: Dict[str, str], errors: List[str]) -> str:
+        """The module most errors point at ("<path>: <error>" from the Tester), App.js by default"""
+        counts: Dict[str, int] = {}
+        for error in errors:
+            path = error.split(":", 1)[0].strip()
+            if path.endswith((".js", ".jsx")) and path in files and path != "/index.js":
+                counts[path] = counts.get(path, 0) + 1
+        return max(counts, key=counts.get) if counts else "/App.js"
     
-    async def fix_bug(self, files: Dict[str, str], errors: List[str]) -> Dict[str, Any]:
-        """Fix bugs in the code"""
-        current_code = files.get("/App.js", "")
+    async def fix_bug(self, files: Dict[str, str], errors: List[str],
+                      accept_file_refs: bool = False, temperature: Optional[float] = None,
+                      candidate: int = 0) -> Dict[str, Any]:
+        """Fix bugs in the code (one candidate fix when several are requested in parallel)"""
+        # Split projects are fixed one component file at a time
+        path = self._target_file(files, errors)
+        current_code = files.get(path, "")
         error_description = "\n".join(errors)
+        if candidate == 0:
+            self.publish_progress(f"Fixing {len(errors)} issue(s)...", stage="fix")
         
+        packed = await cpu_offloader.run(self.context_packer.pack_code, current_code, errors, size=len(current_code))
+        sections = self._edit_sections(packed, self._component_of(path))
         prompt = f"""Fix the bugs in this React code.
 
-Current Code:
-{current_code}
+{sections["heading"]}
+{packed.text}
 
 Errors Found:
 {error_description}
 
 IMPORTANT RULES:
 1. Generate ONLY pure JavaScript/React code - NO markdown, NO code fences
-2. Start directly with imports
+2. {sections["output"]}
 3. Fix all the errors mentioned
 4. Keep the same functionality but make it work correctly
 5. Do NOT include any text before or after the code
@@ -328,14 +662,16 @@ IMPORTANT RULES:
 
 Provide the corrected code:"""
         
-        result = await self.llm.ainvoke(prompt)
-        fixed_code = result.content if hasattr(result, 'content') else str(result)
-        fixed_code = self._clean_code(fixed_code)
+        result = await self.invoke_llm(prompt, self._llm_for(temperature))
+        raw_code = result.content if hasattr(result, 'content') else str(result)
+        fixed_code = await self._apply_edit(path, current_code, raw_code, packed)
         
         return {
-            "files": {
+            **self._files_response({
                 **files,
-                "/App.js": fixed_code
-            },
-            "status": "fixed"
+                path: fixed_code
+            }, accept_file_refs),
+            "status": "fixed",
+            "candidate": candidate,
+            "usage": self._usage(result, prompt, raw_code)
         }
@@ -0,0 +1,263 @@
+"""
+Project Similarity Index
+
+Local near-duplicate index over past project requests and the files generated
+for them. Requests are reduced to normalized token sets, signed with MinHash
+and bucketed with LSH, so paraphrases like "build a todo app" and "create a
+todo list app" land on the same candidates without any external service.
+"""
+
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Dict, Any, List, Optional, Tuple
+import asyncio
+import hashlib
+import json
+import os
+import random
+import re
+import tempfile
+import time
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Mersenne prime used for the universal hash family
+_PRIME = (1 << 61) - 1
+_MAX_HASH = (1 << 32) - 1
+
+# Words that carry no meaning for "which app is this" - imperative verbs and
+# filler that differ between paraphrases of the same request
+STOPWORDS = frozenset("""
+a an the and or of for to with in on my me i we us please can could would you
+build create make generate develop implement write code simple basic small
+new some that this which using use want need like just
+tạo xây dựng một cho
+""".split())
+
+# Cheap suffix folding so "todos"/"todo" and "lists"/"list" collapse together
+_SUFFIXES = ("ing", "es", "s")
+
+_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+
+def normalize_tokens(text: str) -> frozenset:
+    """Reduce request text to a set of normalized content words"""
+    tokens = set()
+    for word in _TOKEN_RE.findall(text.lower()):
+        if word in STOPWORDS:
+            continue
+        for suffix in _SUFFIXES:
+            if len(word) > len(suffix) + 2 and word.endswith(suffix):
+                word = word[:-len(suffix)]
+                break
+        tokens.add(word)
+    return frozenset(tokens)
+
+
+def jaccard(a: frozenset, b: frozenset) -> float:
+    """Exact Jaccard similarity of two token sets"""
+    if not a and not b:
+        return 1.0
+    return len(a & b) / len(a | b)
+
+
+def _token_hash(token: str) -> int:
+    return int.from_bytes(hashlib.blake2b(token.encode("utf-8"), digest_size=8).digest(), "big")
+
+
+@dataclass
+class CacheEntry:
+    """A past request and the project generated for it"""
+    key: str
+    text: str
+    tokens: frozenset
+    signature: Tuple[int, ...]
+    files: Dict[str, str]
+    created_at: float = field(default_factory=time.time)
+    hits: int = 0
+
+
+class ProjectSimilarityIndex:
+    """MinHash/LSH index of generated projects with LRU eviction"""
+
+    def __init__(self, num_perm: int = 64, bands: int = 32,
+                 max_entries: int = 256, persist_path: Optional[str] = None,
+                 seed: int = 1):
+        if num_perm % bands != 0:
+            raise ValueError("num_perm must be divisible by bands")
+
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.max_entries = max_entries
+        self.persist_path = persist_path
+
+        rng = random.Random(seed)
+        self._perms = [(rng.randrange(1, _PRIME), rng.randrange(0, _PRIME))
+                       for _ in range(num_perm)]
+
+        self.entries: "OrderedDict[str, CacheEntry]" = OrderedDict()
+        self._buckets: List[Dict[Tuple[int, ...], set]] = [{} for _ in range(bands)]
+
+        self.stats = {"lookups": 0, "hits": 0, "evictions": 0}
+
+    def signature(self, tokens: frozenset) -> Tuple[int, ...]:
+        """Compute the MinHash signature of a token set"""
+        if not tokens:
+            return tuple([_MAX_HASH] * self.num_perm)
+        hashes = [_token_hash(t) for t in tokens]
+        return tuple(
+            min(((a * h + b) % _PRIME) & _MAX_HASH for h in hashes)
+            for a, b in self._perms
+        )
+
+    def _band_keys(self, signature: Tuple[int, ...]):
+        for band in range(self.bands):
+            start = band * self.rows
+            yield band, signature[start:start + self.rows]
+
+    def add(self, text: str, files: Dict[str, str]) -> CacheEntry:
+        """Index a request and the files generated for it"""
+        tokens = normalize_tokens(text)
+        key = hashlib.sha256(" ".join(sorted(tokens)).encode("utf-8")).hexdigest()[:16]
+
+        self._remove(key)
+
+        entry = CacheEntry(
+            key=key,
+            text=text,
+            tokens=tokens,
+            signature=self.signature(tokens),
+            files=dict(files)
+        )
+        self._insert(entry)
+
+        while len(self.entries) > self.max_entries:
+            oldest = next(iter(self.entries))
+            self._remove(oldest)
+            self.stats["evictions"] += 1
+
+        return entry
+
+    def _insert(self, entry: CacheEntry):
+        self.entries[entry.key] = entry
+        for band, band_key in self._band_keys(entry.signature):
+            self._buckets[band].setdefault(band_key, set()).add(entry.key)
+
+    def _remove(self, key: str):
+        entry = self.entries.pop(key, None)
+        if entry is None:
+            return
+        for band, band_key in self._band_keys(entry.signature):
+            bucket = self._buckets[band].get(band_key)
+            if bucket is not None:
+                bucket.discard(key)
+                if not bucket:
+                    del self._buckets[band][band_key]
+
+    def lookup(self, text: str, min_similarity: float = 0.0) -> Tuple[Optional[CacheEntry], float]:
+        """
+        Find the most similar indexed request
+
+        Args:
+            text: Request text to look up
+            min_similarity: Candidates below this Jaccard similarity are ignored
+
+        Returns:
+            (entry, similarity) of the best candidate, or (None, 0.0)
+        """
+        self.stats["lookups"] += 1
+        tokens = normalize_tokens(text)
+        if not tokens:
+            return None, 0.0
+
+        candidates = set()
+        for band, band_key in self._band_keys(self.signature(tokens)):
+            candidates |= self._buckets[band].get(band_key, set())
+
+        best, best_score = None, 0.0
+        for key in candidates:
+            entry = self.entries[key]
+            score = jaccard(tokens, entry.tokens)
+            if score > best_score:
+                best, best_score = entry, score
+
+        if best is None or best_score < min_similarity:
+            return None, 0.0
+
+        best.hits += 1
+        self.stats["hits"] += 1
+        self.entries.move_to_end(best.key)
+
+        return best, best_score
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Serializable copy of the index contents"""
+        return {
+            "num_perm": self.num_perm,
+            "bands": self.bands,
+            "entries": [
+                {
+                    "text": e.text,
+                    "files": e.files,
+                    "created_at": e.created_at,
+                    "hits": e.hits
+                }
+                for e in self.entries.values()
+            ]
+        }
+
+    def save(self, path: Optional[str] = None):
+        """Persist the index atomically as JSON"""
+        path = path or self.persist_path
+        if path:
+            self._write(self.snapshot(), path)
+
+    async def asave(self, path: Optional[str] = None):
+        """Persist the index without blocking the event loop"""
+        path = path or self.persist_path
+        if path:
+            await asyncio.to_thread(self._write, self.snapshot(), path)
+
+    @staticmethod
+    def _write(data: Dict[str, Any], path: str):
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(data, f)
+            os.replace(tmp_path, path)
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+    def load(self, path: Optional[str] = None) -> int:
+        """Load a persisted index, returning the number of entries restored"""
+        path = path or self.persist_path
+        if not path or not os.path.exists(path):
+            return 0
+
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError) as e:
+            logger.warning(f"Could not load project index from {path}: {e}")
+            return 0
+
+        for item in data.get("entries", []):
+            entry = self.add(item["text"], item["files"])
+            entry.created_at = item.get("created_at", entry.created_at)
+            entry.hits = item.get("hits", 0)
+
+        logger.info(f"Loaded {len(self.entries)} cached projects from {path}")
+        return len(self.entries)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Index statistics"""
+        return {**self.stats, "entries": len(self.entries)}
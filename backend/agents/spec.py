@@ -0,0 +1,178 @@
+"""
+Structured Task Spec
+
+Schema for the Analyst's development spec (components, state, styling hints)
+and an incremental parser for streamed Analyst output. The spec is emitted
+first, between <spec> tags, so it can be handed to the Developer before the
+user-facing explanation has finished generating.
+"""
+
+from dataclasses import dataclass, field, asdict
+from typing import Dict, Any, List, Optional
+import json
+import re
+
+SPEC_OPEN = "<spec>"
+SPEC_CLOSE = "</spec>"
+
+SPEC_SCHEMA: Dict[str, Any] = {
+    "type": "object",
+    "required": ["task", "components"],
+    "properties": {
+        "summary": {"type": "string", "description": "One sentence on what the user wants"},
+        "task": {"type": "string", "description": "Clear, detailed task description for the Developer"},
+        "components": {
+            "type": "array",
+            "items": {
+                "type": "object",
+                "required": ["name"],
+                "properties": {
+                    "name": {"type": "string"},
+                    "purpose": {"type": "string"}
+                }
+            }
+        },
+        "state": {
+            "type": "array",
+            "items": {
+                "type": "object",
+                "required": ["name"],
+                "properties": {
+                    "name": {"type": "string"},
+                    "type": {"type": "string"},
+                    "purpose": {"type": "string"}
+                }
+            }
+        },
+        "styling": {"type": "array", "items": {"type": "string"}}
+    }
+}
+
+
+class SpecError(ValueError):
+    """Spec does not match the schema"""
+
+
+@dataclass
+class TaskSpec:
+    """Development spec produced by the Analyst"""
+    task: str
+    summary: str = ""
+    components: List[Dict[str, str]] = field(default_factory=list)
+    state: List[Dict[str, str]] = field(default_factory=list)
+    styling: List[str] = field(default_factory=list)
+
+    @classmethod
+    def from_dict(cls, data: Any) -> "TaskSpec":
+        """Validate against SPEC_SCHEMA and build a spec"""
+        if not isinstance(data, dict):
+            raise SpecError("Spec must be an object")
+        task = data.get("task")
+        if not isinstance(task, str) or not task.strip():
+            raise SpecError("Spec requires a non-empty 'task'")
+
+        def named_items(key: str, fields: tuple) -> List[Dict[str, str]]:
+            items = data.get(key) or []
+            if not isinstance(items, list):
+                raise SpecError(f"'{key}' must be a list")
+            result = []
+            for item in items:
+                if isinstance(item, str):
+                    item = {"name": item}
+                if not isinstance(item, dict) or not isinstance(item.get("name"), str):
+                    raise SpecError(f"Every '{key}' entry requires a 'name'")
+                result.append({f: str(item[f]) for f in fields if item.get(f) is not None})
+            return result
+
+        styling = data.get("styling") or []
+        if isinstance(styling, str):
+            styling = [styling]
+        if not isinstance(styling, list):
+            raise SpecError("'styling' must be a list")
+
+        return cls(
+            task=task.strip(),
+            summary=str(data.get("summary") or ""),
+            components=named_items("components", ("name", "purpose")),
+            state=named_items("state", ("name", "type", "purpose")),
+            styling=[str(hint) for hint in styling]
+        )
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+    def to_task(self) -> str:
+        """Render the spec as the Developer's task description"""
+        lines = [self.task]
+        if self.components:
+            lines.append("\nComponents:")
+            lines.extend(
+                f"- {c['name']}: {c['purpose']}" if c.get("purpose") else f"- {c['name']}"
+                for c in self.components
+            )
+        if self.state:
+            lines.append("\nState:")
+            for s in self.state:
+                detail = ", ".join(v for v in (s.get("type"), s.get("purpose")) if v)
+                lines.append(f"- {s['name']} ({detail})" if detail else f"- {s['name']}")
+        if self.styling:
+            lines.append("\nStyling:")
+            lines.extend(f"- {hint}" for hint in self.styling)
+        return "\n".join(lines)
+
+
+def parse_spec(text: str) -> TaskSpec:
+    """Parse a spec from JSON text, tolerating markdown code fences"""
+    text = re.sub(r"^\s*```(?:json)?\s*|\s*```\s*$", "", text.strip())
+    try:
+        data = json.loads(text)
+    except ValueError as e:
+        raise SpecError(f"Spec is not valid JSON: {e}")
+    return TaskSpec.from_dict(data)
+
+
+class SpecStreamParser:
+    """Split streamed Analyst output into the spec block and the explanation"""
+
+    def __init__(self):
+        self.buffer = ""
+        self.spec_text: Optional[str] = None
+        self.explanation = ""
+
+    @property
+    def spec_complete(self) -> bool:
+        return self.spec_text is not None
+
+    def feed(self, chunk: str) -> List[Dict[str, Any]]:
+        """
+        Consume a chunk of model output
+
+        Returns:
+            Events: {"kind": "spec", "text": ...} once the spec block closes,
+            then {"kind": "explanation", "text": ...} for explanation deltas
+        """
+        events = []
+        if self.spec_text is None:
+            self.buffer += chunk
+            end = self.buffer.find(SPEC_CLOSE)
+            if end == -1:
+                return events
+            start = self.buffer.find(SPEC_OPEN)
+            start = 0 if start == -1 or start > end else start + len(SPEC_OPEN)
+            self.spec_text = self.buffer[start:end]
+            events.append({"kind": "spec", "text": self.spec_text})
+            chunk = self.buffer[end + len(SPEC_CLOSE):].lstrip("\n")
+            self.buffer = ""
+            if not chunk:
+                return events
+
+        self.explanation += chunk
+        events.append({"kind": "explanation", "text": chunk})
+        return events
+
+    def close(self) -> str:
+        """Output received without a spec block (returned for the fallback path)"""
+        if self.spec_text is None:
+            remaining, self.buffer = self.buffer, ""
+            return remaining
+        return ""
@@ -0,0 +1,326 @@
+"""
+Scaffold Template Registry
+
+Static project files (entry points, HTML shell, package.json) are built once at
+import time, serialized once, and content-hashed. Agents can then ship them by
+reference (`file_refs`) instead of re-sending the same text on every response;
+any process importing this module can expand the references back into files.
+"""
+
+from dataclasses import dataclass, field
+from typing import Dict, Any, Optional, Tuple, Union
+import hashlib
+import json
+
+
+def content_hash(content: str) -> str:
+    """Stable content address for a static file"""
+    return "sha256:" + hashlib.sha256(content.encode("utf-8")).hexdigest()[:32]
+
+
+@dataclass(frozen=True)
+class StaticFile:
+    """Pre-serialized file with its content hash"""
+    path: str
+    content: str
+    hash: str
+
+
+@dataclass
+class ScaffoldTemplate:
+    """Set of static files a generated App.js/styles.css is dropped into"""
+    name: str
+    description: str
+    files: Dict[str, StaticFile]
+    prompt_hint: str = ""
+    metadata: Dict[str, Any] = field(default_factory=dict)
+
+    def contents(self) -> Dict[str, str]:
+        """Static files as a path -> content map"""
+        return {path: f.content for path, f in self.files.items()}
+
+    def refs(self) -> Dict[str, str]:
+        """Static files as a path -> content hash map"""
+        return {path: f.hash for path, f in self.files.items()}
+
+
+class TemplateRegistry:
+    """Registry of scaffold templates and the content-addressed static files they use"""
+
+    def __init__(self, default: str = "react"):
+        self.default = default
+        self.templates: Dict[str, ScaffoldTemplate] = {}
+        # Content-addressed store shared by all templates
+        self.blobs: Dict[str, str] = {}
+        self._hash_by_content: Dict[str, str] = {}
+
+    def add_blob(self, content: str) -> str:
+        """Store static content and return its hash"""
+        file_hash = self._hash_by_content.get(content)
+        if file_hash is None:
+            file_hash = content_hash(content)
+            self.blobs[file_hash] = content
+            self._hash_by_content[content] = file_hash
+        return file_hash
+
+    def register(self, name: str, description: str,
+                 files: Dict[str, Union[str, Dict[str, Any]]], prompt_hint: str = "") -> ScaffoldTemplate:
+        """
+        Register a scaffold
+
+        Args:
+            name: Scaffold name used in `generate_code` parameters
+            description: Human readable description
+            files: path -> content; dict contents are serialized as JSON once here
+            prompt_hint: Extra instructions for the App.js prompt
+        """
+        static_files = {}
+        for path, content in files.items():
+            if not isinstance(content, str):
+                content = json.dumps(content, indent=2)
+            static_files[path] = StaticFile(path=path, content=content, hash=self.add_blob(content))
+
+        template = ScaffoldTemplate(
+            name=name,
+            description=description,
+            files=static_files,
+            prompt_hint=prompt_hint
+        )
+        self.templates[name] = template
+        return template
+
+    def get(self, name: Optional[str] = None) -> ScaffoldTemplate:
+        """Get a scaffold by name, falling back to the default"""
+        return self.templates.get(name or self.default) or self.templates[self.default]
+
+    def list_templates(self) -> Dict[str, str]:
+        """List scaffold names with descriptions"""
+        return {name: t.description for name, t in self.templates.items()}
+
+    def resolve(self, file_hash: str) -> Optional[str]:
+        """Get static content by hash"""
+        return self.blobs.get(file_hash)
+
+    def split_static(self, files: Dict[str, str]) -> Tuple[Dict[str, str], Dict[str, str]]:
+        """
+        Split files into (dynamic files, static file refs)
+
+        Files whose content is a known static blob are replaced by their hash.
+        """
+        dynamic, refs = {}, {}
+        for path, content in files.items():
+            file_hash = self._hash_by_content.get(content)
+            if file_hash is not None:
+                refs[path] = file_hash
+            else:
+                dynamic[path] = content
+        return dynamic, refs
+
+    def expand(self, files: Dict[str, str], file_refs: Optional[Dict[str, str]] = None) -> Dict[str, str]:
+        """Merge files with their static refs resolved back into content"""
+        if not file_refs:
+            return files
+
+        expanded = dict(files)
+        for path, file_hash in file_refs.items():
+            content = self.blobs.get(file_hash)
+            if content is None:
+                raise ValueError(f"Unknown static file reference {file_hash} for {path}")
+            expanded[path] = content
+        return expanded
+
+
+INDEX_JS = """import React from 'react';
+import { createRoot } from 'react-dom/client';
+import App from './App';
+import './styles.css';
+
+const root = createRoot(document.getElementById('root'));
+root.render(<App />);
+"""
+
+ROUTER_INDEX_JS = """import React from 'react';
+import { createRoot } from 'react-dom/client';
+import { BrowserRouter } from 'react-router-dom';
+import App from './App';
+import './styles.css';
+
+const root = createRoot(document.getElementById('root'));
+root.render(
+  <BrowserRouter>
+    <App />
+  </BrowserRouter>
+);
+"""
+
+INDEX_HTML = """<!DOCTYPE html>
+<html lang="en">
+<head>
+    <meta charset="UTF-8">
+    <meta name="viewport" content="width=device-width, initial-scale=1.0">
+    <title>Generated App</title>
+</head>
+<body>
+    <div id="root"></div>
+</body>
+</html>"""
+
+VITE_INDEX_HTML = """<!DOCTYPE html>
+<html lang="en">
+<head>
+    <meta charset="UTF-8">
+    <meta name="viewport" content="width=device-width, initial-scale=1.0">
+    <title>Generated App</title>
+</head>
+<body>
+    <div id="root"></div>
+    <script type="module" src="/index.js"></script>
+</body>
+</html>"""
+
+REACT_DEPENDENCIES = {
+    "react": "^18.3.0",
+    "react-dom": "^18.3.0"
+}
+
+# Used when the LLM returns empty or unusable CSS
+DEFAULT_STYLES = """/* Default styles */
+:root {
+  --primary-color: #6366f1;
+  --secondary-color: #8b5cf6;
+  --bg-color: #ffffff;
+  --text-color: #1f2937;
+}
+
+* {
+  margin: 0;
+  padding: 0;
+  box-sizing: border-box;
+}
+
+body {
+  font-family: -apple-system, BlinkMacSystemFont, 'Segoe UI', 'Roboto', sans-serif;
+  background: var(--bg-color);
+  color: var(--text-color);
+}
+
+.app-container {
+  max-width: 1200px;
+  margin: 0 auto;
+  padding: 2rem;
+}
+
+button {
+  background: var(--primary-color);
+  color: white;
+  border: none;
+  padding: 0.75rem 1.5rem;
+  border-radius: 0.5rem;
+  cursor: pointer;
+  font-size: 1rem;
+  transition: all 0.2s;
+}
+
+button:hover {
+  background: var(--secondary-color);
+  transform: translateY(-2px);
+}
+"""
+
+# Used when the LLM returns empty or unusable code; `{task}` is filled in
+FALLBACK_APP_TEMPLATE = """import React from 'react';
+
+export default function App() {
+  return (
+    <div className="app-container">
+      <h1>Task: {task}</h1>
+      <p>Code generation in progress...</p>
+    </div>
+  );
+}"""
+
+
+def fallback_app(task: str) -> str:
+    """Placeholder App.js for a task"""
+    return FALLBACK_APP_TEMPLATE.replace("{task}", task)
+
+
+def _build_registry() -> TemplateRegistry:
+    registry = TemplateRegistry(default="react")
+
+    registry.register(
+        "react",
+        "React 18 single page app",
+        {
+            "/index.js": INDEX_JS,
+            "/package.json": {
+                "name": "generated-app",
+                "version": "1.0.0",
+                "dependencies": REACT_DEPENDENCIES,
+                "devDependencies": {},
+                "scripts": {
+                    "start": "react-scripts start",
+                    "build": "react-scripts build"
+                }
+            },
+            "/index.html": INDEX_HTML
+        }
+    )
+
+    registry.register(
+        "react-router",
+        "React 18 app with client-side routing",
+        {
+            "/index.js": ROUTER_INDEX_JS,
+            "/package.json": {
+                "name": "generated-app",
+                "version": "1.0.0",
+                "dependencies": {
+                    **REACT_DEPENDENCIES,
+                    "react-router-dom": "^6.26.0"
+                },
+                "devDependencies": {},
+                "scripts": {
+                    "start": "react-scripts start",
+                    "build": "react-scripts build"
+                }
+            },
+            "/index.html": INDEX_HTML
+        },
+        prompt_hint="react-router-dom v6 is installed and index.js already wraps App in "
+                    "<BrowserRouter>. Use <Routes>/<Route> and <Link> from 'react-router-dom' "
+                    "for pages; do NOT add another router."
+    )
+
+    registry.register(
+        "vite",
+        "React 18 app with a Vite toolchain",
+        {
+            "/index.js": INDEX_JS,
+            "/package.json": {
+                "name": "generated-app",
+                "version": "1.0.0",
+                "type": "module",
+                "dependencies": REACT_DEPENDENCIES,
+                "devDependencies": {
+                    "@vitejs/plugin-react": "^4.3.0",
+                    "vite": "^5.4.0"
+                },
+                "scripts": {
+                    "dev": "vite",
+                    "build": "vite build",
+                    "preview": "vite preview"
+                }
+            },
+            "/index.html": VITE_INDEX_HTML
+        }
+    )
+
+    # Fallback stylesheet is static too, so it can be sent by reference
+    registry.add_blob(DEFAULT_STYLES)
+
+    return registry
+
+
+# Global instance, built once at startup
+template_registry = _build_registry()
@@ -0,0 +1,403 @@
+"""
+Tester Check Suite
+
+Independent checks per file and category (syntax, structure, render, css,
+bundle). Static checks are plain module-level functions so they can run
+concurrently and, for large inputs, off the event loop. The bundle check is
+a coroutine that builds the project with esbuild.
+"""
+
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Tuple
+import json
+import re
+from bundler import project_bundler
+
+# Categories, in the order they are reported
+CATEGORIES = ("syntax", "structure", "render", "css", "bundle")
+
+# Bump when check logic changes so cached results are invalidated
+CHECKS_VERSION = 2
+
+CheckFn = Callable[[Dict[str, str], str], List[str]]
+
+
+@dataclass(frozen=True)
+class Check:
+    """One independent check against one file"""
+    category: str
+    file: str
+    fn: CheckFn
+    inputs: Tuple[str, ...]
+    severity: str = "error"
+    version: int = 1
+
+    @property
+    def name(self) -> str:
+        return f"{self.category}:{self.fn.__name__}:{self.file}"
+
+
+# --- JavaScript helpers -----------------------------------------------------
+
+_OPENERS = {"(": ")", "[": "]", "{": "}"}
+_CLOSERS = {v: k for k, v in _OPENERS.items()}
+# Keywords after which an expression starts (so a quote opens a string, a / a
+# regex and a < a JSX element)
+_EXPRESSION_KEYWORDS = {"from", "return", "case", "import", "typeof", "in", "of", "else",
+                        "export", "default", "await", "yield", "throw", "new"}
+_EXPRESSION_CHARS = set("=(,:[{?!&|+;-*%")
+_JSX_NAME_RE = re.compile(r"[\w.:-]*")
+
+
+def _starts_expression(code: str, index: int) -> bool:
+    """Whether the character at index is where an expression starts (not an operand's operator)"""
+    j = index - 1
+    while j >= 0 and code[j] in " \t":
+        j -= 1
+    if j < 0 or code[j] == "\n":
+        return True
+    if code[j] in _EXPRESSION_CHARS or (code[j] == ">" and j > 0 and code[j - 1] == "="):
+        return True
+    end = j + 1
+    while j >= 0 and (code[j].isalnum() or code[j] == "_"):
+        j -= 1
+    return code[j + 1:end] in _EXPRESSION_KEYWORDS
+
+
+def _regex_end(code: str, index: int) -> int:
+    """End of a regex literal starting at index, or -1 when the / is not one"""
+    j, n, in_class = index + 1, len(code), False
+    while j < n and code[j] != "\n":
+        ch = code[j]
+        if ch == "\\":
+            j += 2
+            continue
+        if ch == "[":
+            in_class = True
+        elif ch == "]":
+            in_class = False
+        elif ch == "/" and not in_class:
+            j += 1
+            while j < n and code[j].isalpha():
+                j += 1
+            return j
+        j += 1
+    return -1
+
+
+def _line_of(code: str, index: int) -> int:
+    return code.count("\n", 0, index) + 1
+
+
+def scan_delimiters(code: str) -> List[str]:
+    """Report unbalanced brackets, JSX tags and unterminated strings/comments in JS/JSX"""
+    errors = []
+    # Brackets, plus "<" while inside a JSX tag and "<name>" while inside its children
+    stack: List[Tuple[str, int]] = []
+    # Template literals can nest expressions: track the stack depth of each ${
+    template_depths: List[int] = []
+    i, n = 0, len(code)
+
+    while i < n:
+        ch = code[i]
+        nxt = code[i + 1] if i + 1 < n else ""
+        top = stack[-1][0] if stack else ""
+
+        if top == "<":
+            # Inside a JSX tag: attribute names, strings and {expressions} up to > or />
+            if ch in "'\"":
+                end = code.find(ch, i + 1)
+                if end == -1:
+                    errors.append(f"Unterminated string starting on line {_line_of(code, i)}")
+                    break
+                i = end + 1
+                continue
+            if ch == "/" and nxt == ">":
+                stack.pop()
+                i += 2
+                continue
+            if ch == ">":
+                _, start = stack.pop()
+                name = _JSX_NAME_RE.match(code, start + 1).group()
+                stack.append((f"<{name}>", start))
+                i += 1
+                continue
+            if ch == "{":
+                stack.append((ch, i))
+            elif ch in _CLOSERS or ch in "([":
+                errors.append(f"Unexpected '{ch}' on line {_line_of(code, i)}")
+                return errors
+            i += 1
+            continue
+
+        if top.startswith("<"):
+            # JSX children: text is skipped up to the next tag or {expression}
+            if ch == "{":
+                stack.append((ch, i))
+            elif ch == "<" and nxt == "/":
+                end = code.find(">", i)
+                name = _JSX_NAME_RE.match(code, i + 2).group()
+                if end == -1 or f"<{name}>" != top:
+                    errors.append(f"Unexpected '</{name}>' on line {_line_of(code, i)}")
+                    return errors
+                stack.pop()
+                i = end + 1
+                continue
+            elif ch == "<":
+                stack.append(("<", i))
+            i += 1
+            continue
+
+        if ch == "/" and nxt == "/":
+            end = code.find("\n", i)
+            i = n if end == -1 else end
+            continue
+        if ch == "/" and nxt == "*":
+            end = code.find("*/", i + 2)
+            if end == -1:
+                errors.append(f"Unterminated block comment starting on line {_line_of(code, i)}")
+                break
+            i = end + 2
+            continue
+        if ch == "/" and _starts_expression(code, i):
+            end = _regex_end(code, i)
+            if end != -1:
+                i = end
+                continue
+
+        if ch == "<" and (nxt.isalpha() or nxt == ">") and _starts_expression(code, i):
+            stack.append(("<", i))
+            i += 1
+            continue
+
+        if ch in "'\"" and _starts_expression(code, i):
+            j = i + 1
+            while j < n and code[j] != ch and code[j] != "\n":
+                j += 2 if code[j] == "\\" else 1
+            if j >= n or code[j] != ch:
+                errors.append(f"Unterminated string starting on line {_line_of(code, i)}")
+                i = j + 1
+                continue
+            i = j + 1
+            continue
+
+        if ch == "`" or (ch == "}" and template_depths and len(stack) == template_depths[-1]):
+            # Inside a template literal: skip to its end or to the next ${
+            if ch == "}":
+                template_depths.pop()
+            start = i
+            j = i + 1
+            while j < n:
+                if code[j] == "\\":
+                    j += 2
+                    continue
+                if code[j] == "`":
+                    break
+                if code[j] == "$" and j + 1 < n and code[j + 1] == "{":
+                    break
+                j += 1
+            if j >= n:
+                errors.append(f"Unterminated template literal starting on line {_line_of(code, start)}")
+                break
+            if code[j] == "$":
+                template_depths.append(len(stack))
+                i = j + 2
+            else:
+                i = j + 1
+            continue
+
+        if ch in _OPENERS:
+            stack.append((ch, i))
+        elif ch in _CLOSERS:
+            if not stack or stack[-1][0] != _CLOSERS[ch]:
+                errors.append(f"Unexpected '{ch}' on line {_line_of(code, i)}")
+                return errors
+            stack.pop()
+        i += 1
+
+    for opener, index in stack[-3:]:
+        errors.append(f"Unclosed '{opener}' opened on line {_line_of(code, index)}")
+    return errors
+
+
+_CLASSNAME_RE = re.compile(r"""className\s*=\s*(?:"([^"]*)"|'([^']*)'|\{\s*[`'"]([^`'"$]*)[`'"]\s*\})""")
+_CSS_CLASS_RE = re.compile(r"\.(-?[_a-zA-Z][\w-]*)")
+
+
+def used_class_names(code: str) -> set:
+    """Static class names used in className attributes"""
+    names = set()
+    for match in _CLASSNAME_RE.finditer(code):
+        value = next(g for g in match.groups() if g is not None)
+        names.update(value.split())
+    return names
+
+
+def _strip_css_comments(css: str) -> str:
+    return re.sub(r"/\*.*?\*/", "", css, flags=re.S)
+
+
+# --- Checks -----------------------------------------------------------------
+
+def js_syntax(files: Dict[str, str], path: str) -> List[str]:
+    """Brackets, strings and comments are balanced"""
+    code = files.get(path, "")
+    if code.lstrip().startswith("```"):
+        return ["Code contains markdown fences"]
+    return scan_delimiters(code)
+
+
+def app_structure(files: Dict[str, str], path: str) -> List[str]:
+    """App (or component) module has imports, a component function and a default export"""
+    code = files.get(path, "")
+    errors = []
+    if "import" not in code:
+        errors.append("Missing import statements")
+    if "export default" not in code:
+        errors.append("Missing default export")
+    if "function" not in code and "const" not in code:
+        errors.append("Missing component function")
+    return errors
+
+
+def app_render(files: Dict[str, str], path: str) -> List[str]:
+    """App (or component) returns JSX"""
+    code = files.get(path, "")
+    errors = []
+    if not re.search(r"(return|=>)\s*\(?\s*<", code):
+        errors.append("Component does not return JSX")
+    if re.search(r"<[a-zA-Z][^>]*\sclass=", code):
+        errors.append("Uses 'class' attribute instead of 'className'")
+    return errors
+
+
+def entry_structure(files: Dict[str, str], path: str) -> List[str]:
+    """Entry point imports App and the stylesheet"""
+    code = files.get(path, "")
+    errors = []
+    if not re.search(r"import\s+App\s+from\s+['\"]\./App(\.js)?['\"]", code):
+        errors.append("Does not import App from './App'")
+    if "/styles.css" in files and "styles.css" not in code:
+        errors.append("Does not import './styles.css'")
+    return errors
+
+
+def entry_render(files: Dict[str, str], path: str) -> List[str]:
+    """Entry point mounts <App /> into #root"""
+    code = files.get(path, "")
+    errors = []
+    if "createRoot(" not in code and "render(" not in code:
+        errors.append("Does not render the app (createRoot/render)")
+    if not re.search(r"getElementById\(\s*['\"]root['\"]\s*\)", code):
+        errors.append("Does not mount into #root")
+    if "<App" not in code:
+        errors.append("Does not render <App />")
+    return errors
+
+
+def package_syntax(files: Dict[str, str], path: str) -> List[str]:
+    """package.json is valid JSON"""
+    try:
+        json.loads(files.get(path, ""))
+    except ValueError as e:
+        return [f"Invalid JSON: {e}"]
+    return []
+
+
+def package_structure(files: Dict[str, str], path: str) -> List[str]:
+    """package.json declares React dependencies"""
+    try:
+        data = json.loads(files.get(path, ""))
+    except ValueError:
+        return []
+    if not isinstance(data, dict):
+        return ["package.json must be an object"]
+    dependencies = data.get("dependencies") or {}
+    return [f"Missing dependency '{dep}'" for dep in ("react", "react-dom") if dep not in dependencies]
+
+
+def html_structure(files: Dict[str, str], path: str) -> List[str]:
+    """HTML shell has a #root mount point"""
+    if not re.search(r"id\s*=\s*['\"]root['\"]", files.get(path, "")):
+        return ["Missing <div id=\"root\"> mount point"]
+    return []
+
+
+def css_syntax(files: Dict[str, str], path: str) -> List[str]:
+    """Stylesheet braces are balanced"""
+    css = _strip_css_comments(files.get(path, ""))
+    if css.lstrip().startswith("```"):
+        return ["Stylesheet contains markdown fences"]
+    depth = 0
+    for line_number, line in enumerate(css.split("\n"), 1):
+        for ch in line:
+            if ch == "{":
+                depth += 1
+            elif ch == "}":
+                depth -= 1
+                if depth < 0:
+                    return [f"Unexpected '}}' on line {line_number}"]
+    if depth:
+        return [f"{depth} unclosed '{{' block(s)"]
+    return []
+
+
+def css_coverage(files: Dict[str, str], path: str) -> List[str]:
+    """Class names used in components are styled"""
+    css = _strip_css_comments(files.get(path, ""))
+    if not css.strip():
+        return ["Stylesheet is empty"]
+    defined = set(_CSS_CLASS_RE.findall(css))
+    used = set()
+    for file_path, content in files.items():
+        if file_path.endswith((".js", ".jsx")):
+            used |= used_class_names(content)
+    missing = sorted(used - defined)
+    if missing:
+        shown = ", ".join(missing[:10]) + (" ..." if len(missing) > 10 else "")
+        return [f"Class names used but not styled: {shown}"]
+    return []
+
+
+async def bundle_build(files: Dict[str, str], path: str) -> List[str]:
+    """Project transpiles and bundles from its entry point"""
+    result = await project_bundler.build(files)
+    return result.errors if result.status == "failed" else []
+
+
+def build_checks(files: Dict[str, str]) -> List[Check]:
+    """Select the checks that apply to the given project files"""
+    checks = []
+    js_files = tuple(p for p in files if p.endswith((".js", ".jsx")))
+
+    for path in files:
+        if path.endswith((".js", ".jsx")):
+            checks.append(Check("syntax", path, js_syntax, (path,)))
+        if path.endswith(".css"):
+            checks.append(Check("syntax", path, css_syntax, (path,)))
+            checks.append(Check("css", path, css_coverage, (path,) + js_files, severity="warning"))
+
+    # App.js and the component files it is split into
+    for path in ("/App.js",) + tuple(p for p in js_files if p.startswith("/components/")):
+        if path in files:
+            checks.append(Check("structure", path, app_structure, (path,)))
+            checks.append(Check("render", path, app_render, (path,)))
+
+    if "/index.js" in files:
+        entry_inputs = ("/index.js", "/styles.css") if "/styles.css" in files else ("/index.js",)
+        checks.append(Check("structure", "/index.js", entry_structure, entry_inputs))
+        checks.append(Check("render", "/index.js", entry_render, ("/index.js",)))
+
+    if "/package.json" in files:
+        checks.append(Check("syntax", "/package.json", package_syntax, ("/package.json",)))
+        checks.append(Check("structure", "/package.json", package_structure, ("/package.json",)))
+
+    if "/index.html" in files:
+        checks.append(Check("structure", "/index.html", html_structure, ("/index.html",)))
+
+    if project_bundler.available and "/App.js" in files:
+        entry = "/index.js" if "/index.js" in files else "/App.js"
+        inputs = tuple(p for p, content in files.items() if isinstance(content, str))
+        checks.append(Check("bundle", entry, bundle_build, inputs))
+
+    return checks
@@ -20,9 +20,11 @@ from a2a.server.apps import A2AStarletteApplication
 from a2a.server.request_handlers import DefaultRequestHandler
 from a2a.server.tasks import InMemoryTaskStore
 from a2a.types import AgentCard, AgentCapabilities, AgentSkill
+from protocol.bus import message_bus, HttpForwardBroker
+from runtime.log_pipeline import setup_logging
 import logging
 
-logging.basicConfig(level=logging.INFO)
+setup_logging("tester")
 logger = logging.getLogger(__name__)
 
 if __name__ == "__main__":
@@ -46,6 +48,14 @@ if __name__ == "__main__":
         skills=[skill],
     )
 
+    # Progress notifications go to the orchestrator's message bus, authenticated with AGENT_TOKEN
+    orchestrator_url = os.getenv("ORCHESTRATOR_URL", "http://localhost:8000")
+    agent_token = os.getenv("AGENT_TOKEN", "")
+    if agent_token:
+        message_bus.set_backend(HttpForwardBroker(f"{orchestrator_url}/notifications", token=agent_token))
+    else:
+        logger.warning("AGENT_TOKEN is not set; progress notifications are not forwarded to the orchestrator")
+
     # Initialize Executor and Handler
     executor = TesterAgentExecutor()
     request_handler = DefaultRequestHandler(
@@ -61,4 +71,4 @@ if __name__ == "__main__":
     
     import uvicorn
     logger.info("Starting Tester Agent Service on port 8003")
-    uvicorn.run(server.build(), host="0.0.0.0", port=8003)
+    uvicorn.run(server.build(), host="0.0.0.0", port=8003, log_config=None)
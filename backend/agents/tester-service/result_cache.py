@@ -0,0 +1,60 @@
+"""
+Check Result Cache
+
+LRU cache of Tester check results keyed by check identity, check version and
+the content hashes of the files the check reads, so unchanged inputs are not
+re-checked.
+"""
+
+from collections import OrderedDict
+from typing import Dict, Any, Optional
+import hashlib
+
+from checks import Check, CHECKS_VERSION
+
+
+def hash_files(files: Dict[str, str]) -> Dict[str, str]:
+    """Content hash per file"""
+    return {
+        path: hashlib.sha256(content.encode("utf-8")).hexdigest()
+        for path, content in files.items()
+        if isinstance(content, str)
+    }
+
+
+class CheckResultCache:
+    """LRU cache of check results"""
+
+    def __init__(self, max_entries: int = 2048):
+        self.max_entries = max_entries
+        self.entries: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self.stats = {"hits": 0, "misses": 0, "evictions": 0}
+
+    @staticmethod
+    def key(check: Check, file_hashes: Dict[str, str]) -> str:
+        """Cache key: check identity and versions plus its input hashes"""
+        parts = [check.name, str(check.version), str(CHECKS_VERSION)]
+        parts.extend(f"{path}={file_hashes.get(path, '-')}" for path in check.inputs)
+        return hashlib.sha256("|".join(parts).encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Cached result, refreshed as most recently used"""
+        result = self.entries.get(key)
+        if result is None:
+            self.stats["misses"] += 1
+            return None
+        self.entries.move_to_end(key)
+        self.stats["hits"] += 1
+        return result
+
+    def put(self, key: str, result: Dict[str, Any]):
+        """Store a completed check result"""
+        self.entries[key] = result
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+            self.stats["evictions"] += 1
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Cache statistics"""
+        return {**self.stats, "entries": len(self.entries)}
@@ -1,40 +1,24 @@
-from typing import Dict, Any, List
-from langchain_google_genai import ChatGoogleGenerativeAI
-from langchain.agents import AgentExecutor, create_tool_calling_agent
-from langchain.tools import tool
-from langchain_core.prompts import ChatPromptTemplate
+from typing import Dict, Any, List, Optional
 from dotenv import load_dotenv
+import asyncio
 import os
-import json
+import time
 from agents.base_agent import BaseAgent
+from checks import Check, CATEGORIES, build_checks
+from result_cache import CheckResultCache, hash_files
+from runtime import cpu_offloader
+from bundler import project_bundler
+from protocol.deadline import remaining
 
 load_dotenv()
 
 
-@tool
-def verify_code(code: str) -> str:
-    """Verify React code structure"""
-    if "export default" in code and "function" in code:
-        return json.dumps({"status": "valid", "errors": []})
-    return json.dumps({"status": "invalid", "errors": ["Missing export or function"]})
-
-
-@tool
-def run_playwright_test(code: str) -> str:
-    """Run Playwright browser tests (simulated)"""
-    # Simulated test results
-    return json.dumps({
-        "status": "passed",
-        "tests_run": 5,
-        "tests_passed": 5,
-        "tests_failed": 0,
-        "errors": []
-    })
-
-
 class TesterAgentExecutor(BaseAgent):
     """Tester Agent Executor with A2A protocol support"""
     
+    # test_code runs static checks only; the LLM is built on demand
+    preload_llm = False
+    
     def __init__(self):
         super().__init__(name="Tester")
         
@@ -42,31 +26,29 @@ class TesterAgentExecutor(BaseAgent):
         api_key = os.getenv("GOOGLE_API_KEY")
         if api_key:
             os.environ["GOOGLE_API_KEY"] = api_key
-            
-        self.llm = ChatGoogleGenerativeAI(
-            model="gemini-2.5-flash",
-            temperature=0.3
-        )
         
-        self.tools = [verify_code, run_playwright_test]
+        # Per-suite defaults, overridable per request
+        self.time_budget = float(os.getenv("TEST_TIME_BUDGET", "5.0"))
+        self.fail_fast = os.getenv("TEST_FAIL_FAST", "0") == "1"
         
-        prompt = ChatPromptTemplate.from_messages([
-            ("system", """You are a Tester Agent specialized in testing React applications.
-Your role is to:
-1. Verify code structure and syntax
-2. Run tests to ensure functionality
-3. Report any issues found
-
-Be thorough but concise in your testing."""),
-            ("human", "{input}"),
-            ("placeholder", "{agent_scratchpad}"),
-        ])
+        # Results of unchanged inputs are reused across requests
+        self.result_cache = CheckResultCache(max_entries=int(os.getenv("TEST_CACHE_SIZE", "2048")))
+    
+    def memory_usage(self) -> Dict[str, Any]:
+        return {"check_results": self.result_cache.entries, "bundles": project_bundler.results}
+    
+    def _build_llm(self):
+        from langchain_google_genai import ChatGoogleGenerativeAI
         
-        self.agent = create_tool_calling_agent(self.llm, self.tools, prompt)
-        self.executor = AgentExecutor(agent=self.agent, tools=self.tools, verbose=True)
+        return ChatGoogleGenerativeAI(
+            model="gemini-2.5-flash",
+            temperature=0.3
+        )
         
     async def execute(self, task_data: Dict[str, Any]) -> Dict[str, Any]:
         """Execute task based on input data"""
+        self.bind_request(task_data)
+        
         # Handle standard A2A message format
         content = task_data.get("content", {})
         action = content.get("action")
@@ -74,17 +56,24 @@ Be thorough but concise in your testing."""),
         
         if action == "test_code":
             files = parameters.get("files", {})
-            return await self.test_code(files)
+            return await self.test_code(
+                files,
+                fail_fast=parameters.get("fail_fast"),
+                time_budget=parameters.get("time_budget"),
+                categories=parameters.get("categories"),
+                use_cache=parameters.get("use_cache", True)
+            )
             
         return {"error": f"Unknown action: {action}"}
     
-    async def test_code(self, files: Dict[str, Any]) -> Dict[str, Any]:
-        """Test the generated code"""
-        
-        # Get main app code
-        app_code = files.get("/App.js", "")
+    async def test_code(self, files: Dict[str, Any], fail_fast: Optional[bool] = None,
+                        time_budget: Optional[float] = None,
+                        categories: Optional[List[str]] = None,
+                        use_cache: bool = True) -> Dict[str, Any]:
+        """Test the generated code with independent checks run concurrently"""
+        self.publish_progress("Running tests...")
         
-        if not app_code:
+        if not files.get("/App.js", ""):
             return {
                 "status": "failed",
                 "errors": ["No code to test"],
@@ -93,37 +82,149 @@ Be thorough but concise in your testing."""),
                 "tests_failed": 1
             }
         
-        # Simple validation
-        errors = []
+        fail_fast = self.fail_fast if fail_fast is None else fail_fast
+        time_budget = self.time_budget if time_budget is None else time_budget
+        # Checks still running when the caller's deadline passes are reported as timed out
+        left = remaining()
+        if left is not None:
+            time_budget = max(0.0, min(time_budget, left))
         
-        # Check for basic React structure
-        if "import" not in app_code:
-            errors.append("Missing import statements")
+        checks = build_checks(files)
+        if categories:
+            checks = [c for c in checks if c.category in categories]
         
-        if "export default" not in app_code:
-            errors.append("Missing default export")
+        start = time.perf_counter()
         
-        if "function" not in app_code and "const" not in app_code:
-            errors.append("Missing component function")
+        # Only checks whose inputs changed are executed
+        cached_results = []
+        keys = {}
+        if use_cache:
+            file_hashes = hash_files(files)
+            to_run = []
+            for check in checks:
+                key = self.result_cache.key(check, file_hashes)
+                cached = self.result_cache.get(key)
+                if cached is not None:
+                    cached_results.append({**cached, "cached": True})
+                else:
+                    keys[check.name] = key
+                    to_run.append(check)
+            checks = to_run
         
-        # Check for common issues
-        if app_code.startswith("```"):
-            errors.append("Code contains markdown fences")
+        results = await self._run_checks(checks, files, time_budget, fail_fast)
         
-        if errors:
-            return {
-                "status": "failed",
-                "errors": errors,
-                "tests_run": len(errors),
-                "tests_passed": 0,
-                "tests_failed": len(errors)
+        for result in results:
+            key = keys.get(result["name"])
+            if key and result["status"] in ("passed", "failed", "warning"):
+                self.result_cache.put(key, result)
+        
+        report = self._report(cached_results + [{**r, "cached": False} for r in results],
+                              (time.perf_counter() - start) * 1000)
+        report["cached_checks"] = len(cached_results)
+        report["executed_checks"] = sum(1 for r in results if r["duration_ms"] is not None)
+        report["cache"] = self.result_cache.get_stats()
+        
+        # The bundle the check built (or reused) is served by the preview endpoint
+        bundle = await project_bundler.lookup(files) if project_bundler.available else None
+        if bundle is not None and bundle.status == "built":
+            report["bundle"] = {
+                "key": bundle.key,
+                "size": bundle.size,
+                "preview_path": f"/preview/{bundle.key}/"
             }
+        return report
+    
+    async def _run_check(self, check: Check, files: Dict[str, str]) -> Dict[str, Any]:
+        start = time.perf_counter()
+        inputs = {path: files[path] for path in check.inputs if path in files}
+        size = sum(len(content) for content in inputs.values())
+        if asyncio.iscoroutinefunction(check.fn):
+            errors = await check.fn(inputs, check.file)
+        else:
+            errors = await cpu_offloader.run(check.fn, inputs, check.file, size=size)
+        
+        if not errors:
+            status = "passed"
+        else:
+            status = "warning" if check.severity == "warning" else "failed"
+        
+        return {
+            "name": check.name,
+            "file": check.file,
+            "category": check.category,
+            "status": status,
+            "errors": errors,
+            "duration_ms": round((time.perf_counter() - start) * 1000, 3)
+        }
+    
+    async def _run_checks(self, checks: List[Check], files: Dict[str, str],
+                          time_budget: float, fail_fast: bool) -> List[Dict[str, Any]]:
+        """Run checks concurrently within the suite's time budget"""
+        tasks = {asyncio.create_task(self._run_check(check, files)): check for check in checks}
+        results = []
+        pending = set(tasks)
+        deadline = time.perf_counter() + time_budget
+        stop_reason = None
+        
+        while pending:
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                stop_reason = "timeout"
+                break
+            done, pending = await asyncio.wait(pending, timeout=remaining,
+                                               return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                results.append(task.result())
+            if fail_fast and any(r["status"] == "failed" for r in results):
+                stop_reason = "skipped"
+                break
+        
+        for task in pending:
+            task.cancel()
+            check = tasks[task]
+            results.append({
+                "name": check.name,
+                "file": check.file,
+                "category": check.category,
+                "status": stop_reason,
+                "errors": [],
+                "duration_ms": None
+            })
+        
+        return results
+    
+    def _report(self, results: List[Dict[str, Any]], duration_ms: float) -> Dict[str, Any]:
+        """Merge check results into one structured report"""
+        order = {category: i for i, category in enumerate(CATEGORIES)}
+        results.sort(key=lambda r: (order.get(r["category"], len(order)), r["file"], r["name"]))
+        
+        errors = [f"{r['file']}: {e}" for r in results if r["status"] == "failed" for e in r["errors"]]
+        warnings = [f"{r['file']}: {e}" for r in results if r["status"] == "warning" for e in r["errors"]]
+        # Unfinished checks found nothing wrong: the code is unverified, not failing
+        timed_out = [r["name"] for r in results if r["status"] == "timeout"]
+        if timed_out:
+            warnings.append(f"Test suite time budget exceeded, unfinished checks: {', '.join(timed_out)}")
+        
+        executed = [r for r in results if r["duration_ms"] is not None]
+        slowest = sorted([r for r in executed if not r.get("cached")], key=lambda r: r["duration_ms"], reverse=True)[:3]
+        
+        if errors:
+            status = "failed"
+        elif timed_out:
+            status = "incomplete"
+        else:
+            status = "passed"
         
-        # All tests passed
         return {
-            "status": "passed",
-            "errors": [],
-            "tests_run": 3,
-            "tests_passed": 3,
-            "tests_failed": 0
+            "status": status,
+            "errors": errors,
+            "warnings": warnings,
+            "tests_run": len(executed),
+            "tests_passed": sum(1 for r in results if r["status"] in ("passed", "warning")),
+            "tests_failed": sum(1 for r in results if r["status"] == "failed"),
+            "tests_timed_out": len(timed_out),
+            "tests_skipped": sum(1 for r in results if r["status"] == "skipped"),
+            "checks": results,
+            "duration_ms": round(duration_ms, 3),
+            "slowest": [{"name": r["name"], "duration_ms": r["duration_ms"]} for r in slowest]
         }
@@ -0,0 +1,86 @@
+"""
+Context Packer Benchmark
+
+Compares prompt context size for the whole /App.js against the packed
+context, and measures packing time, as generated apps grow.
+
+Usage:
+    python benchmarks/bench_context_packer.py [--components 5 20 80] [--budget 4000]
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                                "agents", "developer-service"))
+
+from context_packer import ContextPacker, estimate_tokens
+
+COMPONENT = """function Widget{i}({{ items, onSelect }}) {{
+  const [open, setOpen] = useState(false);
+  return (
+    <section className="widget widget-{i}">
+      <header className="widget-header" onClick={{() => setOpen(!open)}}>
+        <h2 className="widget-title">Widget {i}</h2>
+      </header>
+      {{open && (
+        <ul className="widget-list">
+          {{items.map(item => <li key={{item.id}} className="widget-item">{{item.name}}</li>)}}
+        </ul>
+      )}}
+    </section>
+  );
+}}
+"""
+
+
+def make_app(components: int) -> str:
+    body = "\n".join(COMPONENT.format(i=i) for i in range(components))
+    usages = "\n".join(f"      <Widget{i} items={{items}} onSelect={{setSelected}} />" for i in range(components))
+    return f"""import React, {{ useState }} from 'react';
+
+{body}
+export default function App() {{
+  const [items] = useState([]);
+  const [selected, setSelected] = useState(null);
+  return (
+    <div className="app-container">
+{usages}
+    </div>
+  );
+}}
+"""
+
+
+def timed(fn, repeat: int = 20) -> float:
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--components", nargs="+", type=int, default=[5, 20, 80])
+    parser.add_argument("--budget", type=int, default=4000)
+    args = parser.parse_args()
+
+    packer = ContextPacker(max_tokens=args.budget)
+    print("components | App.js tokens | fix_bug ctx | styles ctx | pack (ms)")
+    print("-" * 68)
+    for components in args.components:
+        code = make_app(components)
+        errors = [f"/App.js: Unclosed '{{' opened on line {code.count(chr(10)) // 2}"]
+        fix = packer.pack_code(code, errors)
+        styles = packer.pack_styles(code)
+        ms = timed(lambda: (packer.pack_code(code, errors), packer.pack_styles(code)))
+        print(f"{components:10} | {estimate_tokens(code):13} | {fix.tokens:11} | {styles.tokens:10} | {ms:9.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+"""
+Project Cache Benchmark
+
+Measures insert, lookup and persistence latency of the Developer's
+ProjectSimilarityIndex at several index sizes.
+
+Usage:
+    python benchmarks/bench_project_cache.py [--sizes 100 1000 5000]
+"""
+
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                                "agents", "developer-service"))
+
+from project_cache import ProjectSimilarityIndex
+
+SUBJECTS = ["todo", "weather", "calculator", "blog", "chat", "kanban", "timer", "quiz",
+            "recipe", "budget", "notes", "gallery", "calendar", "shop", "portfolio", "tracker"]
+FEATURES = ["dark mode", "search", "filters", "drag and drop", "charts", "login",
+            "local storage", "animations", "pagination", "tags", "export", "sharing"]
+VERBS = ["build", "create", "make", "generate"]
+
+# A small app is enough to make persistence cost realistic
+SAMPLE_FILES = {
+    "/App.js": "import React from 'react';\n" + "// generated code\n" * 150,
+    "/styles.css": ".app-container { padding: 2rem; }\n" * 80
+}
+
+
+def make_request(rng: random.Random) -> str:
+    features = rng.sample(FEATURES, rng.randint(1, 3))
+    return f"{rng.choice(VERBS)} a {rng.choice(SUBJECTS)} app with {' and '.join(features)}"
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def run(size: int, lookups: int, seed: int):
+    rng = random.Random(seed)
+    index = ProjectSimilarityIndex(max_entries=size)
+
+    start = time.perf_counter()
+    for i in range(size):
+        index.add(f"{make_request(rng)} #{i}", SAMPLE_FILES)
+    insert_ms = (time.perf_counter() - start) * 1000 / size
+
+    timings = []
+    hits = 0
+    for _ in range(lookups):
+        query = make_request(rng)
+        t0 = time.perf_counter()
+        entry, similarity = index.lookup(query, min_similarity=0.5)
+        timings.append((time.perf_counter() - t0) * 1000)
+        hits += entry is not None
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "index.json")
+        t0 = time.perf_counter()
+        index.save(path)
+        save_ms = (time.perf_counter() - t0) * 1000
+
+        restored = ProjectSimilarityIndex(max_entries=size)
+        t0 = time.perf_counter()
+        restored.load(path)
+        load_ms = (time.perf_counter() - t0) * 1000
+        file_kb = os.path.getsize(path) / 1024
+
+    print(f"{size:>7} | {insert_ms:8.3f} | {statistics.mean(timings):8.3f} | "
+          f"{percentile(timings, 50):8.3f} | {percentile(timings, 99):8.3f} | "
+          f"{hits / lookups:6.1%} | {save_ms:9.1f} | {load_ms:9.1f} | {file_kb:9.0f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 1000, 5000])
+    parser.add_argument("--lookups", type=int, default=500)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    print("entries | add (ms) | mean(ms) |  p50(ms) |  p99(ms) |   hits | save (ms) | load (ms) | size (KB)")
+    print("-" * 100)
+    for size in args.sizes:
+        run(size, args.lookups, args.seed)
+
+
+if __name__ == "__main__":
+    main()
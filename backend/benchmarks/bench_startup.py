@@ -0,0 +1,121 @@
+"""
+Agent Service Startup Benchmark
+
+For each agent service, measures in fresh interpreters:
+  - import time of the executor module and of the LLM client library
+  - time from process start until /health answers (port bound)
+  - time until /ready reports warm-up finished
+  - time until the first A2A request is answered
+
+The first request uses an unknown action so no LLM call is made.
+Services are started on their usual ports, which must be free.
+
+Usage:
+    python benchmarks/bench_startup.py [--services analyst developer tester]
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+import urllib.error
+import urllib.request
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+SERVICES = {
+    "analyst": ("analyst-service", "analyst_agent", 8001),
+    "developer": ("developer-service", "developer_agent", 8002),
+    "tester": ("tester-service", "tester_agent", 8003),
+}
+
+IMPORT_PROBE = """
+import sys, time
+sys.path[:0] = [{service_dir!r}, {backend_dir!r}]
+start = time.perf_counter()
+import {module}
+print(time.perf_counter() - start)
+"""
+
+
+def time_import(service_dir: str, module: str) -> float:
+    code = IMPORT_PROBE.format(service_dir=service_dir, backend_dir=BACKEND_DIR, module=module)
+    output = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True,
+                            cwd=service_dir)
+    return float(output.stdout.strip().splitlines()[-1])
+
+
+def time_llm_import() -> float:
+    code = "import time; s = time.perf_counter(); import langchain_google_genai; print(time.perf_counter() - s)"
+    output = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True)
+    if output.returncode != 0:
+        return float("nan")
+    return float(output.stdout.strip())
+
+
+def request(url: str, body: dict = None, timeout: float = 2.0) -> int:
+    data = json.dumps(body).encode() if body is not None else None
+    req = urllib.request.Request(url, data=data, headers={"Content-Type": "application/json"})
+    try:
+        with urllib.request.urlopen(req, timeout=timeout) as response:
+            return response.status
+    except urllib.error.HTTPError as e:
+        return e.code
+    except OSError:
+        return 0
+
+
+def wait_for(predicate, deadline: float) -> bool:
+    while time.perf_counter() < deadline:
+        if predicate():
+            return True
+        time.sleep(0.02)
+    return False
+
+
+def time_service(service_dir: str, port: int, timeout: float):
+    base = f"http://localhost:{port}"
+    start = time.perf_counter()
+    process = subprocess.Popen([sys.executable, "main.py"], cwd=service_dir,
+                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    deadline = start + timeout
+    try:
+        healthy = wait_for(lambda: request(f"{base}/health") == 200, deadline)
+        t_health = time.perf_counter() - start if healthy else float("nan")
+
+        probe = {"type": "request", "from": "Benchmark", "to": "Agent",
+                 "content": {"action": "benchmark_ping", "parameters": {}}, "metadata": {}}
+        answered = wait_for(lambda: request(f"{base}/message", probe, timeout=timeout) == 200, deadline)
+        t_first = time.perf_counter() - start if answered else float("nan")
+
+        ready = wait_for(lambda: request(f"{base}/ready") == 200, deadline)
+        t_ready = time.perf_counter() - start if ready else float("nan")
+
+        return t_health, t_ready, t_first
+    finally:
+        process.terminate()
+        process.wait(timeout=10)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--services", nargs="+", choices=list(SERVICES), default=list(SERVICES))
+    parser.add_argument("--timeout", type=float, default=60.0)
+    args = parser.parse_args()
+
+    print(f"langchain_google_genai import: {time_llm_import():.3f}s (deferred to warm-up)")
+    print()
+    print("service   | import (s) | /health (s) | first request (s) | /ready (s)")
+    print("-" * 70)
+    for name in args.services:
+        directory, module, port = SERVICES[name]
+        service_dir = os.path.join(BACKEND_DIR, "agents", directory)
+        t_import = time_import(service_dir, module)
+        t_health, t_ready, t_first = time_service(service_dir, port, args.timeout)
+        print(f"{name:<9} | {t_import:10.3f} | {t_health:11.3f} | {t_first:17.3f} | {t_ready:10.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,10 @@
+"""Bundling of generated projects into browser artifacts"""
+
+from .bundler import BundleResult, ProjectBundler, bundle_key, project_bundler
+
+__all__ = [
+    'BundleResult',
+    'ProjectBundler',
+    'bundle_key',
+    'project_bundler'
+]
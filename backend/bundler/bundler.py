@@ -0,0 +1,497 @@
+"""
+Project Bundler
+
+Transpiles generated projects with esbuild and bundles them into a single
+browser artifact. Each module's transpiled output is cached by its content
+hash and reused across turns. Finished bundles are stored on disk under a
+hash of all input files, so the Tester and the preview endpoint read the
+same artifact without rebuilding it. The disk cache is capped in size: the
+least recently used artifacts and module outputs are deleted beyond it.
+"""
+
+import asyncio
+import hashlib
+import json
+import os
+import re
+import shutil
+import tempfile
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field, asdict
+from typing import Dict, Any, List, Optional, Tuple
+from protocol.coalescing import SingleFlight
+import logging
+
+logger = logging.getLogger(__name__)
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_CACHE_DIR = os.path.join(BACKEND_DIR, "cache", "bundles")
+
+# Bump when the build pipeline changes so cached artifacts are invalidated
+BUNDLER_VERSION = 1
+
+# Bare imports are left external and resolved in the browser through an import map
+CDN_URL = "https://esm.sh"
+DEFAULT_VERSIONS = {"react": "18.2.0", "react-dom": "18.2.0"}
+
+_KEY_RE = re.compile(r"[0-9a-f]{32}")
+_MODULE_EXTENSIONS = (".js", ".jsx")
+_ASSET_EXTENSIONS = (".css", ".json")
+_BARE_IMPORT_RE = re.compile(r"""(?:^|[\s;])(?:import|export)\b[^'"]*?from\s*['"]([^'"./][^'"]*)['"]|import\s*['"]([^'"./][^'"]*)['"]""", re.M)
+_ERROR_RE = re.compile(r"\[ERROR\] (.+)\n\s*\n\s+([^\s:]+):(\d+):(\d+):")
+
+PREVIEW_HTML = """<!DOCTYPE html>
+<html lang="en">
+<head>
+  <meta charset="UTF-8" />
+  <meta name="viewport" content="width=device-width, initial-scale=1.0" />
+  <title>Preview</title>
+  <script type="importmap">{import_map}</script>
+{stylesheet}</head>
+<body>
+  <div id="root"></div>
+  <script type="module" src="./bundle.js"></script>
+</body>
+</html>
+"""
+
+SYNTHETIC_ENTRY = """import React from 'react';
+import { createRoot } from 'react-dom/client';
+import App from './App';
+{styles}
+createRoot(document.getElementById('root')).render(<App />);
+"""
+
+
+@dataclass
+class BundleResult:
+    """Outcome of bundling one set of project files"""
+    key: str
+    status: str  # built | failed | unavailable
+    errors: List[str] = field(default_factory=list)
+    assets: List[str] = field(default_factory=list)
+    size: int = 0
+    duration_ms: float = 0.0
+    modules_transformed: int = 0
+    modules_reused: int = 0
+    cached: bool = False
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+
+def bundle_key(files: Dict[str, str], version: str = "") -> str:
+    """Content address of a project: hash over every path and content"""
+    digest = hashlib.sha256(f"{BUNDLER_VERSION}|{version}".encode("utf-8"))
+    for path in sorted(files):
+        content = files[path]
+        if isinstance(content, str):
+            digest.update(path.encode("utf-8") + b"\0" + content.encode("utf-8") + b"\0")
+    return digest.hexdigest()[:32]
+
+
+def staged_path(root: str, path: str) -> Optional[str]:
+    """Where a project file is written under root, or None when its path escapes root"""
+    root = os.path.realpath(root)
+    target = os.path.realpath(os.path.join(root, path.lstrip("/")))
+    if target == root or os.path.commonpath([root, target]) != root:
+        return None
+    return target
+
+
+def parse_esbuild_errors(stderr: str) -> List[str]:
+    """Turn esbuild diagnostics into "message (/path line N, column M)" strings"""
+    errors = []
+    for message, path, line, column in _ERROR_RE.findall(stderr):
+        errors.append(f"{message.strip()} (/{path.lstrip('/')} line {line}, column {column})")
+    if not errors and stderr.strip():
+        errors = [line.strip() for line in stderr.strip().splitlines() if line.strip()][:5]
+    return errors
+
+
+def import_map(files: Dict[str, str]) -> Dict[str, Dict[str, str]]:
+    """Import map for the bare module specifiers the project uses"""
+    versions = dict(DEFAULT_VERSIONS)
+    try:
+        package = json.loads(files.get("/package.json", "") or "{}")
+        for name, version in (package.get("dependencies") or {}).items():
+            versions[name] = str(version).lstrip("^~") or "latest"
+    except (ValueError, AttributeError):
+        pass
+
+    packages = {"react", "react-dom"}
+    for path, content in files.items():
+        if path.endswith(_MODULE_EXTENSIONS) and isinstance(content, str):
+            for match in _BARE_IMPORT_RE.finditer(content):
+                specifier = match.group(1) or match.group(2)
+                parts = specifier.split("/")
+                packages.add("/".join(parts[:2]) if specifier.startswith("@") else parts[0])
+
+    imports = {}
+    for package in sorted(packages):
+        url = f"{CDN_URL}/{package}@{versions.get(package, 'latest')}"
+        imports[package] = url
+        imports[f"{package}/"] = f"{url}/"
+    return {"imports": imports}
+
+
+class ProjectBundler:
+    """esbuild-based bundler with per-module and per-project caches"""
+
+    def __init__(self, cache_dir: str = DEFAULT_CACHE_DIR, esbuild: Optional[str] = None,
+                 timeout: float = 20.0, memory_entries: int = 128,
+                 max_disk_bytes: int = 512 * 1024 * 1024, prune_interval: float = 60.0):
+        """
+        Args:
+            cache_dir: Directory of bundle artifacts and module outputs
+            esbuild: esbuild binary, found on the PATH by default
+            timeout: Seconds one esbuild run may take
+            memory_entries: Results kept in memory
+            max_disk_bytes: Size the disk cache is pruned back to (0 = unlimited)
+            prune_interval: Seconds between checks of the disk cache size
+        """
+        self.cache_dir = cache_dir
+        self.esbuild = esbuild or os.getenv("ESBUILD_PATH") or shutil.which("esbuild")
+        self.timeout = timeout
+        self.memory_entries = memory_entries
+        self.max_disk_bytes = max_disk_bytes
+        self.prune_interval = prune_interval
+        self._last_prune: Optional[float] = None
+        self.results: "OrderedDict[str, BundleResult]" = OrderedDict()
+        self.single_flight = SingleFlight()
+        self._version: Optional[str] = None
+        self.stats = {
+            "builds": 0,
+            "failures": 0,
+            "memory_hits": 0,
+            "disk_hits": 0,
+            "module_hits": 0,
+            "module_misses": 0,
+            "evicted": 0
+        }
+
+    @property
+    def available(self) -> bool:
+        return bool(self.esbuild)
+
+    async def _run(self, args: List[str], stdin: Optional[str] = None, cwd: Optional[str] = None) -> Tuple[int, str, str]:
+        process = await asyncio.create_subprocess_exec(
+            self.esbuild, *args,
+            stdin=asyncio.subprocess.PIPE if stdin is not None else asyncio.subprocess.DEVNULL,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE,
+            cwd=cwd
+        )
+        try:
+            stdout, stderr = await asyncio.wait_for(
+                process.communicate(stdin.encode("utf-8") if stdin is not None else None),
+                timeout=self.timeout
+            )
+        except asyncio.TimeoutError:
+            process.kill()
+            await process.wait()
+            return -1, "", f"esbuild timed out after {self.timeout}s"
+        except asyncio.CancelledError:
+            process.kill()
+            raise
+        return process.returncode, stdout.decode("utf-8", "replace"), stderr.decode("utf-8", "replace")
+
+    async def version(self) -> str:
+        """esbuild version, part of every cache key"""
+        if self._version is None:
+            code, stdout, _ = await self._run(["--version"])
+            self._version = stdout.strip() if code == 0 else "unknown"
+        return self._version
+
+    def _artifact_dir(self, key: str) -> str:
+        return os.path.join(self.cache_dir, key)
+
+    def artifact_path(self, key: str, name: str) -> Optional[str]:
+        """Path of a cached artifact file, if it exists"""
+        if not _KEY_RE.fullmatch(key) or name not in ("index.html", "bundle.js", "bundle.css"):
+            return None
+        path = os.path.join(self._artifact_dir(key), name)
+        if not os.path.isfile(path):
+            return None
+        _touch(self._artifact_dir(key))
+        return path
+
+    def _remember(self, result: BundleResult):
+        self.results[result.key] = result
+        self.results.move_to_end(result.key)
+        while len(self.results) > self.memory_entries:
+            self.results.popitem(last=False)
+
+    def _load(self, key: str) -> Optional[BundleResult]:
+        meta = os.path.join(self._artifact_dir(key), "meta.json")
+        try:
+            with open(meta, "r", encoding="utf-8") as f:
+                result = BundleResult(**json.load(f))
+        except (OSError, ValueError, TypeError):
+            return None
+        _touch(self._artifact_dir(key))
+        return result
+
+    def _recall(self, key: str) -> Optional[BundleResult]:
+        """Result remembered in memory, unless its artifact has been pruned since (by any process)"""
+        result = self.results.get(key)
+        if result is None:
+            return None
+        if result.status == "built" and not os.path.isdir(self._artifact_dir(key)):
+            del self.results[key]
+            return None
+        self.results.move_to_end(key)
+        _touch(self._artifact_dir(key))
+        return result
+
+    async def lookup(self, files: Dict[str, str]) -> Optional[BundleResult]:
+        """Cached result for these files, without building"""
+        if not self.available:
+            return None
+        key = bundle_key(files, await self.version())
+        result = self._recall(key)
+        if result is None:
+            result = await asyncio.to_thread(self._load, key)
+        return result
+
+    async def build(self, files: Dict[str, str]) -> BundleResult:
+        """
+        Bundle project files, reusing cached artifacts and module outputs
+
+        Args:
+            files: Project files keyed by path (e.g. /App.js)
+
+        Returns:
+            BundleResult; status "unavailable" when esbuild is not installed
+        """
+        if not self.available:
+            return BundleResult(key="", status="unavailable", errors=["esbuild is not installed"])
+
+        key = bundle_key(files, await self.version())
+        result = self._recall(key)
+        if result is not None:
+            self.stats["memory_hits"] += 1
+            return BundleResult(**{**result.to_dict(), "cached": True})
+
+        # Identical concurrent builds share one esbuild run
+        return await self.single_flight.do(key, lambda: self._build(key, files), label="bundle")
+
+    async def _build(self, key: str, files: Dict[str, str]) -> BundleResult:
+        result = await asyncio.to_thread(self._load, key)
+        if result is not None:
+            self.stats["disk_hits"] += 1
+            self._remember(result)
+            return BundleResult(**{**result.to_dict(), "cached": True})
+
+        start = time.perf_counter()
+        self.stats["builds"] += 1
+        staging = tempfile.mkdtemp(prefix="bundle-")
+        try:
+            result = await self._bundle(key, files, staging)
+            result.duration_ms = round((time.perf_counter() - start) * 1000, 3)
+            await asyncio.to_thread(self._publish, key, staging, result, files)
+        finally:
+            shutil.rmtree(staging, ignore_errors=True)
+
+        if result.status == "failed":
+            self.stats["failures"] += 1
+        self._remember(result)
+        await self._maybe_prune()
+        return result
+
+    async def _maybe_prune(self):
+        """Prune the disk cache after builds, at most once per prune_interval"""
+        now = time.monotonic()
+        if not self.max_disk_bytes or (self._last_prune is not None and now - self._last_prune < self.prune_interval):
+            return
+        self._last_prune = now
+        evicted = await asyncio.to_thread(self.prune)
+        for key in evicted:
+            self.results.pop(key, None)
+
+    def prune(self) -> List[str]:
+        """
+        Delete the least recently used artifacts and module outputs until the
+        disk cache fits in max_disk_bytes
+
+        Returns:
+            Keys of the evicted bundle artifacts
+        """
+        entries = []  # (last used, bytes, path, bundle key or None for a module)
+        modules_dir = os.path.join(self.cache_dir, "modules")
+        try:
+            names = os.listdir(self.cache_dir)
+        except OSError:
+            return []
+        for name in names:
+            if _KEY_RE.fullmatch(name):
+                entries.append(_entry(os.path.join(self.cache_dir, name), name))
+        if os.path.isdir(modules_dir):
+            # Outputs still being written (.tmp) are left alone
+            entries.extend(_entry(os.path.join(modules_dir, name), None)
+                           for name in os.listdir(modules_dir) if name.endswith(".js"))
+        entries = [e for e in entries if e is not None]
+
+        total = sum(size for _, size, _, _ in entries)
+        evicted = []
+        for _, size, path, key in sorted(entries, key=lambda e: e[0]):
+            if total <= self.max_disk_bytes:
+                break
+            if key is None:
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+            else:
+                shutil.rmtree(path, ignore_errors=True)
+                evicted.append(key)
+            total -= size
+        if evicted:
+            self.stats["evicted"] += len(evicted)
+            logger.info(f"Bundle cache pruned to {total // 1024} KiB, {len(evicted)} artifact(s) evicted")
+        return evicted
+
+    async def _transform(self, path: str, content: str) -> Tuple[Optional[str], List[str], bool]:
+        """Transpile one JSX module, cached by content hash"""
+        module_key = hashlib.sha256(
+            f"{BUNDLER_VERSION}|{await self.version()}|{path}|{content}".encode("utf-8")
+        ).hexdigest()
+        cached = os.path.join(self.cache_dir, "modules", f"{module_key}.js")
+        try:
+            with open(cached, "r", encoding="utf-8") as f:
+                code = f.read()
+        except OSError:
+            code = None
+        if code is not None:
+            self.stats["module_hits"] += 1
+            _touch(cached)
+            return code, [], True
+
+        self.stats["module_misses"] += 1
+        code, stdout, stderr = await self._run(
+            ["--loader=jsx", "--jsx=automatic", "--format=esm", f"--sourcefile={path.lstrip('/')}",
+             "--log-level=error", "--color=false"],
+            stdin=content
+        )
+        if code != 0:
+            return None, parse_esbuild_errors(stderr), False
+
+        os.makedirs(os.path.dirname(cached), exist_ok=True)
+        temporary = f"{cached}.{os.getpid()}.tmp"
+        with open(temporary, "w", encoding="utf-8") as f:
+            f.write(stdout)
+        os.replace(temporary, cached)
+        return stdout, [], False
+
+    async def _bundle(self, key: str, files: Dict[str, str], staging: str) -> BundleResult:
+        result = BundleResult(key=key, status="built")
+        source_dir = os.path.join(staging, "src")
+        out_dir = os.path.join(staging, "out")
+        os.makedirs(out_dir)
+
+        # Paths come from model output and callers: nothing may be written outside the staging dir
+        escaping = [path for path in files if staged_path(source_dir, path) is None]
+        if escaping:
+            result.status = "failed"
+            result.errors = [f"Invalid file path {path!r}: outside the project" for path in escaping]
+            return result
+
+        sources = dict(files)
+        if "/index.js" not in sources and "/App.js" in sources:
+            styles = "import './styles.css';" if "/styles.css" in sources else ""
+            sources["/index.js"] = SYNTHETIC_ENTRY.replace("{styles}", styles)
+
+        modules = {p: c for p, c in sources.items() if p.endswith(_MODULE_EXTENSIONS) and isinstance(c, str)}
+        transformed = await asyncio.gather(*(self._transform(p, c) for p, c in modules.items()))
+
+        for (path, _), (code, errors, reused) in zip(modules.items(), transformed):
+            result.errors.extend(errors)
+            if reused:
+                result.modules_reused += 1
+            else:
+                result.modules_transformed += 1
+            if code is not None:
+                self._write(source_dir, path, code)
+        for path, content in sources.items():
+            if path.endswith(_ASSET_EXTENSIONS) and isinstance(content, str):
+                self._write(source_dir, path, content)
+
+        if result.errors:
+            result.status = "failed"
+            return result
+
+        code, _, stderr = await self._run(
+            ["index.js", "--bundle", "--format=esm", "--packages=external", "--loader:.jsx=js",
+             f"--outfile={os.path.join(out_dir, 'bundle.js')}", "--log-level=error", "--color=false"],
+            cwd=source_dir
+        )
+        if code != 0:
+            result.status = "failed"
+            result.errors = parse_esbuild_errors(stderr)
+            return result
+
+        has_css = os.path.isfile(os.path.join(out_dir, "bundle.css"))
+        stylesheet = '  <link rel="stylesheet" href="./bundle.css" />\n' if has_css else ""
+        self._write(out_dir, "/index.html", PREVIEW_HTML.format(
+            import_map=json.dumps(import_map(files)), stylesheet=stylesheet
+        ))
+        result.assets = sorted(os.listdir(out_dir))
+        result.size = sum(os.path.getsize(os.path.join(out_dir, name)) for name in result.assets)
+        return result
+
+    @staticmethod
+    def _write(root: str, path: str, content: str):
+        target = staged_path(root, path)
+        if target is None:
+            raise ValueError(f"Invalid file path {path!r}: outside the project")
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        with open(target, "w", encoding="utf-8") as f:
+            f.write(content)
+
+    def _publish(self, key: str, staging: str, result: BundleResult, files: Dict[str, str]):
+        """Move the artifact into the content-addressed cache"""
+        out_dir = os.path.join(staging, "out")
+        with open(os.path.join(out_dir, "meta.json"), "w", encoding="utf-8") as f:
+            json.dump(result.to_dict(), f)
+        os.makedirs(self.cache_dir, exist_ok=True)
+        try:
+            os.replace(out_dir, self._artifact_dir(key))
+        except OSError:
+            # Another process published the same key first
+            pass
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Bundler statistics"""
+        return {
+            **self.stats,
+            "available": self.available,
+            "memory_entries": len(self.results)
+        }
+
+
+def _touch(path: str):
+    """Mark a cache entry used; pruning evicts the least recently used first"""
+    try:
+        os.utime(path)
+    except OSError:
+        pass
+
+
+def _entry(path: str, key: Optional[str]) -> Optional[Tuple[float, int, str, Optional[str]]]:
+    """Last use and size of a cache entry (a file, or an artifact directory), None when it is gone"""
+    try:
+        if key is None:
+            return os.path.getmtime(path), os.path.getsize(path), path, None
+        size = sum(os.path.getsize(os.path.join(path, name)) for name in os.listdir(path))
+        return os.path.getmtime(path), size, path, key
+    except OSError:
+        return None
+
+
+# Global instance
+project_bundler = ProjectBundler(
+    cache_dir=os.getenv("BUNDLE_CACHE_DIR", DEFAULT_CACHE_DIR),
+    timeout=float(os.getenv("BUNDLE_TIMEOUT", "20")),
+    max_disk_bytes=int(float(os.getenv("BUNDLE_CACHE_MAX_MB", "512")) * 1024 * 1024)
+)
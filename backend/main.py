@@ -1,13 +1,30 @@
-from fastapi import FastAPI, WebSocket, WebSocketDisconnect
+from fastapi import FastAPI, Depends, WebSocket, WebSocketDisconnect, HTTPException, Request as FastAPIRequest
 from fastapi.middleware.cors import CORSMiddleware
-from typing import Dict, Any
+from fastapi.responses import FileResponse, RedirectResponse
+from typing import Dict, Any, Awaitable, Optional
+import importlib
 import json
 import asyncio
+import hmac
 import logging
-from protocol import Request, Response
+import os
+import sys
+import uuid
+from protocol import Request, Response, Message
 from protocol.transport import network_transport, agent_registry
+from protocol.bus import AGENT_TOKEN_HEADER, message_bus
+from protocol.scheduler import QuotaExceeded, current_user
+from protocol.deadline import DeadlineExceeded
+from runtime import cpu_offloader, loop_monitor, profiler, memory_diagnostics
+from runtime.memory import SHARED
+from runtime.admin import admin_router, wants_profile
+from runtime.log_pipeline import setup_logging, logging_metrics, bind_log_fields
+from bundler import project_bundler
+from orchestrator.repair import repair_engine_from_env
+from orchestrator.workflow import AUTO_RESUME_STATUSES, workflow_from_env
+from orchestrator.outbound import OutboundChannel, outbound_metrics
 
-logging.basicConfig(level=logging.INFO)
+setup_logging("orchestrator")
 logger = logging.getLogger(__name__)
 
 app = FastAPI(title="Web Builder API - Main Orchestrator")
@@ -21,10 +38,77 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Operator routes (profiling), enabled by ADMIN_TOKEN
+app.include_router(admin_router())
+
+@app.middleware("http")
+async def profile_requests(request: FastAPIRequest, call_next):
+    """Profile a single HTTP request sent with X-Profile and the admin token"""
+    if not wants_profile(request):
+        return await call_next(request)
+    async with profiler.profile_request(f"Orchestrator {request.url.path}") as session:
+        response = await call_next(request)
+    response.headers["X-Profile-Id"] = session.id
+    return response
+
+# Agent services: remote URL and where to find the executor for in-process mode
+AGENT_SERVICES = {
+    "Analyst": ("http://localhost:8001", "analyst-service", "analyst_agent", "AnalystAgentExecutor"),
+    "Developer": ("http://localhost:8002", "developer-service", "developer_agent", "DeveloperAgentExecutor"),
+    "Tester": ("http://localhost:8003", "tester-service", "tester_agent", "TesterAgentExecutor"),
+}
+
+# Agents to run inside this process instead of over HTTP, e.g. LOCAL_AGENTS=Analyst,Tester
+# (LOCAL_AGENTS=all for single-box deployments); LOCAL_AGENTS_POOL=1 runs each on its own worker thread
+LOCAL_AGENTS = {name.strip() for name in os.getenv("LOCAL_AGENTS", "").split(",") if name.strip()}
+if "all" in LOCAL_AGENTS:
+    LOCAL_AGENTS = set(AGENT_SERVICES)
+LOCAL_AGENTS_POOL = os.getenv("LOCAL_AGENTS_POOL", "0") == "1"
+
+# Browser WebSocket: permessage-deflate and the window for coalescing status frames
+WS_PER_MESSAGE_DEFLATE = os.getenv("WS_PER_MESSAGE_DEFLATE", "1") == "1"
+WS_COALESCE_WINDOW = float(os.getenv("WS_COALESCE_WINDOW", "0.05"))
+# Behind a reverse proxy the client address comes from X-Forwarded-For
+TRUST_PROXY_HEADERS = os.getenv("TRUST_PROXY_HEADERS", "0") == "1"
+# Shared secret agent services send with forwarded notifications
+AGENT_TOKEN = os.getenv("AGENT_TOKEN", "")
+
+
+def client_identity(websocket: WebSocket) -> str:
+    """Who quotas and fair shares are accounted to: the client's address"""
+    if TRUST_PROXY_HEADERS:
+        forwarded = websocket.headers.get("x-forwarded-for", "").split(",")[0].strip()
+        if forwarded:
+            return f"ip:{forwarded}"
+    return f"ip:{websocket.client.host}" if websocket.client else "anonymous"
+
+
+def load_local_executor(service_dir: str, module_name: str, class_name: str):
+    """Import an agent executor from its service directory"""
+    path = os.path.join(os.path.dirname(os.path.abspath(__file__)), "agents", service_dir)
+    if path not in sys.path:
+        sys.path.insert(0, path)
+    module = importlib.import_module(module_name)
+    return getattr(module, class_name)()
+
+
 # Register agent URLs
-agent_registry.register("Analyst", "http://localhost:8001")
-agent_registry.register("Developer", "http://localhost:8002")
-agent_registry.register("Tester", "http://localhost:8003")
+for agent_name, (url, service_dir, module_name, class_name) in AGENT_SERVICES.items():
+    if agent_name in LOCAL_AGENTS:
+        executor = load_local_executor(service_dir, module_name, class_name)
+        agent_registry.register_local(agent_name, executor, use_worker_pool=LOCAL_AGENTS_POOL)
+    else:
+        agent_registry.register(agent_name, url)
+
+# Other replicas of remote agents for hedged requests,
+# e.g. AGENT_REPLICAS=Analyst=http://host2:8001|http://host3:8001,Tester=http://host2:8003
+for entry in filter(None, os.getenv("AGENT_REPLICAS", "").split(",")):
+    agent_name, _, urls = entry.partition("=")
+    agent_name = agent_name.strip()
+    if agent_registry.get_url(agent_name) and not agent_registry.is_local(agent_name):
+        network_transport.hedger.add_replicas(
+            agent_registry.get_url(agent_name), [u.strip() for u in urls.split("|") if u.strip()]
+        )
 
 class ConnectionManager:
     def __init__(self):
@@ -33,26 +117,98 @@ class ConnectionManager:
         self.contexts: dict[WebSocket, dict] = {}
         # Store message callbacks
         self.callbacks: list[callable] = []
+        # Agent progress notifications subscribed per connection
+        self.subscriptions: dict[WebSocket, Any] = {}
+        # Outbound framing (coalescing, file deltas) per connection
+        self.channels: dict[WebSocket, OutboundChannel] = {}
+        # Pipeline turn running per connection, cancelled on disconnect or a newer request
+        self.turns: dict[WebSocket, asyncio.Task] = {}
+        # Why the running turn was cancelled, recorded with its run
+        self.cancel_reasons: dict[WebSocket, str] = {}
+        self.cancelled_turns = {"disconnect": 0, "superseded": 0, "client": 0}
 
-    async def connect(self, websocket: WebSocket):
+    async def connect(self, websocket: WebSocket, conversation_id: Optional[str] = None):
         await websocket.accept()
         self.active_connections.append(websocket)
+        
+        # Clients opt into batched frames and file deltas with ?protocol=2
+        try:
+            protocol = int(websocket.query_params.get("protocol", "1"))
+        except ValueError:
+            protocol = 1
+        offered = websocket.headers.get("sec-websocket-extensions", "")
+        self.channels[websocket] = OutboundChannel(
+            websocket,
+            protocol=protocol,
+            compressed=WS_PER_MESSAGE_DEFLATE and "permessage-deflate" in offered,
+            window=WS_COALESCE_WINDOW
+        )
         # Initialize context for this connection
+        conversation_id = conversation_id or f"conv_{uuid.uuid4().hex}"
         self.contexts[websocket] = {
             "current_files": {},
             "conversation_history": [],
             "current_task": "",
-            "conversation_id": f"conv_{id(websocket)}"
+            "conversation_id": conversation_id,
+            "client_id": client_identity(websocket)
         }
+        
+        async def forward_notifications(batch: list[Message]):
+            for notification in batch:
+                data = notification.content.get("data", {})
+                await self.send_message({
+                    "role": "assistant",
+                    "content": data.get("message", notification.content.get("event", "")),
+                    "agent": notification.from_agent,
+                    "event": notification.content.get("event")
+                }, websocket)
+        
+        self.subscriptions[websocket] = message_bus.subscribe(forward_notifications, topic=conversation_id)
 
     def disconnect(self, websocket: WebSocket):
         if websocket in self.active_connections:
             self.active_connections.remove(websocket)
         if websocket in self.contexts:
             del self.contexts[websocket]
+        if websocket in self.subscriptions:
+            message_bus.unsubscribe(self.subscriptions.pop(websocket))
+        if websocket in self.channels:
+            self.channels.pop(websocket).close()
+        self.cancel_turn(websocket, "disconnect")
+    
+    def cancel_turn(self, websocket: WebSocket, reason: str) -> bool:
+        """Cancel the connection's running turn; its agent requests are cancelled with it"""
+        turn = self.turns.get(websocket)
+        if turn is None or turn.done():
+            return False
+        # The first reason sticks: a disconnect after a cancel is still a cancel
+        self.cancel_reasons.setdefault(websocket, reason)
+        turn.cancel()
+        self.cancelled_turns[reason] += 1
+        logger.info(f"Cancelled running turn ({reason})")
+        return True
+    
+    def cancel_reason(self, websocket: WebSocket) -> Optional[str]:
+        return self.cancel_reasons.get(websocket)
+    
+    async def flush_notifications(self, websocket: WebSocket):
+        """Deliver pending agent progress before the next orchestrator message"""
+        subscription = self.subscriptions.get(websocket)
+        if subscription is not None:
+            await subscription.flush()
+    
+    async def flush_frames(self, websocket: WebSocket):
+        """Send coalesced status messages without waiting for the window"""
+        channel = self.channels.get(websocket)
+        if channel is not None:
+            await channel.flush()
 
     async def send_message(self, message: Dict[str, Any], websocket: WebSocket):
-        await websocket.send_text(json.dumps(message))
+        channel = self.channels.get(websocket)
+        if channel is None:
+            await websocket.send_text(await cpu_offloader.dumps(message))
+        else:
+            await channel.send(message)
     
     async def broadcast_message(self, msg):
         """Broadcast message to all connected clients"""
@@ -80,12 +236,51 @@ class ConnectionManager:
     def update_context(self, websocket: WebSocket, **kwargs):
         if websocket in self.contexts:
             self.contexts[websocket].update(kwargs)
+    
+    def memory_usage(self) -> Dict[str, Dict[str, Any]]:
+        """What each connected conversation holds, for memory diagnostics"""
+        owned = {}
+        for websocket, context in list(self.contexts.items()):
+            channel = self.channels.get(websocket)
+            owned[context["conversation_id"]] = {
+                "files": context["current_files"],
+                "history": context["conversation_history"],
+                "task": context["current_task"],
+                "file_versions": channel.file_versions if channel else {}
+            }
+        return owned
 
 manager = ConnectionManager()
+memory_diagnostics.register_source("connections", manager.memory_usage)
+
+# Best-of-N repair of failing code (REPAIR_* env vars)
+repair_engine = repair_engine_from_env(network_transport, agent_registry)
+
+# Checkpointed pipeline (WORKFLOW_* env vars)
+workflow = workflow_from_env(network_transport, agent_registry, repair_engine)
+# Unfinished runs are resumed automatically on reconnect at most this many times
+WORKFLOW_MAX_RESUMES = int(os.getenv("WORKFLOW_MAX_RESUMES", "2"))
+
+# Orchestrator caches shared by all conversations
+memory_diagnostics.register_source("orchestrator", lambda: {SHARED: {
+    "in_flight": network_transport.single_flight.in_flight,
+    "quotas": network_transport.scheduler.quotas.usage,
+    "bundles": project_bundler.results,
+    "local_agents": {
+        name: executor.memory_usage()
+        for name, executor in network_transport.local.executors.items()
+        if hasattr(executor, "memory_usage")
+    }
+}})
 
 @app.on_event("startup")
 async def startup_event():
     """Check agent health on startup"""
+    loop_monitor.start()
+    
+    # In-process agents import their LLM clients in the background
+    network_transport.local.start_warm_up()
+    
     logger.info("Checking agent health...")
     health_status = await agent_registry.check_all_health(network_transport)
     
@@ -95,6 +290,13 @@ async def startup_event():
         else:
             logger.warning(f"✗ {agent_name} agent is not responding")
 
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Stop background workers"""
+    loop_monitor.stop()
+    cpu_offloader.shutdown()
+    await network_transport.close()
+
 @app.get("/")
 async def root():
     return {
@@ -114,244 +316,285 @@ async def health():
         "agents": agent_health
     }
 
-@app.websocket("/ws")
-async def websocket_endpoint(websocket: WebSocket):
-    await manager.connect(websocket)
+@app.get("/metrics")
+async def metrics():
+    """Orchestrator transport and runtime metrics"""
+    return {
+        "transport": network_transport.get_metrics(),
+        "event_loop": loop_monitor.get_metrics(),
+        "cpu_offload": cpu_offloader.get_metrics(),
+        "websocket": outbound_metrics.get_metrics(),
+        "profiler": profiler.get_metrics(),
+        "memory": memory_diagnostics.get_metrics(),
+        "logging": logging_metrics(),
+        "cancelled_turns": dict(manager.cancelled_turns)
+    }
+
+@app.get("/preview/{bundle_key}")
+async def preview_root(bundle_key: str):
+    """Relative asset URLs in the preview page need the trailing slash"""
+    return RedirectResponse(f"/preview/{bundle_key}/")
+
+@app.get("/preview/{bundle_key}/{asset:path}")
+async def preview(bundle_key: str, asset: str):
+    """Serve a bundled project straight from the content-addressed build cache"""
+    path = project_bundler.artifact_path(bundle_key, asset or "index.html")
+    if path is None:
+        raise HTTPException(status_code=404, detail="Bundle not found")
+    # Artifacts never change for a given key
+    return FileResponse(path, headers={"Cache-Control": "public, max-age=31536000, immutable"})
+
+async def require_agent_token(request: FastAPIRequest):
+    """Only agent services holding AGENT_TOKEN may publish; unset, the route does not exist"""
+    if not AGENT_TOKEN:
+        raise HTTPException(status_code=404, detail="Not Found")
+    if not hmac.compare_digest(request.headers.get(AGENT_TOKEN_HEADER, ""), AGENT_TOKEN):
+        raise HTTPException(status_code=403, detail="Agent token required")
+
+@app.post("/notifications", dependencies=[Depends(require_agent_token)])
+async def receive_notifications(request: FastAPIRequest):
+    """Accept batched progress notifications forwarded by agent services"""
+    batch = await request.json()
+    for data in batch:
+        message_bus.publish(Message.from_dict(data))
+    return {"status": "accepted", "count": len(batch)}
+
+async def run_pipeline(websocket: WebSocket, run: Awaitable[Dict[str, Any]], emit) -> Optional[Dict[str, Any]]:
+    """
+    Start or resume a pipeline run; running out of quota or time ends the turn, not the connection
+
+    Returns:
+        Final pipeline state, or None when the run stopped early and can be resumed
+    """
     try:
-        while True:
-            # Receive message from client
-            data = await websocket.receive_text()
-            message = json.loads(data)
-            
-            user_request = message.get("content", "")
-            context = manager.get_context(websocket)
-            conversation_id = context["conversation_id"]
-            
-            # Add to conversation history
-            context["conversation_history"].append({
-                "role": "user",
-                "content": user_request
+        return await run
+    except QuotaExceeded as e:
+        await emit({
+            "role": "system",
+            "content": f"⏳ {e}. Please try again later.",
+            "agent": "System",
+            "resumable": True
+        })
+    except DeadlineExceeded as e:
+        logger.warning(f"Turn ran out of time: {e}")
+        await emit({
+            "role": "system",
+            "content": "⏱️ This request ran out of time. Completed stages are checkpointed; reconnect to resume.",
+            "agent": "System",
+            "resumable": True
+        })
+    await manager.flush_frames(websocket)
+    return None
+
+async def restore_conversation(websocket: WebSocket, emit, flush):
+    """Restore the last project of a reconnecting conversation, resuming an unfinished run"""
+    context = manager.get_context(websocket)
+    run = await workflow.store.alatest_run(context["conversation_id"])
+    if run is None:
+        return
+    
+    if run["status"] != "completed":
+        if run["status"] not in AUTO_RESUME_STATUSES:
+            # Cancelled by the user: resumed only on an explicit {"type": "resume"}
+            await emit({
+                "role": "system",
+                "content": "⏹️ Your last request was cancelled.",
+                "agent": "System",
+                "resumable": True
             })
-            
-            # Check if user is requesting code generation or modification
-            request_lower = user_request.lower()
-            needs_code = any(keyword in request_lower for keyword in [
-                'build', 'create', 'make', 'generate', 'code', 'app', 'component',
-                'website', 'page', 'feature', 'implement', 'develop', 'tạo', 'xây dựng',
-                'add', 'thêm', 'update', 'cập nhật', 'change', 'thay đổi', 'modify', 'sửa',
-                'improve', 'cải thiện', 'style', 'css', 'design', 'đẹp'
-            ])
-            
-            # Check if this is a follow-up request (has current files)
-            is_followup = len(context["current_files"]) > 0
-            
-            if not needs_code and not is_followup:
-                # Just respond conversationally
-                response = "Hello! I'm here to help you build web applications. You can ask me to create components, apps, or features. For example: 'Build a todo app' or 'Create a counter component'."
-                await manager.send_message({
-                    "role": "assistant",
-                    "content": response,
-                    "agent": "Analyst"
-                }, websocket)
-                context["conversation_history"].append({
-                    "role": "assistant",
-                    "content": response
-                })
-                continue
-            
-            # Send acknowledgment
+            return
+        if run["attempts"] >= WORKFLOW_MAX_RESUMES:
+            logger.warning(f"Run {run['run_id']} not resumed automatically after {run['attempts']} attempt(s)")
+            return
+        context["current_task"] = run["initial_state"].get("current_task", "")
+        final_state = await run_pipeline(websocket, workflow.resume(
+            run, emit=emit, flush=flush, cancel_reason=lambda: manager.cancel_reason(websocket)
+        ), emit)
+        if final_state is not None:
+            manager.update_context(websocket, current_files=final_state["files"])
+        return
+    
+    final_state = run["final_state"] or {}
+    context["current_task"] = run["initial_state"].get("current_task", "")
+    manager.update_context(websocket, current_files=final_state.get("files", {}))
+    await emit({
+        "role": "system",
+        "content": "Restored your last project.",
+        "agent": "System",
+        "files": final_state.get("files", {})
+    })
+
+@app.websocket("/ws")
+async def websocket_endpoint(websocket: WebSocket):
+    # Reconnecting clients pass their conversation id to resume where they left off
+    await manager.connect(websocket, websocket.query_params.get("conversation_id"))
+    
+    async def emit(message: Dict[str, Any]):
+        await manager.send_message(message, websocket)
+    
+    async def flush():
+        await manager.flush_notifications(websocket)
+    
+    # Requests wait here while the reader keeps watching the socket
+    inbox: asyncio.Queue = asyncio.Queue()
+    
+    async def read_messages():
+        """Handle acks and cancels as they arrive; queue requests, superseding a running turn"""
+        try:
+            while True:
+                message = json.loads(await websocket.receive_text())
+                
+                # File version acknowledgements for delta updates (?protocol=2)
+                if message.get("type") == "ack":
+                    try:
+                        version = int(message.get("files_version", 0))
+                    except (TypeError, ValueError):
+                        logger.debug(f"Ignored ack with invalid files_version {message.get('files_version')!r}")
+                        continue
+                    manager.channels[websocket].ack(version)
+                    continue
+                if message.get("type") == "resync":
+                    await manager.channels[websocket].resync()
+                    continue
+                if message.get("type") == "cancel":
+                    manager.cancel_turn(websocket, "client")
+                    continue
+                
+                # A new request replaces the one still running
+                manager.cancel_turn(websocket, "superseded")
+                inbox.put_nowait(message)
+        except WebSocketDisconnect:
+            # Nobody will see the result: stop the pipeline and its agent requests now
+            manager.cancel_turn(websocket, "disconnect")
+            raise
+        finally:
+            inbox.put_nowait(None)
+    
+    async def run_turn(coro):
+        """Run a turn as a task the reader can cancel"""
+        turn = asyncio.create_task(coro)
+        manager.turns[websocket] = turn
+        try:
+            await asyncio.wait({turn})
+        finally:
+            manager.turns.pop(websocket, None)
+            manager.cancel_reasons.pop(websocket, None)
+            if not turn.done():
+                turn.cancel()
+        
+        if turn.cancelled():
+            # Still connected: the user cancelled or sent a newer request
+            if not reader.done():
+                await emit({"role": "system", "content": "⏹️ Request cancelled.", "agent": "System"})
+                await manager.flush_frames(websocket)
+            return
+        # Errors end the connection as before
+        turn.result()
+    
+    async def handle_message(message: Dict[str, Any]):
+        context = manager.get_context(websocket)
+        conversation_id = context["conversation_id"]
+        
+        if message.get("type") == "resume":
+            run = await workflow.latest_unfinished(conversation_id)
+            if run is None:
+                await emit({"role": "system", "content": "Nothing to resume.", "agent": "System"})
+            else:
+                final_state = await run_pipeline(websocket, workflow.resume(
+                    run, emit=emit, flush=flush, cancel_reason=lambda: manager.cancel_reason(websocket)
+                ), emit)
+                if final_state is not None:
+                    manager.update_context(websocket, current_files=final_state["files"])
+            await manager.flush_frames(websocket)
+            return
+        
+        user_request = message.get("content", "")
+        
+        # Add to conversation history
+        context["conversation_history"].append({
+            "role": "user",
+            "content": user_request
+        })
+        
+        # Check if user is requesting code generation or modification
+        request_lower = user_request.lower()
+        needs_code = any(keyword in request_lower for keyword in [
+            'build', 'create', 'make', 'generate', 'code', 'app', 'component',
+            'website', 'page', 'feature', 'implement', 'develop', 'tạo', 'xây dựng',
+            'add', 'thêm', 'update', 'cập nhật', 'change', 'thay đổi', 'modify', 'sửa',
+            'improve', 'cải thiện', 'style', 'css', 'design', 'đẹp'
+        ])
+        
+        # Check if this is a follow-up request (has current files)
+        is_followup = len(context["current_files"]) > 0
+        
+        if not needs_code and not is_followup:
+            # Just respond conversationally
+            response = "Hello! I'm here to help you build web applications. You can ask me to create components, apps, or features. For example: 'Build a todo app' or 'Create a counter component'."
             await manager.send_message({
                 "role": "assistant",
-                "content": f"Analyzing your request: {user_request}",
+                "content": response,
                 "agent": "Analyst"
             }, websocket)
-            
-            # Build context for agents
-            if is_followup:
-                # This is a modification request
-                task_context = f"""Previous task: {context['current_task']}
+            context["conversation_history"].append({
+                "role": "assistant",
+                "content": response
+            })
+            return
+        
+        # Build context for agents
+        if is_followup:
+            # This is a modification request
+            files_json = await cpu_offloader.dumps(context['current_files'], indent=2)
+            task_context = f"""Previous task: {context['current_task']}
 Current code files:
-{json.dumps(context['current_files'], indent=2)}
+{files_json}
 
 New request: {user_request}
 
 Please modify the existing code to fulfill this new request."""
-            else:
-                # This is a new project
-                task_context = user_request
-                context["current_task"] = user_request
-            
-            # === HTTP-BASED A2A PROTOCOL COMMUNICATION ===
-            
-            logger.info(f"🔄 Orchestrator → Analyst: analyze_request")
-            
-            # 1. Orchestrator → Analyst (via HTTP)
-            analyst_request = Request(
-                from_agent="Orchestrator",
-                to_agent="Analyst",
-                action="analyze_request",
-                parameters={"user_request": task_context},
-                conversation_id=conversation_id
-            )
-            
-            analyst_url = agent_registry.get_url("Analyst")
-            analyst_response = await network_transport.send_message(analyst_request, analyst_url)
-            analyst_response_data = analyst_response
-            
-            await manager.send_message({
-                "role": "system",
-                "content": f"📨 A2A: Orchestrator → Analyst (HTTP)",
-                "agent": "System"
-            }, websocket)
-            
-            await manager.send_message({
-                "role": "assistant",
-                "content": analyst_response_data["message"],
-                "agent": "Analyst"
-            }, websocket)
-            
-            logger.info(f"🔄 Analyst → Developer: {('modify_code' if is_followup else 'generate_code')}")
-            
-            # 2. Orchestrator → Developer (via HTTP)
-            if is_followup:
-                dev_request = Request(
-                    from_agent="Orchestrator",
-                    to_agent="Developer",
-                    action="modify_code",
-                    parameters={
-                        "current_files": context["current_files"],
-                        "modification_request": user_request,
-                        "task_context": analyst_response_data["task"]
-                    },
-                    conversation_id=conversation_id
-                )
-                
-                await manager.send_message({
-                    "role": "assistant",
-                    "content": "Modifying code...",
-                    "agent": "Developer"
-                }, websocket)
-            else:
-                dev_request = Request(
-                    from_agent="Orchestrator",
-                    to_agent="Developer",
-                    action="generate_code",
-                    parameters={"task": analyst_response_data["task"]},
-                    conversation_id=conversation_id
-                )
-                
-                await manager.send_message({
-                    "role": "assistant",
-                    "content": "Starting code generation...",
-                    "agent": "Developer"
-                }, websocket)
-            
-            developer_url = agent_registry.get_url("Developer")
-            dev_response = await network_transport.send_message(dev_request, developer_url)
-            dev_response_data = dev_response
-            
-            await manager.send_message({
-                "role": "system",
-                "content": f"📨 A2A: Orchestrator → Developer (HTTP)",
-                "agent": "System"
-            }, websocket)
-            
-            # Update context with new files
-            manager.update_context(websocket, current_files=dev_response_data["files"])
-            
-            # Send code update to frontend
-            await manager.send_message({
-                "role": "assistant",
-                "content": "Code generated successfully! Check the preview panel." if not is_followup else "Code updated! Check the preview.",
-                "agent": "Developer",
-                "files": dev_response_data["files"]
-            }, websocket)
-            
-            logger.info(f"🔄 Developer → Tester: test_code")
-            
-            # 3. Orchestrator → Tester (via HTTP)
-            test_request = Request(
-                from_agent="Orchestrator",
-                to_agent="Tester",
-                action="test_code",
-                parameters={"files": dev_response_data["files"]},
-                conversation_id=conversation_id
-            )
-            
-            await manager.send_message({
-                "role": "assistant",
-                "content": "Running tests...",
-                "agent": "Tester"
-            }, websocket)
-            
-            tester_url = agent_registry.get_url("Tester")
-            test_response = await network_transport.send_message(test_request, tester_url)
-            test_response_data = test_response
-            
-            await manager.send_message({
-                "role": "system",
-                "content": f"📨 A2A: Orchestrator → Tester (HTTP)",
-                "agent": "System"
-            }, websocket)
-            
-            if test_response_data["status"] == "failed":
-                # Send back to developer for fixes
-                await manager.send_message({
-                    "role": "assistant",
-                    "content": f"Tests failed. Requesting fixes...",
-                    "agent": "Tester"
-                }, websocket)
-                
-                logger.info(f"🔄 Tester → Developer: fix_bug")
-                
-                fix_request = Request(
-                    from_agent="Orchestrator",
-                    to_agent="Developer",
-                    action="fix_bug",
-                    parameters={
-                        "files": dev_response_data["files"],
-                        "errors": test_response_data["errors"]
-                    },
-                    conversation_id=conversation_id
-                )
-                
-                fix_response = await network_transport.send_message(fix_request, developer_url)
-                fix_response_data = fix_response["result"]
-                
-                await manager.send_message({
-                    "role": "system",
-                    "content": f"📨 A2A: Orchestrator → Developer (fix_bug via HTTP)",
-                    "agent": "System"
-                }, websocket)
-                
-                # Update context
-                manager.update_context(websocket, current_files=fix_response_data["files"])
-                
-                # Send fixed code
-                await manager.send_message({
-                    "role": "assistant",
-                    "content": "Bug fixed! Re-running tests...",
-                    "agent": "Developer",
-                    "files": fix_response_data["files"]
-                }, websocket)
-                
-                # Re-test
-                retest_request = Request(
-                    from_agent="Orchestrator",
-                    to_agent="Tester",
-                    action="test_code",
-                    parameters={"files": fix_response_data["files"]},
-                    conversation_id=conversation_id
-                )
-                
-                retest_response = await network_transport.send_message(retest_request, tester_url)
-                test_response_data = retest_response["result"]
-            
-            await manager.send_message({
-                "role": "assistant",
-                "content": f"All tests passed! ✓ Your application is ready.",
-                "agent": "Tester"
-            }, websocket)
+        else:
+            # This is a new project
+            task_context = user_request
+            context["current_task"] = user_request
+        
+        # Analyze → develop → test/fix as a checkpointed workflow
+        final_state = await run_pipeline(websocket, workflow.start({
+            "conversation_id": conversation_id,
+            "user_request": user_request,
+            "task_context": task_context,
+            "current_task": context["current_task"],
+            "is_followup": is_followup,
+            "scaffold": message.get("scaffold"),
+            "current_files": context["current_files"]
+        }, emit=emit, flush=flush, cancel_reason=lambda: manager.cancel_reason(websocket)), emit)
+        if final_state is None:
+            return
+        
+        # Update context with new files
+        manager.update_context(websocket, current_files=final_state["files"])
+        await manager.flush_frames(websocket)
+    
+    reader = None
+    try:
+        context = manager.get_context(websocket)
+        # Everything logged for this connection carries its conversation id
+        bind_log_fields(conversation_id=context["conversation_id"])
+        # Agent requests of every turn count against this client's quota, whatever the conversation
+        current_user.set(context["client_id"])
+        await emit({"type": "session", "conversation_id": context["conversation_id"]})
+        
+        reader = asyncio.create_task(read_messages())
+        await run_turn(restore_conversation(websocket, emit, flush))
+        await manager.flush_frames(websocket)
+        
+        while True:
+            message = await inbox.get()
+            if message is None:
+                # Re-raises how the connection ended
+                await reader
+                break
+            await run_turn(handle_message(message))
             
     except WebSocketDisconnect:
         manager.disconnect(websocket)
@@ -359,11 +602,16 @@ Please modify the existing code to fulfill this new request."""
         logger.error(f"WebSocket error: {e}")
         await manager.send_message({
             "role": "system",
-            "content": f"Error: {str(e)}"
+            "content": f"Error: {str(e)}. Completed stages are checkpointed and resume on reconnect.",
+            "resumable": True
         }, websocket)
         manager.disconnect(websocket)
+    finally:
+        if reader is not None:
+            reader.cancel()
 
 if __name__ == "__main__":
     import uvicorn
     logger.info("Starting Main Orchestrator on port 8000")
-    uvicorn.run(app, host="0.0.0.0", port=8000)
+    # log_config=None: uvicorn's loggers go through the logging pipeline too
+    uvicorn.run(app, host="0.0.0.0", port=8000, ws_per_message_deflate=WS_PER_MESSAGE_DEFLATE, log_config=None)
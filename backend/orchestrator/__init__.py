@@ -0,0 +1 @@
+"""Orchestrator pipeline components"""
@@ -0,0 +1,168 @@
+"""
+Workflow Checkpoint Store
+
+SQLite store of pipeline runs and the output of every completed node, so a
+run interrupted by an error or a disconnect resumes from its last checkpoint
+instead of paying for finished LLM stages again.
+"""
+
+import asyncio
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, Any, Optional
+import logging
+
+logger = logging.getLogger(__name__)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    run_id TEXT PRIMARY KEY,
+    conversation_id TEXT NOT NULL,
+    status TEXT NOT NULL,
+    initial_state TEXT NOT NULL,
+    final_state TEXT,
+    error TEXT,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS runs_by_conversation ON runs (conversation_id, created_at);
+CREATE TABLE IF NOT EXISTS checkpoints (
+    run_id TEXT NOT NULL,
+    node TEXT NOT NULL,
+    output TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    PRIMARY KEY (run_id, node)
+);
+"""
+
+
+class CheckpointStore:
+    """Per-node checkpoints of pipeline runs in a local SQLite database"""
+
+    def __init__(self, path: str = ":memory:", max_runs_per_conversation: int = 20):
+        self.path = path
+        self.max_runs_per_conversation = max_runs_per_conversation
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            directory = os.path.dirname(self.path)
+            if directory and self.path != ":memory:":
+                os.makedirs(directory, exist_ok=True)
+            self._conn = sqlite3.connect(self.path, check_same_thread=False)
+            self._conn.row_factory = sqlite3.Row
+            self._conn.executescript(_SCHEMA)
+        return self._conn
+
+    def _execute(self, sql: str, params: tuple = ()) -> list:
+        with self._lock:
+            conn = self._connect()
+            with conn:
+                return conn.execute(sql, params).fetchall()
+
+    def create_run(self, run_id: str, conversation_id: str, state: Dict[str, Any]):
+        """Record a new run with the state it starts from"""
+        now = time.time()
+        self._execute(
+            "INSERT INTO runs (run_id, conversation_id, status, initial_state, created_at, updated_at) "
+            "VALUES (?, ?, 'running', ?, ?, ?)",
+            (run_id, conversation_id, json.dumps(state), now, now)
+        )
+        self._prune(conversation_id)
+
+    def save_node(self, run_id: str, node: str, output: Dict[str, Any]):
+        """Checkpoint the output of a completed node"""
+        now = time.time()
+        self._execute(
+            "INSERT OR REPLACE INTO checkpoints (run_id, node, output, created_at) VALUES (?, ?, ?, ?)",
+            (run_id, node, json.dumps(output), now)
+        )
+        self._execute("UPDATE runs SET updated_at = ? WHERE run_id = ?", (now, run_id))
+
+    def completed_nodes(self, run_id: str) -> Dict[str, Dict[str, Any]]:
+        """Outputs of the nodes a run has already completed"""
+        rows = self._execute("SELECT node, output FROM checkpoints WHERE run_id = ?", (run_id,))
+        return {row["node"]: json.loads(row["output"]) for row in rows}
+
+    def finish_run(self, run_id: str, status: str, final_state: Optional[Dict[str, Any]] = None,
+                   error: Optional[str] = None):
+        """Mark a run completed, failed, interrupted (disconnect) or cancelled (by the user)"""
+        self._execute(
+            "UPDATE runs SET status = ?, final_state = ?, error = ?, updated_at = ? WHERE run_id = ?",
+            (status, json.dumps(final_state) if final_state is not None else None, error, time.time(), run_id)
+        )
+
+    def mark_resumed(self, run_id: str):
+        """Count a resume attempt and mark the run running again"""
+        self._execute(
+            "UPDATE runs SET status = 'running', attempts = attempts + 1, updated_at = ? WHERE run_id = ?",
+            (time.time(), run_id)
+        )
+
+    def get_run(self, run_id: str) -> Optional[Dict[str, Any]]:
+        rows = self._execute("SELECT * FROM runs WHERE run_id = ?", (run_id,))
+        return self._row_to_run(rows[0]) if rows else None
+
+    def latest_run(self, conversation_id: str) -> Optional[Dict[str, Any]]:
+        """Most recent run of a conversation"""
+        rows = self._execute(
+            "SELECT * FROM runs WHERE conversation_id = ? ORDER BY created_at DESC LIMIT 1",
+            (conversation_id,)
+        )
+        return self._row_to_run(rows[0]) if rows else None
+
+    @staticmethod
+    def _row_to_run(row: sqlite3.Row) -> Dict[str, Any]:
+        return {
+            "run_id": row["run_id"],
+            "conversation_id": row["conversation_id"],
+            "status": row["status"],
+            "initial_state": json.loads(row["initial_state"]),
+            "final_state": json.loads(row["final_state"]) if row["final_state"] else None,
+            "error": row["error"],
+            "attempts": row["attempts"],
+            "created_at": row["created_at"],
+            "updated_at": row["updated_at"]
+        }
+
+    def _prune(self, conversation_id: str):
+        # Keep only the most recent runs of each conversation
+        stale = self._execute(
+            "SELECT run_id FROM runs WHERE conversation_id = ? ORDER BY created_at DESC LIMIT -1 OFFSET ?",
+            (conversation_id, self.max_runs_per_conversation)
+        )
+        for row in stale:
+            self._execute("DELETE FROM checkpoints WHERE run_id = ?", (row["run_id"],))
+            self._execute("DELETE FROM runs WHERE run_id = ?", (row["run_id"],))
+
+    # Async wrappers: SQLite calls run off the event loop
+
+    async def acreate_run(self, run_id: str, conversation_id: str, state: Dict[str, Any]):
+        await asyncio.to_thread(self.create_run, run_id, conversation_id, state)
+
+    async def asave_node(self, run_id: str, node: str, output: Dict[str, Any]):
+        await asyncio.to_thread(self.save_node, run_id, node, output)
+
+    async def acompleted_nodes(self, run_id: str) -> Dict[str, Dict[str, Any]]:
+        return await asyncio.to_thread(self.completed_nodes, run_id)
+
+    async def afinish_run(self, run_id: str, status: str, final_state: Optional[Dict[str, Any]] = None,
+                          error: Optional[str] = None):
+        await asyncio.to_thread(self.finish_run, run_id, status, final_state, error)
+
+    async def amark_resumed(self, run_id: str):
+        await asyncio.to_thread(self.mark_resumed, run_id)
+
+    async def alatest_run(self, conversation_id: str) -> Optional[Dict[str, Any]]:
+        return await asyncio.to_thread(self.latest_run, conversation_id)
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
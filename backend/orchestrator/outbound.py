@@ -0,0 +1,242 @@
+"""
+Outbound WebSocket Protocol
+
+Keeps browser traffic small. A turn emits many small status messages
+("📨 A2A" notices, agent progress, streamed text deltas), and each code
+update used to carry the whole project. Clients that opt in
+(`?protocol=2`) get:
+
+- status messages coalesced within a short window into one `batch` frame,
+  with consecutive text deltas of one stream merged
+- file updates as `files_delta` frames holding only the files that changed
+  since the last version the client acknowledged (`{"type": "ack"}`)
+
+Other clients get the original one-message-per-frame protocol. Compression
+is negotiated by the server (permessage-deflate) and recorded per connection.
+"""
+
+import asyncio
+from typing import Dict, Any, List, Optional
+import logging
+
+from runtime import cpu_offloader
+
+logger = logging.getLogger(__name__)
+
+# Protocol version a client asks for with ?protocol=2
+PROTOCOL_DELTAS = 2
+
+
+def is_status(message: Dict[str, Any]) -> bool:
+    """Messages that can wait for the coalescing window"""
+    if "files" in message:
+        return False
+    if message.get("delta") or "event" in message:
+        return True
+    return message.get("role") == "system" and message.get("agent") == "System"
+
+
+def files_delta(base: Dict[str, str], files: Dict[str, str]) -> Dict[str, Any]:
+    """Files added or changed, and paths removed, going from base to files"""
+    return {
+        "changed": {path: code for path, code in files.items() if base.get(path) != code},
+        "removed": [path for path in base if path not in files]
+    }
+
+
+class OutboundMetrics:
+    """Frame and byte counters across all connections"""
+
+    def __init__(self):
+        self.stats = {
+            "connections": 0,
+            "compressed_connections": 0,
+            "messages": 0,
+            "frames": 0,
+            "bytes": 0,
+            "batched_messages": 0,
+            "full_file_updates": 0,
+            "delta_file_updates": 0,
+            "file_bytes_saved": 0
+        }
+
+    def record(self, key: str, value: int = 1):
+        self.stats[key] += value
+
+    def get_metrics(self) -> Dict[str, Any]:
+        metrics = dict(self.stats)
+        frames = metrics["frames"]
+        metrics["messages_per_frame"] = round(metrics["messages"] / frames, 2) if frames else 0.0
+        metrics["bytes_per_frame"] = metrics["bytes"] // frames if frames else 0
+        return metrics
+
+
+class OutboundChannel:
+    """Per-connection sender that coalesces status frames and sends file deltas"""
+
+    def __init__(self, websocket, protocol: int = 1, compressed: bool = False,
+                 window: float = 0.05, max_batch: int = 50, max_snapshots: int = 8,
+                 metrics: Optional[OutboundMetrics] = None):
+        """
+        Args:
+            websocket: Accepted FastAPI WebSocket
+            protocol: Client protocol version; below 2 messages pass through unchanged
+            compressed: Whether permessage-deflate was negotiated
+            window: Seconds status messages wait for company before being sent
+            max_batch: Status messages that force a batch out early
+            max_snapshots: Unacknowledged file versions kept to diff against
+            metrics: Shared counters
+        """
+        self.websocket = websocket
+        self.protocol = protocol
+        self.compressed = compressed
+        self.window = window
+        self.max_batch = max_batch
+        self.max_snapshots = max_snapshots
+        self.metrics = metrics or outbound_metrics
+
+        self._pending: List[Dict[str, Any]] = []
+        self._timer: Optional[asyncio.TimerHandle] = None
+        # Flush started by the timer; the loop only keeps weak references to tasks
+        self._flush_task: Optional[asyncio.Task] = None
+        self._lock = asyncio.Lock()
+
+        # File versions sent but not yet acknowledged, and the acknowledged base
+        self._version = 0
+        self._snapshots: Dict[int, Dict[str, str]] = {}
+        self._acked: Optional[int] = None
+
+        self.metrics.record("connections")
+        if compressed:
+            self.metrics.record("compressed_connections")
+
+    @property
+    def supports_deltas(self) -> bool:
+        return self.protocol >= PROTOCOL_DELTAS
+
+    @property
+    def file_versions(self) -> Dict[int, Dict[str, str]]:
+        """File versions kept to compute deltas against"""
+        return self._snapshots
+
+    async def send(self, message: Dict[str, Any]):
+        """Send a message, holding status messages briefly to coalesce them"""
+        if not self.supports_deltas:
+            async with self._lock:
+                await self._write(message, count=1)
+            return
+
+        if is_status(message):
+            self._queue(message)
+            if len(self._pending) >= self.max_batch:
+                await self.flush()
+            elif self._timer is None:
+                self._timer = asyncio.get_running_loop().call_later(self.window, self._start_flush)
+            return
+
+        # Anything else goes out now, after the status messages queued before it
+        async with self._lock:
+            await self._flush_locked()
+            if "files" in message:
+                message = self._encode_files(message)
+            await self._write(message, count=1)
+
+    def _queue(self, message: Dict[str, Any]):
+        last = self._pending[-1] if self._pending else None
+        if (last is not None and message.get("delta") and last.get("delta")
+                and message.get("stream_id") == last.get("stream_id")):
+            last["content"] += message["content"]
+            self.metrics.record("batched_messages")
+            return
+        self._pending.append(dict(message))
+
+    async def flush(self):
+        """Send queued status messages now"""
+        async with self._lock:
+            await self._flush_locked()
+
+    def _start_flush(self):
+        self._flush_task = asyncio.ensure_future(self._flush_later())
+
+    async def _flush_later(self):
+        try:
+            await self.flush()
+        except Exception as e:
+            # The connection closed; the endpoint handles the disconnect
+            logger.debug(f"Dropped coalesced status messages: {e}")
+
+    async def _flush_locked(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        if not self._pending:
+            return
+        pending, self._pending = self._pending, []
+        if len(pending) == 1:
+            await self._write(pending[0], count=1)
+        else:
+            self.metrics.record("batched_messages", len(pending) - 1)
+            await self._write({"type": "batch", "messages": pending}, count=len(pending))
+
+    def _encode_files(self, message: Dict[str, Any]) -> Dict[str, Any]:
+        files = message["files"]
+        self._version += 1
+        self._snapshots[self._version] = dict(files)
+        # Clients that stop acknowledging keep getting deltas against their last ack
+        unacked = [v for v in self._snapshots if v != self._acked]
+        for old in unacked[:-self.max_snapshots]:
+            del self._snapshots[old]
+
+        base = self._snapshots.get(self._acked) if self._acked is not None else None
+        if base is None:
+            self.metrics.record("full_file_updates")
+            return {**message, "files_version": self._version}
+
+        delta = files_delta(base, files)
+        self.metrics.record("delta_file_updates")
+        self.metrics.record("file_bytes_saved", sum(
+            len(code) for path, code in files.items() if path not in delta["changed"]
+        ))
+        encoded = {key: value for key, value in message.items() if key != "files"}
+        encoded["files_delta"] = {"version": self._version, "base": self._acked, **delta}
+        return encoded
+
+    def ack(self, version: int):
+        """Client applied a file version; later deltas are computed against it"""
+        if version not in self._snapshots or (self._acked is not None and version <= self._acked):
+            return
+        self._acked = version
+        for old in [v for v in self._snapshots if v < version]:
+            del self._snapshots[old]
+
+    async def resync(self):
+        """Client lost track of its files; send the latest version whole"""
+        self._acked = None
+        if not self._snapshots:
+            return
+        latest = self._snapshots[self._version]
+        async with self._lock:
+            await self._flush_locked()
+            self.metrics.record("full_file_updates")
+            await self._write({"type": "files", "files": latest, "files_version": self._version}, count=1)
+
+    async def _write(self, message: Dict[str, Any], count: int):
+        text = await cpu_offloader.dumps(message)
+        await self.websocket.send_text(text)
+        self.metrics.record("messages", count)
+        self.metrics.record("frames")
+        self.metrics.record("bytes", len(text))
+
+    def close(self):
+        """Drop queued status messages of a closed connection"""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        if self._flush_task is not None and not self._flush_task.done():
+            self._flush_task.cancel()
+        self._pending = []
+        self._snapshots.clear()
+
+
+# Global instance
+outbound_metrics = OutboundMetrics()
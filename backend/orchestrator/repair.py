@@ -0,0 +1,200 @@
+"""
+Best-of-N Repair Engine
+
+Requests several candidate fixes from the Developer concurrently (at varied
+sampling temperatures), tests each as soon as it arrives, accepts the first
+one that passes and cancels the rest. Iterations and tokens are bounded.
+"""
+
+import asyncio
+import os
+from dataclasses import dataclass, field
+from typing import Dict, Any, List, Optional, Tuple
+from protocol import Request
+from protocol.deadline import remaining
+from agents.templates import template_registry
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+def _parse_temperatures(value: str) -> List[float]:
+    return [float(t) for t in value.split(",") if t.strip()]
+
+
+@dataclass
+class RepairResult:
+    """Outcome of a repair run"""
+    status: str  # passed | failed | not_verified | budget_exhausted | deadline_exceeded
+    files: Dict[str, str]
+    test_result: Dict[str, Any]
+    iterations: int = 0
+    candidates_tried: int = 0
+    tokens_used: int = 0
+    accepted_candidate: Optional[int] = None
+    history: List[Dict[str, Any]] = field(default_factory=list)
+
+    @property
+    def passed(self) -> bool:
+        return self.status == "passed"
+
+
+class RepairEngine:
+    """Parallel fix_bug candidates with bounded iterations and token budget"""
+
+    def __init__(self, transport, registry, candidates: int = 3, max_iterations: int = 2,
+                 token_budget: int = 60000, temperatures: Optional[List[float]] = None,
+                 min_iteration_seconds: float = 15.0):
+        self.transport = transport
+        self.registry = registry
+        self.candidates = max(1, candidates)
+        self.max_iterations = max(1, max_iterations)
+        self.token_budget = token_budget
+        self.temperatures = temperatures or [0.2, 0.6, 1.0]
+        # An iteration is not started with less of the turn's deadline left
+        self.min_iteration_seconds = min_iteration_seconds
+
+    @staticmethod
+    def _estimate_tokens(files: Dict[str, str], errors: List[str]) -> int:
+        # Prompt carries the module being fixed and the errors; the answer is that module again.
+        # Errors can point at any module of the project, so every module counts.
+        code_chars = sum(len(code) for path, code in files.items()
+                         if path.endswith((".js", ".jsx")) and path != "/index.js")
+        return (2 * code_chars + sum(len(e) for e in errors)) // 4 + 200
+
+    async def _attempt(self, files: Dict[str, str], errors: List[str], candidate: int,
+                       iteration: int, conversation_id: str) -> Tuple[int, Dict[str, str], Dict[str, Any], int]:
+        """Generate one candidate fix and test it"""
+        temperature = self.temperatures[candidate % len(self.temperatures)]
+
+        fix_request = Request(
+            from_agent="Orchestrator",
+            to_agent="Developer",
+            action="fix_bug",
+            parameters={
+                "files": files,
+                "errors": errors,
+                "temperature": temperature,
+                "candidate": candidate,
+                "iteration": iteration,
+                "accept_file_refs": True
+            },
+            conversation_id=conversation_id
+        )
+        fix_response = await self.transport.send_message(fix_request, self.registry.get_url("Developer"))
+        fixed_files = template_registry.expand(fix_response["files"], fix_response.get("file_refs"))
+        tokens = (fix_response.get("usage") or {}).get("total_tokens", 0)
+
+        test_request = Request(
+            from_agent="Orchestrator",
+            to_agent="Tester",
+            action="test_code",
+            parameters={"files": fixed_files},
+            conversation_id=conversation_id
+        )
+        test_result = await self.transport.send_message(test_request, self.registry.get_url("Tester"))
+
+        return candidate, fixed_files, test_result, tokens
+
+    async def repair(self, files: Dict[str, str], test_result: Dict[str, Any],
+                     conversation_id: str) -> RepairResult:
+        """
+        Repair failing code
+
+        Args:
+            files: Current project files
+            test_result: Failing Tester report for those files
+            conversation_id: Conversation the work belongs to
+
+        Returns:
+            RepairResult with the accepted files, or the best attempt
+        """
+        result = RepairResult(status="failed", files=files, test_result=test_result)
+        # Checks that ran out of time found no error to fix
+        if test_result.get("status") == "incomplete":
+            result.status = "not_verified"
+            return result
+
+        for iteration in range(self.max_iterations):
+            errors = result.test_result.get("errors", [])
+            tokens_left = self.token_budget - result.tokens_used
+            estimate = self._estimate_tokens(result.files, errors)
+            count = min(self.candidates, tokens_left // max(estimate, 1))
+            if count < 1:
+                result.status = "budget_exhausted"
+                break
+            time_left = remaining()
+            if time_left is not None and time_left < self.min_iteration_seconds:
+                logger.info(f"Repair stopped: {time_left:.1f}s of the turn's deadline left")
+                result.status = "deadline_exceeded"
+                break
+
+            result.iterations += 1
+            logger.info(f"Repair iteration {iteration + 1}: {count} candidate(s), {tokens_left} tokens left")
+
+            tasks = [
+                asyncio.create_task(self._attempt(result.files, errors, i, iteration, conversation_id))
+                for i in range(count)
+            ]
+            best = None
+            try:
+                pending = set(tasks)
+                while pending:
+                    done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                    for task in done:
+                        try:
+                            candidate, fixed_files, candidate_test, tokens = task.result()
+                        except Exception as e:
+                            logger.warning(f"Repair candidate failed: {e}")
+                            continue
+
+                        result.candidates_tried += 1
+                        result.tokens_used += tokens or self._estimate_tokens(result.files, errors)
+                        failures = len(candidate_test.get("errors", []))
+                        result.history.append({
+                            "iteration": iteration,
+                            "candidate": candidate,
+                            "status": candidate_test.get("status"),
+                            "errors": failures
+                        })
+
+                        if candidate_test.get("status") == "passed":
+                            result.status = "passed"
+                            result.files = fixed_files
+                            result.test_result = candidate_test
+                            result.accepted_candidate = candidate
+                            return result
+
+                        # An unfinished test run shows no improvement to build on
+                        if candidate_test.get("status") == "incomplete":
+                            continue
+                        if best is None or failures < len(best[1].get("errors", [])):
+                            best = (fixed_files, candidate_test)
+            finally:
+                # First passing candidate wins; the rest are abandoned
+                for task in tasks:
+                    if not task.done():
+                        task.cancel()
+
+            # Next iteration starts from the closest failing candidate
+            if best is not None and len(best[1].get("errors", [])) <= len(errors):
+                result.files, result.test_result = best
+
+            if result.tokens_used >= self.token_budget:
+                result.status = "budget_exhausted"
+                break
+
+        return result
+
+
+def repair_engine_from_env(transport, registry) -> RepairEngine:
+    """Build a RepairEngine configured from REPAIR_* environment variables"""
+    return RepairEngine(
+        transport,
+        registry,
+        candidates=int(os.getenv("REPAIR_CANDIDATES", "3")),
+        max_iterations=int(os.getenv("REPAIR_MAX_ITERATIONS", "2")),
+        token_budget=int(os.getenv("REPAIR_TOKEN_BUDGET", "60000")),
+        temperatures=_parse_temperatures(os.getenv("REPAIR_TEMPERATURES", "0.2,0.6,1.0")),
+        min_iteration_seconds=float(os.getenv("REPAIR_MIN_SECONDS", "15"))
+    )
@@ -0,0 +1,434 @@
+"""
+Pipeline Workflow
+
+The analyze → develop → (test ∥ publish) → fix → report pipeline as a
+LangGraph StateGraph. LLM stages checkpoint their output per node to a local
+store; a resumed run replays checkpointed nodes from the store instead of
+calling the agents again.
+"""
+
+import asyncio
+import os
+import uuid
+from dataclasses import dataclass, field
+from typing import Dict, Any, Awaitable, Callable, Optional
+from typing_extensions import TypedDict
+from protocol import Request
+from protocol.scheduler import current_priority
+from protocol.deadline import deadline_scope
+from agents.templates import template_registry
+from .checkpoints import CheckpointStore
+from .repair import RepairEngine
+import logging
+
+logger = logging.getLogger(__name__)
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# Next to the bundle cache, whatever directory the orchestrator is started from
+DEFAULT_CHECKPOINT_PATH = os.path.join(BACKEND_DIR, "cache", "workflow_checkpoints.sqlite3")
+
+# Stages whose output is checkpointed (the ones that cost LLM calls or tests)
+CHECKPOINTED_NODES = ("analyze", "develop", "test", "fix")
+
+# Runs a reconnect resumes by itself: cut off by a disconnect, a restart or an
+# error. Runs the user cancelled or replaced are only resumed when asked to.
+AUTO_RESUME_STATUSES = ("running", "interrupted", "failed")
+
+# Cancel reasons that mean the user no longer wants the run
+USER_CANCEL_REASONS = ("client", "superseded")
+
+
+class PipelineState(TypedDict, total=False):
+    run_id: str
+    conversation_id: str
+    user_request: str
+    task_context: str
+    current_task: str
+    is_followup: bool
+    scaffold: Optional[str]
+    current_files: Dict[str, str]
+    analysis: Dict[str, Any]
+    files: Dict[str, str]
+    test_result: Dict[str, Any]
+    published: bool
+    repair: Dict[str, Any]
+    status: str
+
+
+@dataclass
+class RunContext:
+    """Per-run objects that are not part of the persisted state"""
+    run_id: str
+    emit: Callable[[Dict[str, Any]], Awaitable[None]]
+    flush: Callable[[], Awaitable[None]]
+    completed: Dict[str, Dict[str, Any]]
+    # Requests started ahead of their node (Developer dispatched on the Analyst's spec)
+    inflight: Dict[str, asyncio.Task] = field(default_factory=dict)
+
+
+class PipelineWorkflow:
+    """Checkpointed, resumable orchestration pipeline"""
+
+    def __init__(self, transport, registry, repair_engine: RepairEngine, store: CheckpointStore,
+                 turn_deadline: Optional[float] = None):
+        self.transport = transport
+        self.registry = registry
+        self.repair_engine = repair_engine
+        self.store = store
+        # Seconds a run may take end to end, carried to every agent request
+        self.turn_deadline = turn_deadline
+        self._graph = None
+
+    def _hop(self, agent_name: str) -> str:
+        """How messages reach an agent, for status notices"""
+        return "in-process" if self.registry.is_local(agent_name) else "HTTP"
+
+    def _get_graph(self):
+        # LangGraph is imported on first use, like the other heavy clients
+        if self._graph is None:
+            self._graph = self._build_graph()
+        return self._graph
+
+    def _build_graph(self):
+        from langgraph.graph import StateGraph, START, END
+
+        builder = StateGraph(PipelineState)
+        builder.add_node("analyze", self._checkpointed("analyze", self._analyze))
+        builder.add_node("develop", self._checkpointed("develop", self._develop))
+        builder.add_node("test", self._checkpointed("test", self._test))
+        builder.add_node("publish", self._node(self._publish))
+        builder.add_node("review", self._node(self._review))
+        builder.add_node("fix", self._checkpointed("fix", self._fix))
+        builder.add_node("report", self._node(self._report))
+
+        builder.add_edge(START, "analyze")
+        builder.add_edge("analyze", "develop")
+        # Testing and showing the code to the user run in parallel
+        builder.add_edge("develop", "test")
+        builder.add_edge("develop", "publish")
+        builder.add_edge(["test", "publish"], "review")
+        builder.add_conditional_edges("review", self._route_review, {"fix": "fix", "report": "report"})
+        builder.add_edge("fix", "report")
+        builder.add_edge("report", END)
+        return builder.compile()
+
+    def _node(self, fn):
+        async def node(state: PipelineState, config) -> Dict[str, Any]:
+            return await fn(state, config["configurable"]["run_context"])
+        return node
+
+    def _checkpointed(self, name: str, fn):
+        """Wrap a node so its output is persisted and replayed on resume"""
+        async def node(state: PipelineState, config) -> Dict[str, Any]:
+            ctx: RunContext = config["configurable"]["run_context"]
+            if name in ctx.completed:
+                logger.info(f"Run {ctx.run_id}: reusing checkpoint for {name}")
+                return ctx.completed[name]
+            output = await fn(state, ctx)
+            await self.store.asave_node(ctx.run_id, name, output)
+            return output
+        return node
+
+    # --- Runs -----------------------------------------------------------------
+
+    async def start(self, state: PipelineState, emit, flush,
+                    cancel_reason: Optional[Callable[[], Optional[str]]] = None) -> PipelineState:
+        """
+        Run the pipeline for a new request
+
+        Args:
+            state: Initial state (conversation, request and current files)
+            emit: Coroutine sending a message to the user
+            flush: Coroutine delivering pending agent progress notifications
+            cancel_reason: Why the run was cancelled ("client", "superseded", "disconnect"),
+                asked when it is; decides whether a reconnect resumes it
+
+        Returns:
+            Final pipeline state
+        """
+        run_id = uuid.uuid4().hex
+        state = {**state, "run_id": run_id}
+        await self.store.acreate_run(run_id, state["conversation_id"], state)
+        return await self._execute(run_id, state, emit, flush, completed={}, cancel_reason=cancel_reason)
+
+    async def resume(self, run: Dict[str, Any], emit, flush,
+                     cancel_reason: Optional[Callable[[], Optional[str]]] = None) -> PipelineState:
+        """Resume an unfinished run from its last checkpoints"""
+        run_id = run["run_id"]
+        completed = await self.store.acompleted_nodes(run_id)
+        await self.store.amark_resumed(run_id)
+
+        reused = [node for node in CHECKPOINTED_NODES if node in completed]
+        await emit({
+            "role": "system",
+            "content": f"♻️ Resuming from checkpoint ({', '.join(reused) or 'no stages'} already done)",
+            "agent": "System"
+        })
+        return await self._execute(run_id, run["initial_state"], emit, flush, completed=completed,
+                                   cancel_reason=cancel_reason)
+
+    async def latest_unfinished(self, conversation_id: str) -> Optional[Dict[str, Any]]:
+        """Most recent run of a conversation if it did not complete"""
+        run = await self.store.alatest_run(conversation_id)
+        if run is None or run["status"] == "completed":
+            return None
+        return run
+
+    async def _execute(self, run_id: str, state: PipelineState, emit, flush,
+                       completed: Dict[str, Dict[str, Any]],
+                       cancel_reason: Optional[Callable[[], Optional[str]]] = None) -> PipelineState:
+        ctx = RunContext(run_id=run_id, emit=emit, flush=flush, completed=completed)
+        # Follow-up edits are interactive; every agent request of the run inherits the class
+        priority = current_priority.set("interactive" if state.get("is_followup") else "new_project")
+        try:
+            with deadline_scope(self.turn_deadline):
+                final = await self._get_graph().ainvoke(state, config={"configurable": {"run_context": ctx}})
+        except asyncio.CancelledError:
+            reason = cancel_reason() if cancel_reason is not None else None
+            status = "cancelled" if reason in USER_CANCEL_REASONS else "interrupted"
+            await self.store.afinish_run(run_id, status, error=reason)
+            raise
+        except Exception as e:
+            await self.store.afinish_run(run_id, "failed", error=str(e))
+            raise
+        finally:
+            current_priority.reset(priority)
+            for task in ctx.inflight.values():
+                task.cancel()
+
+        await self.store.afinish_run(run_id, "completed", final_state=dict(final))
+        return final
+
+    # --- Nodes ----------------------------------------------------------------
+
+    def _developer_request(self, state: PipelineState, task: str) -> Request:
+        """Orchestrator → Developer request for the Analyst's task"""
+        if state.get("is_followup"):
+            return Request(
+                from_agent="Orchestrator",
+                to_agent="Developer",
+                action="modify_code",
+                parameters={
+                    "current_files": state["current_files"],
+                    "modification_request": state["user_request"],
+                    "task_context": task,
+                    "accept_file_refs": True
+                },
+                conversation_id=state["conversation_id"]
+            )
+        return Request(
+            from_agent="Orchestrator",
+            to_agent="Developer",
+            action="generate_code",
+            parameters={
+                "task": task,
+                "user_request": state["user_request"],
+                "scaffold": state.get("scaffold"),
+                "accept_file_refs": True
+            },
+            conversation_id=state["conversation_id"]
+        )
+
+    def _dispatch_developer(self, state: PipelineState, ctx: RunContext, task: str):
+        action = "modify_code" if state.get("is_followup") else "generate_code"
+        logger.info(f"🔄 Analyst → Developer: {action}")
+        ctx.inflight["develop"] = asyncio.create_task(
+            self.transport.send_message(self._developer_request(state, task), self.registry.get_url("Developer"))
+        )
+
+    async def _analyze(self, state: PipelineState, ctx: RunContext) -> Dict[str, Any]:
+        await ctx.emit({
+            "role": "assistant",
+            "content": f"Analyzing your request: {state['user_request']}",
+            "agent": "Analyst"
+        })
+
+        logger.info(f"🔄 Orchestrator → Analyst: analyze_request")
+
+        analyst_request = Request(
+            from_agent="Orchestrator",
+            to_agent="Analyst",
+            action="analyze_request",
+            parameters={"user_request": state["task_context"]},
+            conversation_id=state["conversation_id"]
+        )
+
+        # The explanation streams to the UI while the Developer already works on the spec
+        stream_id = f"analyst-{uuid.uuid4().hex[:12]}"
+        analysis = None
+
+        async for event in self.transport.stream_message(analyst_request, self.registry.get_url("Analyst")):
+            kind = event.get("event")
+            if kind == "task" and "develop" not in ctx.inflight:
+                self._dispatch_developer(state, ctx, event["task"])
+            elif kind == "explanation":
+                await ctx.emit({
+                    "role": "assistant",
+                    "content": event["text"],
+                    "agent": "Analyst",
+                    "stream_id": stream_id,
+                    "delta": True
+                })
+            elif kind == "result":
+                analysis = event["result"]
+        await ctx.flush()
+
+        if analysis is None or "task" not in analysis:
+            raise RuntimeError((analysis or {}).get("error", "Analyst returned no task"))
+
+        await ctx.emit({
+            "role": "system",
+            "content": f"📨 A2A: Orchestrator → Analyst ({self._hop('Analyst')}, streamed)",
+            "agent": "System"
+        })
+
+        # Final text replaces the streamed deltas
+        await ctx.emit({
+            "role": "assistant",
+            "content": analysis["message"],
+            "agent": "Analyst",
+            "stream_id": stream_id
+        })
+
+        return {"analysis": analysis}
+
+    async def _develop(self, state: PipelineState, ctx: RunContext) -> Dict[str, Any]:
+        if "develop" not in ctx.inflight:
+            self._dispatch_developer(state, ctx, state["analysis"]["task"])
+        response = await ctx.inflight.pop("develop")
+        await ctx.flush()
+
+        if "files" not in response:
+            raise RuntimeError(response.get("error", "Developer returned no files"))
+
+        await ctx.emit({
+            "role": "system",
+            "content": f"📨 A2A: Orchestrator → Developer ({self._hop('Developer')})",
+            "agent": "System"
+        })
+
+        # Static scaffold files arrive by reference
+        return {"files": template_registry.expand(response["files"], response.get("file_refs"))}
+
+    async def _test(self, state: PipelineState, ctx: RunContext) -> Dict[str, Any]:
+        logger.info(f"🔄 Developer → Tester: test_code")
+
+        test_request = Request(
+            from_agent="Orchestrator",
+            to_agent="Tester",
+            action="test_code",
+            parameters={"files": state["files"]},
+            conversation_id=state["conversation_id"]
+        )
+        test_result = await self.transport.send_message(test_request, self.registry.get_url("Tester"))
+        await ctx.flush()
+
+        await ctx.emit({
+            "role": "system",
+            "content": f"📨 A2A: Orchestrator → Tester ({self._hop('Tester')})",
+            "agent": "System"
+        })
+
+        bundle = test_result.get("bundle")
+        if bundle:
+            await ctx.emit({
+                "role": "system",
+                "content": f"📦 Bundled preview: {bundle['preview_path']}",
+                "agent": "System",
+                "preview_path": bundle["preview_path"]
+            })
+        return {"test_result": test_result}
+
+    async def _publish(self, state: PipelineState, ctx: RunContext) -> Dict[str, Any]:
+        await ctx.emit({
+            "role": "assistant",
+            "content": "Code updated! Check the preview." if state.get("is_followup")
+            else "Code generated successfully! Check the preview panel.",
+            "agent": "Developer",
+            "files": state["files"]
+        })
+        return {"published": True}
+
+    async def _review(self, state: PipelineState, ctx: RunContext) -> Dict[str, Any]:
+        if state["test_result"].get("status") == "failed":
+            await ctx.emit({
+                "role": "assistant",
+                "content": "Tests failed. Requesting fixes...",
+                "agent": "Tester"
+            })
+        return {}
+
+    @staticmethod
+    def _route_review(state: PipelineState) -> str:
+        return "fix" if state["test_result"].get("status") == "failed" else "report"
+
+    async def _fix(self, state: PipelineState, ctx: RunContext) -> Dict[str, Any]:
+        logger.info(f"🔄 Tester → Developer: fix_bug x{self.repair_engine.candidates}")
+
+        repair = await self.repair_engine.repair(state["files"], state["test_result"], state["conversation_id"])
+        await ctx.flush()
+
+        await ctx.emit({
+            "role": "system",
+            "content": (
+                f"📨 A2A: Orchestrator → Developer/Tester (repair via {self._hop('Developer')}: "
+                f"{repair.candidates_tried} candidate(s), {repair.iterations} iteration(s), "
+                f"~{repair.tokens_used} tokens)"
+            ),
+            "agent": "System"
+        })
+
+        if repair.files != state["files"]:
+            # Send fixed code
+            await ctx.emit({
+                "role": "assistant",
+                "content": "Bug fixed!" if repair.passed else "Partially fixed, some issues remain.",
+                "agent": "Developer",
+                "files": repair.files
+            })
+
+        return {
+            "files": repair.files,
+            "test_result": repair.test_result,
+            "repair": {
+                "status": repair.status,
+                "iterations": repair.iterations,
+                "candidates_tried": repair.candidates_tried,
+                "tokens_used": repair.tokens_used,
+                "accepted_candidate": repair.accepted_candidate
+            }
+        }
+
+    async def _report(self, state: PipelineState, ctx: RunContext) -> Dict[str, Any]:
+        test_result = state["test_result"]
+        if test_result.get("status") == "passed":
+            await ctx.emit({
+                "role": "assistant",
+                "content": f"All tests passed! ✓ Your application is ready.",
+                "agent": "Tester"
+            })
+        elif test_result.get("status") == "incomplete":
+            await ctx.emit({
+                "role": "assistant",
+                "content": "Tests could not finish in time, so the code is not verified. No errors were found.",
+                "agent": "Tester"
+            })
+        else:
+            remaining = "\n".join(f"- {error}" for error in test_result.get("errors", []))
+            await ctx.emit({
+                "role": "assistant",
+                "content": f"Some tests are still failing:\n{remaining}",
+                "agent": "Tester"
+            })
+        return {"status": test_result.get("status", "unknown")}
+
+
+def workflow_from_env(transport, registry, repair_engine: RepairEngine) -> PipelineWorkflow:
+    """Build the pipeline with a checkpoint store and turn deadline configured from the environment"""
+    store = CheckpointStore(
+        # Relative paths are taken from the backend directory, like the default
+        path=os.path.join(BACKEND_DIR, os.getenv("WORKFLOW_CHECKPOINT_PATH", DEFAULT_CHECKPOINT_PATH)),
+        max_runs_per_conversation=int(os.getenv("WORKFLOW_MAX_RUNS", "20"))
+    )
+    turn_deadline = float(os.getenv("TURN_DEADLINE", "180"))
+    return PipelineWorkflow(transport, registry, repair_engine, store, turn_deadline=turn_deadline or None)
@@ -0,0 +1,277 @@
+"""
+Message Bus for A2A Notifications
+
+Publish/subscribe delivery of `Notification` messages. Publishing never blocks
+the request/response path: messages are queued and handed to subscribers in
+micro-batches. The broker backend is pluggable - the default delivers inside
+the process on asyncio queues, agent services running in their own process
+forward to the orchestrator over HTTP.
+"""
+
+import asyncio
+from typing import Dict, Any, List, Optional, Callable, Awaitable
+from .protocol import Message
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Topic that receives every message regardless of conversation
+ALL_TOPICS = "*"
+
+# Header carrying the shared AGENT_TOKEN on notifications forwarded by agent services
+AGENT_TOKEN_HEADER = "X-Agent-Token"
+
+BatchHandler = Callable[[List[Message]], Awaitable[None]]
+
+
+def topic_for(message: Message) -> str:
+    """Messages are routed by conversation"""
+    return message.metadata.get("conversation_id") or ALL_TOPICS
+
+
+class Subscription:
+    """Subscriber queue delivering messages to a handler in micro-batches"""
+
+    def __init__(self, handler: BatchHandler, topic: str = ALL_TOPICS,
+                 max_batch: int = 20, max_delay: float = 0.05, max_queue: int = 1000):
+        self.handler = handler
+        self.topic = topic
+        self.max_batch = max_batch
+        self.max_delay = max_delay
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=max_queue)
+        self.dropped = 0
+        self.delivered = 0
+        self._loop = asyncio.get_running_loop()
+        self._task = self._loop.create_task(self._run())
+
+    def offer(self, message: Message):
+        """Queue a message without blocking (safe from other threads)"""
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+
+        if running is self._loop:
+            self._offer(message)
+        else:
+            self._loop.call_soon_threadsafe(self._offer, message)
+
+    def _offer(self, message: Message):
+        try:
+            self.queue.put_nowait(message)
+        except asyncio.QueueFull:
+            self.dropped += 1
+
+    async def _run(self):
+        while True:
+            batch = [await self.queue.get()]
+
+            # Give the publisher a short window to add more before delivering
+            if self.max_delay > 0:
+                await asyncio.sleep(self.max_delay)
+            while len(batch) < self.max_batch and not self.queue.empty():
+                batch.append(self.queue.get_nowait())
+
+            try:
+                await self.handler(batch)
+                self.delivered += len(batch)
+            except Exception as e:
+                logger.error(f"Notification handler failed for topic {self.topic}: {e}")
+            finally:
+                for _ in batch:
+                    self.queue.task_done()
+
+    async def flush(self):
+        """Wait until every queued message has been handled"""
+        if not self._task.done():
+            await self.queue.join()
+
+    def close(self):
+        """Stop delivering"""
+        self._task.cancel()
+
+
+class BrokerBackend:
+    """Interface for message bus brokers"""
+
+    def publish(self, topic: str, message: Message):
+        raise NotImplementedError
+
+    def add_subscription(self, subscription: Subscription):
+        raise NotImplementedError
+
+    def remove_subscription(self, subscription: Subscription):
+        raise NotImplementedError
+
+    async def flush(self):
+        """Wait for published messages to be delivered"""
+
+    async def close(self):
+        """Release broker resources"""
+
+
+class AsyncioBroker(BrokerBackend):
+    """In-process broker on asyncio queues"""
+
+    def __init__(self):
+        self.subscriptions: Dict[str, List[Subscription]] = {}
+
+    def publish(self, topic: str, message: Message):
+        targets = self.subscriptions.get(topic, [])
+        if topic != ALL_TOPICS:
+            targets = targets + self.subscriptions.get(ALL_TOPICS, [])
+        for subscription in targets:
+            subscription.offer(message)
+
+    def add_subscription(self, subscription: Subscription):
+        self.subscriptions.setdefault(subscription.topic, []).append(subscription)
+
+    def remove_subscription(self, subscription: Subscription):
+        subscribers = self.subscriptions.get(subscription.topic, [])
+        if subscription in subscribers:
+            subscribers.remove(subscription)
+        if not subscribers:
+            self.subscriptions.pop(subscription.topic, None)
+
+    async def flush(self):
+        for subscribers in list(self.subscriptions.values()):
+            for subscription in list(subscribers):
+                await subscription.flush()
+
+
+class HttpForwardBroker(BrokerBackend):
+    """Broker for agent services: batches messages and POSTs them to the orchestrator"""
+
+    def __init__(self, url: str, token: str = "", max_batch: int = 50, max_delay: float = 0.05,
+                 max_pending: int = 1000, timeout: float = 5.0):
+        """
+        Args:
+            url: Orchestrator notifications endpoint
+            token: Shared agent token the orchestrator requires (AGENT_TOKEN)
+        """
+        import httpx
+
+        self.url = url
+        self.max_batch = max_batch
+        self.max_delay = max_delay
+        self.max_pending = max_pending
+        self.client = httpx.AsyncClient(timeout=timeout, headers={AGENT_TOKEN_HEADER: token} if token else None)
+        self.pending: List[Dict[str, Any]] = []
+        self.dropped = 0
+        self._flusher: Optional[asyncio.Task] = None
+        # Whether the delayed flush has taken a batch off pending and is posting it
+        self._sending = False
+
+    def publish(self, topic: str, message: Message):
+        if len(self.pending) >= self.max_pending:
+            self.dropped += 1
+            return
+        self.pending.append(message.to_dict())
+        if self._flusher is None or self._flusher.done():
+            self._flusher = asyncio.get_running_loop().create_task(self._flush_after_delay())
+
+    async def _flush_after_delay(self):
+        await asyncio.sleep(self.max_delay)
+        self._sending = True
+        try:
+            await self._send_pending()
+        finally:
+            self._sending = False
+
+    async def _send_pending(self):
+        while self.pending:
+            batch, self.pending = self.pending[:self.max_batch], self.pending[self.max_batch:]
+            try:
+                await self.client.post(self.url, json=batch)
+            except Exception as e:
+                logger.warning(f"Dropped {len(batch)} notifications, forwarding to {self.url} failed: {e}")
+
+    def add_subscription(self, subscription: Subscription):
+        raise NotImplementedError("Subscribe on the orchestrator; agent services only publish")
+
+    def remove_subscription(self, subscription: Subscription):
+        pass
+
+    async def flush(self):
+        flusher = self._flusher
+        if flusher is not None and not flusher.done():
+            if self._sending:
+                # Cancelling would lose the batch it already took off pending
+                await asyncio.shield(flusher)
+            else:
+                flusher.cancel()
+        await self._send_pending()
+
+    async def close(self):
+        await self.flush()
+        await self.client.aclose()
+
+
+class MessageBus:
+    """Pub/sub bus for notifications with a pluggable broker"""
+
+    def __init__(self, backend: Optional[BrokerBackend] = None):
+        self.backend = backend or AsyncioBroker()
+        self.published = 0
+        self.flush_timeouts = 0
+        # Flushes still delivering after their caller stopped waiting
+        self._flushes: set = set()
+
+    def set_backend(self, backend: BrokerBackend):
+        """Swap the broker backend"""
+        self.backend = backend
+
+    def publish(self, message: Message):
+        """Publish without waiting for delivery"""
+        self.published += 1
+        try:
+            self.backend.publish(topic_for(message), message)
+        except Exception as e:
+            logger.error(f"Failed to publish {message.type} {message.message_id}: {e}")
+
+    def subscribe(self, handler: BatchHandler, topic: str = ALL_TOPICS,
+                  max_batch: int = 20, max_delay: float = 0.05) -> Subscription:
+        """
+        Subscribe to a topic
+
+        Args:
+            handler: Async callable receiving a list of messages
+            topic: Conversation id, or ALL_TOPICS for everything
+            max_batch: Largest batch handed to the handler
+            max_delay: How long to collect a batch after the first message
+
+        Returns:
+            Subscription, pass to `unsubscribe` when done
+        """
+        subscription = Subscription(handler, topic, max_batch, max_delay)
+        self.backend.add_subscription(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        """Remove a subscription and stop its delivery task"""
+        self.backend.remove_subscription(subscription)
+        subscription.close()
+
+    async def flush(self, timeout: Optional[float] = None):
+        """
+        Wait for published messages to be delivered
+
+        Args:
+            timeout: Wait at most this many seconds; delivery then carries on in the background
+        """
+        if timeout is None:
+            await self.backend.flush()
+            return
+
+        task = asyncio.ensure_future(self.backend.flush())
+        self._flushes.add(task)
+        task.add_done_callback(self._flushes.discard)
+        try:
+            await asyncio.wait_for(asyncio.shield(task), timeout)
+        except asyncio.TimeoutError:
+            self.flush_timeouts += 1
+            logger.debug(f"Notification flush still running after {timeout}s, not waiting for it")
+
+
+# Global instance
+message_bus = MessageBus()
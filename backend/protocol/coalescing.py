@@ -0,0 +1,144 @@
+"""
+Single-Flight Request Coalescing
+
+Concurrent identical requests (same target, action and normalized parameters,
+within one conversation) share one in-flight execution and its result instead of each paying for
+their own LLM calls. The execution does not inherit the deadline or priority
+of the caller that happened to start it: each waiter is bounded by its own
+deadline, and the execution is cancelled when its last waiter gives up.
+"""
+
+import asyncio
+import contextvars
+import hashlib
+import json
+import os
+from typing import Dict, Any, Callable, Awaitable, Optional
+from .deadline import bounded, clear_deadline
+from .scheduler import current_priority
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Actions eligible for coalescing unless overridden with COALESCE_ACTIONS. Code
+# generation is sampled (temperature 0.7+), so sharing one answer between two
+# requests is opt-in: COALESCE_ACTIONS=analyze_request,test_code,generate_code
+DEFAULT_COALESCE_ACTIONS = {
+    "analyze_request": True,
+    "test_code": True
+}
+
+
+def load_coalesce_policy(env_var: str = "COALESCE_ACTIONS") -> Dict[str, bool]:
+    """
+    Read per-action eligibility from the environment
+
+    COALESCE_ACTIONS=analyze_request,test_code limits coalescing to those
+    actions; COALESCE_ACTIONS=none disables it. Unset keeps the defaults.
+    """
+    value = os.getenv(env_var)
+    if value is None:
+        return dict(DEFAULT_COALESCE_ACTIONS)
+    actions = [a.strip() for a in value.split(",") if a.strip() and a.strip() != "none"]
+    return {action: True for action in actions}
+
+
+def _normalize(value: Any) -> Any:
+    if isinstance(value, str):
+        return value.strip()
+    if isinstance(value, dict):
+        return {str(k): _normalize(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_normalize(v) for v in value]
+    return value
+
+
+def request_key(target: str, action: str, parameters: Dict[str, Any], scope: Optional[str] = None) -> str:
+    """
+    Key identifying requests that can share one execution
+
+    Args:
+        target: Agent the request goes to
+        action: Requested action
+        parameters: Action parameters (normalized before hashing)
+        scope: Conversation the result and its progress notifications belong to
+    """
+    canonical = json.dumps(_normalize(parameters), sort_keys=True, separators=(",", ":"), default=str)
+    digest = hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+    return f"{target}|{action}|{scope or ''}|{digest}"
+
+
+def _shared_context() -> contextvars.Context:
+    """The caller's context without its request-scoped deadline and priority"""
+    context = contextvars.copy_context()
+    context.run(clear_deadline)
+    context.run(current_priority.set, None)
+    return context
+
+
+class SingleFlight:
+    """Deduplicates concurrent executions by key"""
+
+    def __init__(self):
+        self.in_flight: Dict[str, asyncio.Task] = {}
+        self.waiters: Dict[str, int] = {}
+        self.metrics: Dict[str, Dict[str, int]] = {}
+
+    def _count(self, label: str, field: str):
+        counters = self.metrics.setdefault(label, {"executed": 0, "coalesced": 0, "abandoned": 0})
+        counters[field] += 1
+
+    async def do(self, key: str, factory: Callable[[], Awaitable[Any]], label: str = "default") -> Any:
+        """
+        Run `factory()` once per key among concurrent callers
+
+        Args:
+            key: Identity of the work
+            factory: Creates the coroutine to run when no identical work is in flight
+            label: Metrics bucket (usually the action)
+
+        Returns:
+            Result of the shared execution
+        """
+        task = self.in_flight.get(key)
+        if task is not None:
+            self._count(label, "coalesced")
+            logger.debug(f"Coalesced {label} onto in-flight request")
+        else:
+            self._count(label, "executed")
+            task = asyncio.get_running_loop().create_task(factory(), context=_shared_context())
+            self.in_flight[key] = task
+            task.add_done_callback(lambda t: self._finished(key, t))
+
+        # A caller that is cancelled or runs out of time must not stop the work others wait on
+        self.waiters[key] = self.waiters.get(key, 0) + 1
+        try:
+            return await bounded(asyncio.shield(task), label)
+        finally:
+            self.waiters[key] -= 1
+            if not self.waiters[key]:
+                del self.waiters[key]
+                # ...but work nobody waits for any more is stopped
+                if not task.done():
+                    task.cancel()
+                    self._count(label, "abandoned")
+                    if self.in_flight.get(key) is task:
+                        del self.in_flight[key]
+
+    def _finished(self, key: str, task: asyncio.Task):
+        if self.in_flight.get(key) is task:
+            del self.in_flight[key]
+        if not task.cancelled() and task.exception() is not None:
+            logger.debug(f"Shared request failed: {task.exception()}")
+
+    def get_metrics(self) -> Dict[str, Any]:
+        """Executed vs coalesced request counts per label"""
+        executed = sum(c["executed"] for c in self.metrics.values())
+        coalesced = sum(c["coalesced"] for c in self.metrics.values())
+        return {
+            "executed": executed,
+            "coalesced": coalesced,
+            "abandoned": sum(c["abandoned"] for c in self.metrics.values()),
+            "in_flight": len(self.in_flight),
+            "by_action": {label: dict(c) for label, c in self.metrics.items()}
+        }
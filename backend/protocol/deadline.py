@@ -0,0 +1,141 @@
+"""
+End-to-End Deadlines
+
+A user turn gets one time budget (TURN_DEADLINE). The remaining budget is
+kept in a context variable, so every task started for the turn sees it, and
+travels between agents as `metadata.deadline_ms`: the milliseconds left when
+the message was sent, minus a per-hop margin. Each receiver starts its own
+clock from that value, so clocks never need to agree across machines.
+
+Work checks the budget before starting (`check`) and bounds what it awaits by
+it (`bounded`, `bounded_stream`). Without a deadline everything is unbounded,
+as before.
+"""
+
+import asyncio
+import contextvars
+import os
+import time
+from contextlib import contextmanager
+from typing import Any, AsyncIterator, Awaitable, Dict, Optional, TypeVar
+
+T = TypeVar("T")
+
+DEADLINE_METADATA_KEY = "deadline_ms"
+
+# Kept back at each hop for the reply to travel back
+HOP_MARGIN = float(os.getenv("DEADLINE_HOP_MARGIN_MS", "50")) / 1000
+
+# Absolute time.monotonic() deadline of the current work, or None
+_deadline: contextvars.ContextVar[Optional[float]] = contextvars.ContextVar("deadline", default=None)
+
+
+class DeadlineExceeded(TimeoutError):
+    """The turn's time budget ran out"""
+
+
+def remaining() -> Optional[float]:
+    """Seconds left for the current work, or None without a deadline"""
+    deadline = _deadline.get()
+    return None if deadline is None else deadline - time.monotonic()
+
+
+def set_deadline(seconds: Optional[float]) -> contextvars.Token:
+    """Bound the current task (and tasks it starts) to seconds from now, never extending a deadline"""
+    deadline = _deadline.get()
+    if seconds is not None:
+        candidate = time.monotonic() + seconds
+        deadline = candidate if deadline is None else min(deadline, candidate)
+    return _deadline.set(deadline)
+
+
+def clear_deadline() -> contextvars.Token:
+    """Drop the current context's deadline (for work that outlives the caller that started it)"""
+    return _deadline.set(None)
+
+
+@contextmanager
+def deadline_scope(seconds: Optional[float]):
+    """Bound the work inside the block; None keeps the current deadline"""
+    token = set_deadline(seconds)
+    try:
+        yield
+    finally:
+        _deadline.reset(token)
+
+
+def check(what: str = "work", minimum: float = 0.0):
+    """Raise DeadlineExceeded unless at least `minimum` seconds are left"""
+    left = remaining()
+    if left is not None and left <= minimum:
+        raise DeadlineExceeded(f"Deadline exceeded before {what} ({max(left, 0) * 1000:.0f}ms left)")
+
+
+def stamp(metadata: Dict[str, Any]) -> Dict[str, Any]:
+    """Metadata carrying the remaining budget to the next hop"""
+    left = remaining()
+    if left is None:
+        return metadata
+    return {**metadata, DEADLINE_METADATA_KEY: max(0, int((left - HOP_MARGIN) * 1000))}
+
+
+def from_metadata(metadata: Optional[Dict[str, Any]]) -> Optional[float]:
+    """Seconds of budget a received message carries, or None"""
+    value = (metadata or {}).get(DEADLINE_METADATA_KEY)
+    try:
+        return None if value is None else float(value) / 1000
+    except (TypeError, ValueError):
+        return None
+
+
+def timeout_for(default: Optional[float]) -> Optional[float]:
+    """A per-operation timeout shortened to the remaining budget"""
+    left = remaining()
+    if left is None:
+        return default
+    return max(0.0, left) if default is None else max(0.0, min(default, left))
+
+
+async def bounded(awaitable: Awaitable[T], what: str = "work") -> T:
+    """Await within the remaining budget"""
+    left = remaining()
+    if left is None:
+        return await awaitable
+    if left <= 0:
+        # Close the coroutine (or cancel the future) instead of leaving it never awaited
+        close = getattr(awaitable, "close", None) or getattr(awaitable, "cancel", None)
+        if close is not None:
+            close()
+        raise DeadlineExceeded(f"Deadline exceeded before {what}")
+    try:
+        return await asyncio.wait_for(awaitable, left)
+    except asyncio.TimeoutError:
+        raise DeadlineExceeded(f"Deadline exceeded during {what}")
+
+
+async def bounded_stream(stream: AsyncIterator[T], what: str = "stream",
+                         seconds: Optional[float] = None) -> AsyncIterator[T]:
+    """Iterate within the remaining budget (or `seconds` from now)"""
+    deadline = _deadline.get() if seconds is None else time.monotonic() + seconds
+    if deadline is None:
+        async for item in stream:
+            yield item
+        return
+
+    iterator = stream.__aiter__()
+    try:
+        while True:
+            left = deadline - time.monotonic()
+            if left <= 0:
+                raise DeadlineExceeded(f"Deadline exceeded during {what}")
+            try:
+                item = await asyncio.wait_for(iterator.__anext__(), left)
+            except StopAsyncIteration:
+                return
+            except asyncio.TimeoutError:
+                raise DeadlineExceeded(f"Deadline exceeded during {what}")
+            yield item
+    finally:
+        close = getattr(iterator, "aclose", None)
+        if close is not None:
+            await close()
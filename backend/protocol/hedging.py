@@ -0,0 +1,230 @@
+"""
+Hedged Requests
+
+For idempotent actions, a request that has not answered by a high percentile
+of recent latency for its agent and action gets a duplicate. The duplicate
+goes to another replica of the agent when one is configured, otherwise to
+the same agent over a fresh connection. The first successful reply wins and
+the other attempt is cancelled.
+
+Extra load is capped by a budget: every request earns a fraction of a hedge
+(HEDGE_BUDGET, e.g. 0.1 allows about 10% more requests), and a hedge is only
+sent when a whole one has been earned.
+"""
+
+import asyncio
+import copy
+import os
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable, Deque, Dict, List, Optional
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Actions safe to run twice, unless overridden with HEDGE_ACTIONS
+DEFAULT_HEDGE_ACTIONS = {
+    "analyze_request": True,
+    "test_code": True
+}
+
+# Marks the duplicate so agents run it instead of coalescing it onto the original
+HEDGE_METADATA_KEY = "hedge"
+
+
+def load_hedge_policy() -> Dict[str, bool]:
+    """
+    Per-action eligibility: HEDGE_ACTIONS=analyze_request limits hedging to
+    that action, HEDGE_ACTIONS=none disables it. Unset keeps the defaults.
+    """
+    value = os.getenv("HEDGE_ACTIONS")
+    if value is None:
+        return dict(DEFAULT_HEDGE_ACTIONS)
+    return {a.strip(): True for a in value.split(",") if a.strip() and a.strip() != "none"}
+
+
+class LatencyTracker:
+    """Recent latencies per key (a cancelled attempt counts with the time it ran)"""
+
+    def __init__(self, window: int = 200, min_samples: int = 20):
+        self.window = window
+        self.min_samples = min_samples
+        self.samples: Dict[str, Deque[float]] = {}
+
+    def record(self, key: str, seconds: float):
+        self.samples.setdefault(key, deque(maxlen=self.window)).append(seconds)
+
+    def percentile(self, key: str, p: float) -> Optional[float]:
+        """p-th percentile in seconds, or None until enough samples are seen"""
+        samples = self.samples.get(key)
+        if not samples or len(samples) < self.min_samples:
+            return None
+        ordered = sorted(samples)
+        return ordered[min(len(ordered) - 1, int(p / 100 * len(ordered)))]
+
+
+class HedgeBudget:
+    """Hedges earned per request, with a cap on how many can be saved up"""
+
+    def __init__(self, ratio: float = 0.1, burst: float = 10.0):
+        self.ratio = ratio
+        self.burst = burst
+        self.balance = burst if ratio > 0 else 0.0
+
+    def earn(self):
+        self.balance = min(self.burst, self.balance + self.ratio)
+
+    def try_spend(self) -> bool:
+        if self.balance < 1.0:
+            return False
+        self.balance -= 1.0
+        return True
+
+
+class Hedger:
+    """Sends a duplicate of slow idempotent requests and keeps the first reply"""
+
+    def __init__(self, actions: Optional[Dict[str, bool]] = None, percentile: float = 95.0,
+                 min_delay: float = 0.5, budget: float = 0.1, min_samples: int = 20):
+        """
+        Args:
+            actions: Actions eligible for hedging
+            percentile: Recent-latency percentile after which the duplicate is sent
+            min_delay: Never hedge sooner than this many seconds
+            budget: Hedges allowed per request sent
+            min_samples: Latencies seen before a key is hedged at all
+        """
+        self.actions = load_hedge_policy() if actions is None else actions
+        self.percentile = percentile
+        self.min_delay = min_delay
+        self.budget = HedgeBudget(budget)
+        self.latency = LatencyTracker(min_samples=min_samples)
+        # Primary URL → other replicas of the same agent
+        self.replicas: Dict[str, List[str]] = {}
+        self._next_replica: Dict[str, int] = {}
+        self.metrics: Dict[str, Dict[str, int]] = {}
+
+    def add_replicas(self, url: str, replicas: List[str]):
+        """Register other URLs serving the same agent as url"""
+        self.replicas[url] = [r for r in replicas if r != url]
+        logger.info(f"Hedging {url} onto {len(self.replicas[url])} replica(s)")
+
+    def eligible(self, action: Optional[str]) -> bool:
+        return bool(action and self.actions.get(action))
+
+    def _hedge_target(self, url: str) -> str:
+        """Next replica in turn, or the same URL (a fresh pooled connection)"""
+        replicas = self.replicas.get(url)
+        if not replicas:
+            return url
+        index = self._next_replica.get(url, 0)
+        self._next_replica[url] = index + 1
+        return replicas[index % len(replicas)]
+
+    def _count(self, action: str, field: str):
+        counters = self.metrics.setdefault(action, {"requests": 0, "hedged": 0, "hedge_won": 0,
+                                                    "budget_denied": 0})
+        counters[field] += 1
+
+    async def _timed(self, key: str, attempt: Awaitable[Any]) -> Any:
+        start = time.perf_counter()
+        try:
+            result = await attempt
+        except asyncio.CancelledError:
+            # Censored: it would have taken at least this long. Leaving slow attempts
+            # that lose to a hedge out would pull the trigger percentile down.
+            self.latency.record(key, time.perf_counter() - start)
+            raise
+        self.latency.record(key, time.perf_counter() - start)
+        return result
+
+    async def run(self, action: str, key: str, target_url: str, message: Any,
+                  send: Callable[[Any, str], Awaitable[Any]],
+                  send_hedge: Optional[Callable[[Any, str], Awaitable[Any]]] = None) -> Any:
+        """
+        Send a message, hedging it once if it is slow
+
+        Args:
+            action: Action name, for metrics
+            key: Latency history the hedge delay is taken from (agent and action)
+            target_url: Primary agent URL
+            message: Message to send; the duplicate is a marked copy
+            send: Delivers a message to a URL
+            send_hedge: Delivers the duplicate (e.g. in a scheduler slot of its own), default send
+
+        Returns:
+            The first successful reply
+        """
+        self._count(action, "requests")
+        self.budget.earn()
+        # Only the primary's latency is tracked: a hedge answering first is fast by selection
+        primary = asyncio.ensure_future(self._timed(key, send(message, target_url)))
+
+        delay = self.latency.percentile(key, self.percentile)
+        if delay is None:
+            return await primary
+        try:
+            return await asyncio.wait_for(asyncio.shield(primary), max(delay, self.min_delay))
+        except asyncio.TimeoutError:
+            pass
+        except asyncio.CancelledError:
+            primary.cancel()
+            raise
+
+        if not self.budget.try_spend():
+            self._count(action, "budget_denied")
+            return await primary
+
+        self._count(action, "hedged")
+        duplicate = copy.copy(message)
+        duplicate.metadata = {**message.metadata, HEDGE_METADATA_KEY: True}
+        # Its own task id, so cancelling the loser never reaches the winner
+        duplicate.message_id = f"{message.message_id}-hedge"
+        hedge = asyncio.ensure_future((send_hedge or send)(duplicate, self._hedge_target(target_url)))
+        logger.info(f"Hedged {action} after {max(delay, self.min_delay):.2f}s")
+
+        pending = {primary, hedge}
+        try:
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                # A failed attempt does not win while the other may still succeed
+                for task in done:
+                    if not task.cancelled() and task.exception() is None:
+                        if task is hedge:
+                            self._count(action, "hedge_won")
+                        return task.result()
+            return primary.result()
+        finally:
+            for task in (primary, hedge):
+                if not task.done():
+                    task.cancel()
+
+    def get_metrics(self) -> Dict[str, Any]:
+        """Hedge rate (hedges per request) and win rate (hedges answering first)"""
+        requests = sum(c["requests"] for c in self.metrics.values())
+        hedged = sum(c["hedged"] for c in self.metrics.values())
+        won = sum(c["hedge_won"] for c in self.metrics.values())
+        return {
+            "requests": requests,
+            "hedged": hedged,
+            "hedge_won": won,
+            "hedge_rate": round(hedged / requests, 4) if requests else 0.0,
+            "win_rate": round(won / hedged, 4) if hedged else 0.0,
+            "budget_balance": round(self.budget.balance, 2),
+            "by_action": {action: dict(c) for action, c in self.metrics.items()},
+            "trigger_ms": {
+                key: round(value * 1000, 1)
+                for key in self.latency.samples
+                if (value := self.latency.percentile(key, self.percentile)) is not None
+            }
+        }
+
+
+def hedger_from_env() -> Hedger:
+    """Hedger configured from HEDGE_* environment variables"""
+    return Hedger(
+        percentile=float(os.getenv("HEDGE_PERCENTILE", "95")),
+        min_delay=float(os.getenv("HEDGE_MIN_DELAY", "0.5")),
+        budget=float(os.getenv("HEDGE_BUDGET", "0.1")),
+        min_samples=int(os.getenv("HEDGE_MIN_SAMPLES", "20"))
+    )
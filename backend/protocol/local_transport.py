@@ -0,0 +1,193 @@
+"""
+In-Process Transport for A2A Protocol
+
+Dispatches messages directly to agent executors living in the same process,
+skipping JSON encoding and HTTP. Messages and results are passed by reference.
+
+Agents registered with `use_worker_pool` run off the caller's loop, each pinned
+to one worker thread with its own event loop. Their executors (LLM clients,
+caches) are only ever touched from that thread.
+"""
+
+import asyncio
+import threading
+from typing import Dict, Any, AsyncIterator, Optional
+from .protocol import Message
+from .deadline import stamp
+import logging
+
+logger = logging.getLogger(__name__)
+
+LOCAL_SCHEME = "local://"
+
+
+class AgentLoop:
+    """Event loop on a dedicated thread that runs everything of one agent"""
+
+    def __init__(self, name: str):
+        self.loop = asyncio.new_event_loop()
+        self.thread = threading.Thread(target=self._run, name=f"a2a-local-{name}", daemon=True)
+        self.thread.start()
+
+    def _run(self):
+        asyncio.set_event_loop(self.loop)
+        self.loop.run_forever()
+
+    async def run(self, coroutine) -> Any:
+        """Await a coroutine running on this loop; cancelling the caller cancels it there too"""
+        return await asyncio.wrap_future(asyncio.run_coroutine_threadsafe(coroutine, self.loop))
+
+    def close(self):
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.thread.join(timeout=5)
+
+
+class LocalTransport:
+    """Transport for agents running in the orchestrator process"""
+
+    def __init__(self):
+        self.executors: Dict[str, Any] = {}
+        # Worker loop per agent registered with use_worker_pool
+        self.loops: Dict[str, AgentLoop] = {}
+        # Executions stopped because their caller was cancelled
+        self.cancelled = 0
+        # Background warm-up; dispatches wait for it instead of racing it
+        self.warm_up_task: Optional[asyncio.Task] = None
+        self.warm_up_errors: Dict[str, str] = {}
+
+    def register(self, agent_name: str, executor: Any, use_worker_pool: bool = False) -> str:
+        """
+        Register an in-process executor
+
+        Args:
+            agent_name: Agent name, also used as the local URL host
+            executor: Object with an async `execute(task_data)` method
+            use_worker_pool: Run the executor on its own worker thread and
+                event loop instead of the caller's loop
+
+        Returns:
+            Local URL to register in the agent registry
+        """
+        url = f"{LOCAL_SCHEME}{agent_name}"
+        self.executors[url] = executor
+        if use_worker_pool and url not in self.loops:
+            self.loops[url] = AgentLoop(agent_name)
+        logger.info(f"Registered in-process agent {agent_name} at {url}")
+        return url
+
+    @staticmethod
+    def is_local(url: Optional[str]) -> bool:
+        """Check whether a URL addresses an in-process agent"""
+        return bool(url) and url.startswith(LOCAL_SCHEME)
+
+    async def send_message(self, message: Message, target_url: str) -> Dict[str, Any]:
+        """
+        Dispatch A2A message to an in-process executor
+
+        Args:
+            message: A2A message to send
+            target_url: Local URL of target agent (e.g., local://Analyst)
+
+        Returns:
+            Result returned by the executor (not copied)
+        """
+        executor = self.executors.get(target_url)
+        if executor is None:
+            raise LookupError(f"No in-process agent registered at {target_url}")
+
+        # Same structure the HTTP handler would decode, without the round trip
+        payload = message.to_dict()
+        payload["metadata"] = stamp(payload["metadata"])
+        await self._wait_for_warm_up()
+
+        try:
+            agent_loop = self.loops.get(target_url)
+            if agent_loop is None:
+                return await executor.execute(payload)
+            return await agent_loop.run(executor.execute(payload))
+        except asyncio.CancelledError:
+            self.cancelled += 1
+            raise
+
+    async def stream_message(self, message: Message, target_url: str) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Dispatch A2A message to an in-process executor, yielding streamed events
+        
+        Executors without a `stream` method yield a single result event.
+        """
+        executor = self.executors.get(target_url)
+        if executor is None:
+            raise LookupError(f"No in-process agent registered at {target_url}")
+        
+        payload = message.to_dict()
+        payload["metadata"] = stamp(payload["metadata"])
+        if getattr(executor, "stream", None) is None:
+            yield {"event": "result", "result": await self.send_message(message, target_url)}
+            return
+        
+        await self._wait_for_warm_up()
+        agent_loop = self.loops.get(target_url)
+        if agent_loop is None:
+            async for event in executor.stream(payload):
+                yield event
+            return
+        
+        # Relay events from the worker's event loop to the caller's
+        loop = asyncio.get_running_loop()
+        queue: asyncio.Queue = asyncio.Queue()
+        done = object()
+        
+        async def produce():
+            try:
+                async for event in executor.stream(payload):
+                    loop.call_soon_threadsafe(queue.put_nowait, event)
+            finally:
+                loop.call_soon_threadsafe(queue.put_nowait, done)
+        
+        worker = asyncio.ensure_future(agent_loop.run(produce()))
+        try:
+            while True:
+                event = await queue.get()
+                if event is done:
+                    break
+                yield event
+            await worker
+        finally:
+            if not worker.done():
+                worker.cancel()
+
+    def start_warm_up(self):
+        """Warm the executors up in the background; the first dispatches wait for it"""
+        if self.warm_up_task is None:
+            self.warm_up_task = asyncio.get_running_loop().create_task(self.warm_up())
+
+    async def _wait_for_warm_up(self):
+        if self.warm_up_task is not None and not self.warm_up_task.done():
+            await asyncio.shield(self.warm_up_task)
+
+    async def warm_up(self):
+        """Warm up in-process executors (heavy imports, LLM clients) on the loop they run on"""
+        for url, executor in list(self.executors.items()):
+            warm_up = getattr(executor, "warm_up", None)
+            if warm_up is None:
+                continue
+            try:
+                agent_loop = self.loops.get(url)
+                await (warm_up() if agent_loop is None else agent_loop.run(warm_up()))
+            except Exception as e:
+                self.warm_up_errors[url] = str(e)
+                logger.error(f"Warm-up of {url} failed: {e}")
+
+    async def check_health(self, agent_url: str) -> bool:
+        """In-process agents are healthy when registered and their warm-up did not fail"""
+        return agent_url in self.executors and agent_url not in self.warm_up_errors
+
+    async def close(self):
+        """Stop the agents' worker loops"""
+        for agent_loop in self.loops.values():
+            await asyncio.to_thread(agent_loop.close)
+        self.loops.clear()
+
+
+# Global instance
+local_transport = LocalTransport()
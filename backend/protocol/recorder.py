@@ -0,0 +1,169 @@
+"""
+A2A Traffic Recorder
+
+Appends every A2A message sent by NetworkTransport (side "client") or
+handled by DefaultRequestHandler (side "server") to an append-only log,
+with its start time, duration, outcome and response size. Recording is
+opt-in with A2A_RECORD_PATH. A path ending in .gz is written as
+concatenated gzip members, so appending stays cheap and the file stays
+small.
+
+Writes happen on a background thread through a bounded queue. When the
+writer falls behind, entries are dropped rather than slowing requests.
+`protocol.replay` re-issues a recording.
+"""
+
+import atexit
+import gzip
+import json
+import os
+import queue
+import threading
+from typing import Any, Dict, Iterator, Optional
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Bump when the entry layout changes
+RECORD_FORMAT = 1
+
+
+def open_recording(path: str, mode: str = "rt"):
+    """Open a plain or gzip recording"""
+    if path.endswith(".gz"):
+        return gzip.open(path, mode, encoding="utf-8")
+    return open(path, mode, encoding="utf-8")
+
+
+def read_recording(path: str) -> Iterator[Dict[str, Any]]:
+    """Entries of a recording in the order they were written"""
+    with open_recording(path) as stream:
+        for line in stream:
+            if line.strip():
+                yield json.loads(line)
+
+
+class TrafficRecorder:
+    """Append-only log of A2A messages with timings and response sizes"""
+
+    def __init__(self, path: str, sample_rate: float = 1.0, max_queue: int = 10000,
+                 flush_interval: float = 1.0):
+        """
+        Args:
+            path: Log file; .gz for gzip
+            sample_rate: Share of messages recorded (1.0 records all)
+            max_queue: Entries buffered for the writer before dropping
+            flush_interval: Seconds between writes of buffered entries
+        """
+        self.path = path
+        self.sample_rate = sample_rate
+        self.flush_interval = flush_interval
+        self.queue: queue.Queue = queue.Queue(maxsize=max_queue)
+        self.stats = {"recorded": 0, "dropped": 0, "sampled_out": 0, "bytes": 0}
+        self._credit = 0.0
+        self._stopped = threading.Event()
+
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        self._thread = threading.Thread(target=self._write, name="a2a-recorder", daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+        logger.info(f"Recording A2A traffic to {path}")
+
+    def record(self, side: str, message: Dict[str, Any], target: str, started: float,
+               duration: float, status: str, response_bytes: int = 0,
+               events: Optional[int] = None, error: Optional[str] = None):
+        """
+        Queue one exchange
+
+        Args:
+            side: "client" (sent by this process) or "server" (handled by it)
+            message: Message dict as sent on the wire
+            target: Agent URL (client side) or agent name (server side)
+            started: Wall-clock start, seconds since the epoch
+            duration: Seconds until the response (or the last streamed event)
+            status: "ok" or "error"
+            response_bytes: Size of the response body
+            events: Number of streamed events, for streams
+            error: Error text on failure
+        """
+        # Deterministic sampling: keeps an even spread of the message mix
+        if self.sample_rate < 1.0:
+            self._credit += self.sample_rate
+            if self._credit < 1.0:
+                self.stats["sampled_out"] += 1
+                return
+            self._credit -= 1.0
+
+        entry = {
+            "v": RECORD_FORMAT,
+            "side": side,
+            "t": round(started, 6),
+            "ms": round(duration * 1000, 2),
+            "target": target,
+            "status": status,
+            "bytes": response_bytes,
+            "message": message
+        }
+        if events is not None:
+            entry["events"] = events
+        if error:
+            entry["error"] = error[:500]
+        try:
+            self.queue.put_nowait(entry)
+        except queue.Full:
+            self.stats["dropped"] += 1
+
+    def _write(self):
+        while not self._stopped.is_set() or not self.queue.empty():
+            self._stopped.wait(self.flush_interval)
+            entries = []
+            while True:
+                try:
+                    entries.append(self.queue.get_nowait())
+                except queue.Empty:
+                    break
+            if not entries:
+                continue
+
+            data = "".join(json.dumps(entry, separators=(",", ":"), default=str) + "\n" for entry in entries)
+            try:
+                # One gzip member per batch keeps the file appendable
+                with open_recording(self.path, "at") as stream:
+                    stream.write(data)
+                self.stats["recorded"] += len(entries)
+                self.stats["bytes"] += len(data)
+            except OSError as e:
+                self.stats["dropped"] += len(entries)
+                logger.error(f"Recording write failed: {e}")
+
+    def close(self):
+        """Write out buffered entries and stop the writer"""
+        self._stopped.set()
+        self._thread.join(timeout=5)
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {"path": self.path, "queued": self.queue.qsize(), **self.stats}
+
+
+def recorder_from_env(side: str) -> Optional[TrafficRecorder]:
+    """
+    Recorder configured from A2A_RECORD_* environment variables, or None
+
+    Client and server recording in one process share one file. Processes
+    must not share a file; "{pid}" in the path is replaced by the process id.
+    """
+    path = os.getenv("A2A_RECORD_PATH")
+    if not path:
+        return None
+    path = path.replace("{pid}", str(os.getpid()))
+    sides = os.getenv("A2A_RECORD_SIDES", "client,server").split(",")
+    if side not in sides:
+        return None
+    global _shared
+    if _shared is None:
+        _shared = TrafficRecorder(path, sample_rate=float(os.getenv("A2A_RECORD_SAMPLE_RATE", "1.0")))
+    return _shared
+
+
+_shared: Optional[TrafficRecorder] = None
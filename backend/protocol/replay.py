@@ -0,0 +1,266 @@
+"""
+A2A Traffic Replay
+
+Re-issues a recording made with A2A_RECORD_PATH against agent services (or
+stand-ins) and compares latency and throughput with the recording, or with
+an earlier replay.
+
+Usage:
+    python -m protocol.replay cache/a2a.jsonl.gz [--speed 1|4|max]
+        [--target Developer=http://localhost:8002 ...] [--side client|server]
+        [--stand-in] [--limit N] [--out report.json] [--compare baseline.json]
+
+At 1x and Nx, messages are sent at their recorded offsets (divided by N), so
+the recorded concurrency is reproduced. At max speed, messages are sent back
+to back while keeping at most as many in flight as the recording's peak.
+With --stand-in, no service is called: each message takes its recorded
+duration, to check the replay itself or load the caller side only.
+"""
+
+import argparse
+import asyncio
+import json
+import statistics
+import sys
+import time
+import uuid
+from typing import Any, Dict, List, Optional
+
+from .recorder import read_recording
+
+# Agent services as started by start_all.sh
+DEFAULT_TARGETS = {
+    "Analyst": "http://localhost:8001",
+    "Developer": "http://localhost:8002",
+    "Tester": "http://localhost:8003",
+}
+
+
+def load_entries(path: str, side: Optional[str] = None, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+    """Recorded exchanges of one side, oldest first"""
+    entries = list(read_recording(path))
+    if side is None:
+        # Prefer what the caller saw; a service's own recording has only server entries
+        side = "client" if any(e["side"] == "client" for e in entries) else "server"
+    entries = sorted((e for e in entries if e["side"] == side), key=lambda e: e["t"])
+    return entries[:limit] if limit else entries
+
+
+def peak_concurrency(entries: List[Dict[str, Any]]) -> int:
+    """Most exchanges in flight at once in the recording"""
+    edges = []
+    for entry in entries:
+        edges.append((entry["t"], 1))
+        edges.append((entry["t"] + entry["ms"] / 1000, -1))
+    peak = current = 0
+    # Ends sort before starts at the same instant
+    for _, delta in sorted(edges, key=lambda edge: (edge[0], edge[1])):
+        current += delta
+        peak = max(peak, current)
+    return max(1, peak)
+
+
+def percentile(values: List[float], p: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(p / 100 * len(ordered)))]
+
+
+def summarize(samples: List[float], count: int, errors: int, span: float) -> Dict[str, Any]:
+    return {
+        "count": count,
+        "errors": errors,
+        "throughput_rps": round(count / span, 3) if span > 0 else 0.0,
+        "p50_ms": round(percentile(samples, 50), 1),
+        "p95_ms": round(percentile(samples, 95), 1),
+        "p99_ms": round(percentile(samples, 99), 1),
+        "max_ms": round(max(samples), 1) if samples else 0.0,
+        "mean_ms": round(statistics.fmean(samples), 1) if samples else 0.0
+    }
+
+
+class Replayer:
+    """Sends recorded messages on the recorded schedule"""
+
+    def __init__(self, entries: List[Dict[str, Any]], targets: Dict[str, str], speed: Optional[float],
+                 stand_in: bool = False, timeout: float = 300.0):
+        """
+        Args:
+            entries: Recorded exchanges, oldest first
+            targets: Agent name → base URL
+            speed: Time scale (1.0 real time, 4.0 four times faster); None for max speed
+            stand_in: Wait the recorded duration instead of calling services
+            timeout: Per-request timeout in seconds
+        """
+        self.entries = entries
+        self.targets = targets
+        self.speed = speed
+        self.stand_in = stand_in
+        self.timeout = timeout
+        self.results: List[Dict[str, Any]] = []
+
+    def _target(self, entry: Dict[str, Any]) -> str:
+        agent = entry["message"].get("to")
+        if agent in self.targets:
+            return self.targets[agent]
+        if entry["side"] == "client" and entry["target"].startswith("http"):
+            return entry["target"]
+        raise ValueError(f"No target for agent {agent!r}; pass --target {agent}=URL")
+
+    @staticmethod
+    def _message(entry: Dict[str, Any]) -> Dict[str, Any]:
+        message = json.loads(json.dumps(entry["message"]))
+        message["metadata"] = {**(message.get("metadata") or {}), "replay_of": message.get("message_id")}
+        message["message_id"] = str(uuid.uuid4())
+        return message
+
+    async def _send(self, client, entry: Dict[str, Any]) -> Dict[str, Any]:
+        start = time.perf_counter()
+        status, size, error = "ok", 0, None
+        try:
+            if self.stand_in:
+                await asyncio.sleep(entry["ms"] / 1000)
+                size = entry.get("bytes", 0)
+            elif "events" in entry:
+                url = f"{self._target(entry)}/message/stream"
+                async with client.stream("POST", url, json=self._message(entry)) as response:
+                    response.raise_for_status()
+                    async for chunk in response.aiter_bytes():
+                        size += len(chunk)
+            else:
+                response = await client.post(f"{self._target(entry)}/message", json=self._message(entry))
+                response.raise_for_status()
+                size = len(response.content)
+        except Exception as e:
+            status, error = "error", str(e)
+        return {
+            "action": entry["message"].get("content", {}).get("action", "?"),
+            "recorded_ms": entry["ms"],
+            "recorded_status": entry["status"],
+            "replay_ms": (time.perf_counter() - start) * 1000,
+            "status": status,
+            "bytes": size,
+            "error": error
+        }
+
+    async def run(self) -> Dict[str, Any]:
+        """Replay every entry and report recorded vs replayed timings"""
+        client = None
+        if not self.stand_in:
+            import httpx
+            client = httpx.AsyncClient(timeout=self.timeout)
+
+        limit = asyncio.Semaphore(peak_concurrency(self.entries)) if self.speed is None else None
+        t0 = self.entries[0]["t"]
+        started = time.perf_counter()
+
+        async def issue(entry):
+            if self.speed is not None:
+                delay = (entry["t"] - t0) / self.speed - (time.perf_counter() - started)
+                if delay > 0:
+                    await asyncio.sleep(delay)
+                self.results.append(await self._send(client, entry))
+            else:
+                async with limit:
+                    self.results.append(await self._send(client, entry))
+
+        try:
+            await asyncio.gather(*(issue(entry) for entry in self.entries))
+        finally:
+            if client is not None:
+                await client.aclose()
+
+        return self.report(time.perf_counter() - started)
+
+    def report(self, wall: float) -> Dict[str, Any]:
+        recorded_span = max(e["t"] + e["ms"] / 1000 for e in self.entries) - self.entries[0]["t"]
+        actions = sorted({r["action"] for r in self.results})
+
+        def section(results):
+            ok = [r for r in results if r["status"] == "ok"]
+            return {
+                "recorded": summarize([r["recorded_ms"] for r in results], len(results),
+                                      sum(r["recorded_status"] != "ok" for r in results), recorded_span),
+                "replay": summarize([r["replay_ms"] for r in ok], len(results),
+                                    len(results) - len(ok), wall)
+            }
+
+        return {
+            "speed": self.speed or "max",
+            "stand_in": self.stand_in,
+            "peak_concurrency": peak_concurrency(self.entries),
+            "wall_s": round(wall, 3),
+            "recorded_span_s": round(recorded_span, 3),
+            "overall": section(self.results),
+            "by_action": {action: section([r for r in self.results if r["action"] == action]) for action in actions},
+            "errors": [r["error"] for r in self.results if r["error"]][:20]
+        }
+
+
+def print_report(report: Dict[str, Any], baseline: Optional[Dict[str, Any]] = None):
+    """Table of recorded vs replayed latency, and change against a baseline replay"""
+    print(f"speed {report['speed']}, peak concurrency {report['peak_concurrency']}, "
+          f"wall {report['wall_s']}s (recorded {report['recorded_span_s']}s)")
+    header = f"{'action':18} {'n':>5} {'err':>4} {'rec p50':>9} {'p50':>9} {'rec p95':>9} {'p95':>9} {'rps':>8}"
+    if baseline:
+        header += f" {'Δp50':>8} {'Δp95':>8} {'Δrps':>8}"
+    print(header)
+    print("-" * len(header))
+
+    rows = [("(all)", report["overall"])] + list(report["by_action"].items())
+    for action, section in rows:
+        recorded, replay = section["recorded"], section["replay"]
+        line = (f"{action:18} {replay['count']:5} {replay['errors']:4} {recorded['p50_ms']:9.1f} "
+                f"{replay['p50_ms']:9.1f} {recorded['p95_ms']:9.1f} {replay['p95_ms']:9.1f} "
+                f"{replay['throughput_rps']:8.2f}")
+        if baseline:
+            before = baseline["overall"] if action == "(all)" else baseline["by_action"].get(action)
+            if before:
+                before = before["replay"]
+                line += (f" {replay['p50_ms'] - before['p50_ms']:+8.1f} {replay['p95_ms'] - before['p95_ms']:+8.1f}"
+                         f" {replay['throughput_rps'] - before['throughput_rps']:+8.2f}")
+        print(line)
+
+    for error in report["errors"][:5]:
+        print(f"error: {error}")
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("recording")
+    parser.add_argument("--speed", default="1", help="time scale: 1, N, or max")
+    parser.add_argument("--target", action="append", default=[], metavar="AGENT=URL")
+    parser.add_argument("--side", choices=["client", "server"])
+    parser.add_argument("--stand-in", action="store_true")
+    parser.add_argument("--limit", type=int)
+    parser.add_argument("--timeout", type=float, default=300.0)
+    parser.add_argument("--out", help="write the JSON report here")
+    parser.add_argument("--compare", help="earlier JSON report to compare against")
+    args = parser.parse_args(argv)
+
+    entries = load_entries(args.recording, args.side, args.limit)
+    if not entries:
+        print("Recording has no entries", file=sys.stderr)
+        return 1
+
+    targets = dict(DEFAULT_TARGETS)
+    targets.update(item.split("=", 1) for item in args.target)
+    speed = None if args.speed == "max" else float(args.speed)
+
+    report = asyncio.run(Replayer(entries, targets, speed, args.stand_in, args.timeout).run())
+
+    baseline = None
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = json.load(f)
+    print_report(report, baseline)
+
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
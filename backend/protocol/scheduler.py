@@ -0,0 +1,306 @@
+"""
+Fair Scheduling of Agent Dispatch
+
+Each agent gets a fixed number of concurrent requests. When they are all in
+use, waiting requests are queued by priority class: interactive follow-up
+edits, then new projects, then batch work. Within a class, conversations
+(or users) share the agent by weighted fair queueing, so a few heavy
+generations cannot starve everyone else. Requests waiting longer than the
+aging limit move to the front of the queue. Per-user request and token quotas
+are enforced over a rolling window.
+
+A user is the client identity the orchestrator sets per connection
+(`current_user`, the client address), so reconnecting under a new
+conversation does not start a fresh quota. Messages may name one explicitly
+with `metadata.user_id`; without either, the conversation is the flow.
+"""
+
+import asyncio
+import contextvars
+import os
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from typing import Dict, Any, Deque, List, Optional, Tuple
+from runtime.offload import estimate_size
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Highest priority first
+PRIORITY_CLASSES = ("interactive", "new_project", "batch")
+
+# Class of requests that do not say otherwise
+DEFAULT_ACTION_CLASSES = {
+    "modify_code": "interactive",
+    "analyze_request": "new_project",
+    "generate_code": "new_project",
+    "fix_bug": "new_project",
+    "test_code": "new_project"
+}
+
+# Relative service cost of an action, for fair queueing
+ACTION_COSTS = {
+    "analyze_request": 1.0,
+    "generate_code": 4.0,
+    "modify_code": 2.0,
+    "fix_bug": 2.0,
+    "test_code": 0.5
+}
+
+# Priority class of requests sent from the current task (set per pipeline run)
+current_priority: contextvars.ContextVar[Optional[str]] = contextvars.ContextVar("current_priority", default=None)
+
+# Client identity requests sent from the current task are accounted to (set per connection)
+current_user: contextvars.ContextVar[Optional[str]] = contextvars.ContextVar("current_user", default=None)
+
+
+class QuotaExceeded(Exception):
+    """A user is over their request or token quota"""
+
+
+@dataclass
+class _Waiter:
+    flow: str
+    priority: str
+    start: float
+    finish: float
+    seq: int
+    enqueued: float
+    future: asyncio.Future = field(repr=False)
+
+
+class _AgentQueue:
+    """Concurrency slots and waiting requests of one agent"""
+
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self.in_flight = 0
+        self.waiting: List[_Waiter] = []
+        # Fair queueing state: virtual time and last finish tag per flow
+        self.virtual_time = 0.0
+        self.finish_tags: Dict[str, float] = {}
+
+
+class QuotaTracker:
+    """Rolling-window request and token counts per user"""
+
+    def __init__(self, max_requests: int = 0, max_tokens: int = 0, window: float = 3600.0):
+        self.max_requests = max_requests
+        self.max_tokens = max_tokens
+        self.window = window
+        self.usage: Dict[str, Deque[Tuple[float, int]]] = {}
+        self._last_sweep = time.monotonic()
+
+    def _recent(self, user: str) -> Deque[Tuple[float, int]]:
+        """Usage inside the window; users without any are forgotten"""
+        entries = self.usage.get(user)
+        if entries is None:
+            return deque()
+        cutoff = time.monotonic() - self.window
+        while entries and entries[0][0] < cutoff:
+            entries.popleft()
+        if not entries:
+            del self.usage[user]
+        return entries
+
+    def _sweep(self):
+        """Drop users whose usage has all left the window, once per window"""
+        now = time.monotonic()
+        if now - self._last_sweep < self.window:
+            return
+        self._last_sweep = now
+        for user in list(self.usage):
+            self._recent(user)
+
+    def check(self, user: str):
+        """Raise QuotaExceeded when the user has no requests or tokens left"""
+        entries = self._recent(user)
+        if self.max_requests and len(entries) >= self.max_requests:
+            raise QuotaExceeded(f"Request quota reached ({self.max_requests} per {int(self.window)}s)")
+        if self.max_tokens and sum(tokens for _, tokens in entries) >= self.max_tokens:
+            raise QuotaExceeded(f"Token quota reached ({self.max_tokens} per {int(self.window)}s)")
+
+    def record(self, user: str, tokens: int):
+        self._sweep()
+        self.usage.setdefault(user, deque()).append((time.monotonic(), tokens))
+
+    def get_usage(self, user: str) -> Dict[str, int]:
+        entries = self._recent(user)
+        return {"requests": len(entries), "tokens": sum(tokens for _, tokens in entries)}
+
+
+class FairScheduler:
+    """Admission of agent requests by priority class and weighted fair share"""
+
+    def __init__(self, capacity: int = 4, max_wait: float = 30.0,
+                 quotas: Optional[QuotaTracker] = None, flow_weights: Optional[Dict[str, float]] = None,
+                 max_samples: int = 1000):
+        """
+        Args:
+            capacity: Concurrent requests per agent
+            max_wait: Seconds after which a waiting request goes ahead of higher classes
+            quotas: Per-user quotas (none when omitted)
+            flow_weights: Share weights per user or conversation (default 1)
+            max_samples: Queue delay samples kept per class
+        """
+        self.capacity = max(1, capacity)
+        self.max_wait = max_wait
+        self.quotas = quotas or QuotaTracker()
+        self.flow_weights = flow_weights or {}
+        self.queues: Dict[str, _AgentQueue] = {}
+        self._seq = 0
+        self.delays: Dict[str, Deque[float]] = {p: deque(maxlen=max_samples) for p in PRIORITY_CLASSES}
+        self.stats = {"admitted": 0, "queued": 0, "aged": 0, "quota_rejected": 0}
+
+    @staticmethod
+    def classify(message) -> Tuple[str, str, str]:
+        """Flow (user, else conversation), priority class and action of a message"""
+        metadata = message.metadata or {}
+        action = message.content.get("action", "")
+        flow = metadata.get("user_id") or current_user.get() or metadata.get("conversation_id") or "anonymous"
+        priority = metadata.get("priority") or current_priority.get() or DEFAULT_ACTION_CLASSES.get(action, "batch")
+        if priority not in PRIORITY_CLASSES:
+            priority = "batch"
+        return flow, priority, action
+
+    @asynccontextmanager
+    async def slot(self, message, target: str, charge: bool = True):
+        """
+        Hold one of the target agent's slots while a request runs
+
+        Args:
+            message: Request being dispatched
+            target: Agent URL the slots belong to
+            charge: Count the request against the user's quota (not for hedged duplicates)
+
+        Yields:
+            Dict whose "tokens" the caller may set to the request's reported usage
+
+        Raises:
+            QuotaExceeded: The user is over quota
+        """
+        flow, priority, action = self.classify(message)
+        if charge:
+            try:
+                self.quotas.check(flow)
+            except QuotaExceeded:
+                self.stats["quota_rejected"] += 1
+                raise
+
+        queue = self.queues.setdefault(target, _AgentQueue(self.capacity))
+        await self._acquire(queue, flow, priority, ACTION_COSTS.get(action, 1.0))
+        grant = {"tokens": None}
+        try:
+            yield grant
+        finally:
+            self._release(queue)
+            if charge:
+                self.quotas.record(flow, grant["tokens"] or self._estimate_tokens(message))
+
+    @staticmethod
+    def _estimate_tokens(message) -> int:
+        # Prompt size from the parameters; responses are about as large again
+        return estimate_size(message.content.get("parameters", {})) // 2 + 200
+
+    async def _acquire(self, queue: _AgentQueue, flow: str, priority: str, cost: float):
+        now = time.monotonic()
+        if queue.in_flight < queue.capacity and not queue.waiting:
+            queue.in_flight += 1
+            self._admitted(priority, 0.0)
+            return
+
+        weight = self.flow_weights.get(flow, 1.0)
+        start = max(queue.virtual_time, queue.finish_tags.get(flow, 0.0))
+        finish = start + cost / weight
+        queue.finish_tags[flow] = finish
+        self._seq += 1
+        waiter = _Waiter(flow, priority, start, finish, self._seq, now,
+                         asyncio.get_running_loop().create_future())
+        queue.waiting.append(waiter)
+        self.stats["queued"] += 1
+
+        try:
+            await waiter.future
+        except asyncio.CancelledError:
+            if waiter in queue.waiting:
+                queue.waiting.remove(waiter)
+            elif waiter.future.done() and not waiter.future.cancelled():
+                # Granted a slot just as the caller gave up
+                self._release(queue)
+            raise
+        self._admitted(priority, time.monotonic() - now)
+
+    def _release(self, queue: _AgentQueue):
+        queue.in_flight -= 1
+        while queue.waiting and queue.in_flight < queue.capacity:
+            waiter = self._next(queue)
+            queue.waiting.remove(waiter)
+            if waiter.future.done():
+                continue
+            queue.in_flight += 1
+            queue.virtual_time = max(queue.virtual_time, waiter.start)
+            waiter.future.set_result(None)
+
+        # Flows with nothing queued restart from the current virtual time
+        if not queue.waiting:
+            queue.finish_tags.clear()
+
+    def _next(self, queue: _AgentQueue) -> _Waiter:
+        now = time.monotonic()
+        aged = [w for w in queue.waiting if now - w.enqueued >= self.max_wait]
+        if aged:
+            self.stats["aged"] += 1
+            return min(aged, key=lambda w: w.enqueued)
+        return min(queue.waiting, key=lambda w: (PRIORITY_CLASSES.index(w.priority), w.finish, w.seq))
+
+    def _admitted(self, priority: str, delay: float):
+        self.stats["admitted"] += 1
+        self.delays[priority].append(delay)
+
+    def get_metrics(self) -> Dict[str, Any]:
+        """Queue delay per priority class, queue depths and quota rejections"""
+        delays = {}
+        for priority, samples in self.delays.items():
+            ordered = sorted(samples)
+            delays[priority] = {
+                "count": len(ordered),
+                "avg_ms": round(sum(ordered) / len(ordered) * 1000, 1) if ordered else 0.0,
+                "p95_ms": round(ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))] * 1000, 1) if ordered else 0.0,
+                "max_ms": round(ordered[-1] * 1000, 1) if ordered else 0.0
+            }
+        return {
+            **self.stats,
+            "queue_delay": delays,
+            "agents": {
+                target: {
+                    "in_flight": queue.in_flight,
+                    "waiting": {p: sum(1 for w in queue.waiting if w.priority == p) for p in PRIORITY_CLASSES}
+                }
+                for target, queue in self.queues.items()
+            }
+        }
+
+
+def _parse_weights(value: str) -> Dict[str, float]:
+    weights = {}
+    for item in value.split(","):
+        if "=" in item:
+            flow, weight = item.split("=", 1)
+            weights[flow.strip()] = float(weight)
+    return weights
+
+
+def scheduler_from_env() -> FairScheduler:
+    """Build a FairScheduler configured from SCHEDULER_* and QUOTA_* environment variables"""
+    return FairScheduler(
+        capacity=int(os.getenv("SCHEDULER_CONCURRENCY", "4")),
+        max_wait=float(os.getenv("SCHEDULER_MAX_WAIT", "30")),
+        quotas=QuotaTracker(
+            max_requests=int(os.getenv("QUOTA_REQUESTS", "0")),
+            max_tokens=int(os.getenv("QUOTA_TOKENS", "0")),
+            window=float(os.getenv("QUOTA_WINDOW", "3600"))
+        ),
+        flow_weights=_parse_weights(os.getenv("SCHEDULER_WEIGHTS", ""))
+    )
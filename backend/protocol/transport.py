@@ -1,13 +1,24 @@
 """
 Network Transport Layer for A2A Protocol
 
-Provides HTTP-based communication between distributed agents.
+Provides HTTP-based communication between distributed agents. Agents
+registered in-process (local:// URLs) are dispatched without HTTP.
 """
 
 import httpx
 import asyncio
-from typing import Dict, Any, Optional
+import json
+import time
+from typing import Dict, Any, AsyncIterator, Optional
 from .protocol import Message, Request, Response, Notification
+from .local_transport import LocalTransport, local_transport
+from .coalescing import SingleFlight, request_key, load_coalesce_policy
+from .scheduler import FairScheduler, scheduler_from_env
+from .recorder import TrafficRecorder, recorder_from_env
+from .hedging import Hedger, hedger_from_env
+from .deadline import DeadlineExceeded, bounded_stream, check, remaining, stamp, timeout_for
+from runtime.offload import cpu_offloader, estimate_size
+from runtime.log_pipeline import log_context
 import logging
 
 logger = logging.getLogger(__name__)
@@ -16,10 +27,28 @@ logger = logging.getLogger(__name__)
 class NetworkTransport:
     """HTTP-based transport for A2A messages"""
     
-    def __init__(self, timeout: float = 30.0, max_retries: int = 3):
+    def __init__(self, timeout: float = 30.0, max_retries: int = 3,
+                 local: Optional[LocalTransport] = None,
+                 coalesce_actions: Optional[Dict[str, bool]] = None,
+                 scheduler: Optional[FairScheduler] = None,
+                 recorder: Optional[TrafficRecorder] = None,
+                 hedger: Optional[Hedger] = None):
         self.timeout = timeout
         self.max_retries = max_retries
         self.client = httpx.AsyncClient(timeout=timeout)
+        self.local = local or LocalTransport()
+        # Identical concurrent requests share one execution, per-action opt-in
+        self.coalesce_actions = load_coalesce_policy() if coalesce_actions is None else coalesce_actions
+        self.single_flight = SingleFlight()
+        # Agent slots shared fairly across conversations (SCHEDULER_* env vars)
+        self.scheduler = scheduler or scheduler_from_env()
+        # Opt-in log of every message sent, for replay (A2A_RECORD_* env vars)
+        self.recorder = recorder or recorder_from_env("client")
+        # Duplicates of slow idempotent requests (HEDGE_* env vars)
+        self.hedger = hedger or hedger_from_env()
+        # Cancel requests sent to agents for abandoned messages
+        self._cancels: set = set()
+        self.cancel_stats = {"sent": 0, "cancelled": 0, "already_finished": 0, "failed": 0}
     
     async def send_message(self, message: Message, target_url: str) -> Dict[str, Any]:
         """
@@ -27,26 +56,91 @@ class NetworkTransport:
         
         Args:
             message: A2A message to send
-            target_url: Base URL of target agent (e.g., http://localhost:8001)
+            target_url: Base URL of target agent (e.g., http://localhost:8001
+                or local://Analyst for an in-process agent)
             
         Returns:
             Response data from target agent
         """
+        action = message.content.get("action") if message.type == "request" else None
+        if action and self.coalesce_actions.get(action):
+            key = request_key(target_url, action, message.content.get("parameters", {}),
+                              message.metadata.get("conversation_id"))
+            return await self.single_flight.do(key, lambda: self._send(message, target_url), label=action)
+        
+        return await self._send(message, target_url)
+    
+    async def _send(self, message: Message, target_url: str) -> Dict[str, Any]:
+        """Wait for a slot on the target agent, then deliver"""
+        with log_context(message_id=message.message_id, conversation_id=message.metadata.get("conversation_id")):
+            async with self.scheduler.slot(message, target_url) as grant:
+                result = await self._recorded(message, target_url)
+            if isinstance(result, dict):
+                grant["tokens"] = (result.get("usage") or {}).get("total_tokens")
+            return result
+    
+    async def _recorded(self, message: Message, target_url: str) -> Dict[str, Any]:
+        """Deliver, recording the exchange when a recorder is configured"""
+        if self.recorder is None:
+            return await self._dispatch(message, target_url)
+        
+        started, clock = time.time(), time.perf_counter()
+        try:
+            result = await self._dispatch(message, target_url)
+        except Exception as e:
+            self.recorder.record("client", message.to_dict(), target_url, started,
+                                 time.perf_counter() - clock, "error", error=str(e))
+            raise
+        self.recorder.record("client", message.to_dict(), target_url, started,
+                             time.perf_counter() - clock, "ok", response_bytes=estimate_size(result))
+        return result
+    
+    async def _dispatch(self, message: Message, target_url: str) -> Dict[str, Any]:
+        """Deliver, hedging slow idempotent requests to remote agents"""
+        action = message.content.get("action") if message.type == "request" else None
+        if not self.hedger.eligible(action) or self.local.is_local(target_url):
+            return await self._deliver(message, target_url)
+        return await self.hedger.run(action, f"{message.to_agent}:{action}", target_url, message,
+                                     self._deliver, self._deliver_hedge)
+    
+    async def _deliver_hedge(self, message: Message, target_url: str) -> Dict[str, Any]:
+        """Deliver a hedged duplicate in a scheduler slot of its own (not charged to the user)"""
+        async with self.scheduler.slot(message, target_url, charge=False):
+            return await self._deliver(message, target_url)
+    
+    async def _deliver(self, message: Message, target_url: str) -> Dict[str, Any]:
+        """Deliver a message in-process or over HTTP with retries"""
+        if self.local.is_local(target_url):
+            return await self.local.send_message(message, target_url)
+        
+        try:
+            return await self._post(message, target_url)
+        except asyncio.CancelledError:
+            self._cancel_remote(message, target_url)
+            raise
+    
+    async def _post(self, message: Message, target_url: str) -> Dict[str, Any]:
+        """HTTP POST with retries"""
         endpoint = f"{target_url}/message"
-        payload = message.to_dict()
+        body = None
         
         for attempt in range(self.max_retries):
+            check(f"sending {message.type} to {message.to_agent}")
+            # Large file maps are encoded off the event loop; the stamped budget shrinks per attempt
+            if body is None or remaining() is not None:
+                body = await cpu_offloader.dumps(self._payload(message))
             try:
                 logger.info(f"Sending {message.type} from {message.from_agent} to {message.to_agent} at {endpoint}")
                 
                 response = await self.client.post(
                     endpoint,
-                    json=payload,
-                    headers={"Content-Type": "application/json"}
+                    content=body,
+                    headers={"Content-Type": "application/json"},
+                    timeout=timeout_for(self.timeout)
                 )
                 
                 response.raise_for_status()
-                result = response.json()
+                result = await cpu_offloader.loads(response.content)
                 
                 logger.info(f"Received response from {message.to_agent}: {result.get('status', 'unknown')}")
                 return result
@@ -57,11 +151,109 @@ class NetworkTransport:
                 if attempt == self.max_retries - 1:
                     raise
                 
-                # Exponential backoff
-                await asyncio.sleep(2 ** attempt)
+                # Exponential backoff, unless the turn's budget would run out first
+                backoff = 2 ** attempt
+                left = remaining()
+                if left is not None and left <= backoff:
+                    raise DeadlineExceeded(f"No time left to retry {message.to_agent}: {e}") from e
+                await asyncio.sleep(backoff)
         
         raise Exception(f"Failed to send message after {self.max_retries} attempts")
     
+    def _cancel_remote(self, message: Message, target_url: str):
+        """Tell the agent to stop work on a message nobody waits for any more"""
+        task = asyncio.get_running_loop().create_task(self._send_cancel(message, target_url))
+        self._cancels.add(task)
+        task.add_done_callback(self._cancels.discard)
+    
+    async def _send_cancel(self, message: Message, target_url: str):
+        self.cancel_stats["sent"] += 1
+        try:
+            response = await self.client.post(
+                f"{target_url}/cancel",
+                json={"message_id": message.message_id},
+                timeout=5.0
+            )
+            response.raise_for_status()
+            cancelled = response.json().get("cancelled", False)
+            self.cancel_stats["cancelled" if cancelled else "already_finished"] += 1
+            logger.info(f"Cancelled {message.message_id} at {message.to_agent}: {cancelled}")
+        except Exception as e:
+            self.cancel_stats["failed"] += 1
+            logger.warning(f"Cancel of {message.message_id} at {message.to_agent} failed: {e}")
+    
+    @staticmethod
+    def _payload(message: Message) -> Dict[str, Any]:
+        """Wire form of a message, carrying the remaining deadline"""
+        payload = message.to_dict()
+        payload["metadata"] = stamp(payload["metadata"])
+        return payload
+    
+    async def stream_message(self, message: Message, target_url: str) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Send A2A message and yield the events the target agent streams back
+        
+        Args:
+            message: A2A message to send
+            target_url: Base URL of target agent, or a local:// URL
+            
+        Yields:
+            Event dicts; the last one is {"event": "result", "result": ...}
+        """
+        async with self.scheduler.slot(message, target_url):
+            stream = bounded_stream(self._deliver_stream(message, target_url), f"stream from {message.to_agent}")
+            if self.recorder is None:
+                async for event in stream:
+                    yield event
+                return
+            
+            started, clock = time.time(), time.perf_counter()
+            events, size, status, error = 0, 0, "ok", None
+            try:
+                async for event in stream:
+                    events += 1
+                    size += estimate_size(event)
+                    yield event
+            except Exception as e:
+                status, error = "error", str(e)
+                raise
+            finally:
+                self.recorder.record("client", message.to_dict(), target_url, started,
+                                     time.perf_counter() - clock, status,
+                                     response_bytes=size, events=events, error=error)
+    
+    async def _deliver_stream(self, message: Message, target_url: str) -> AsyncIterator[Dict[str, Any]]:
+        if self.local.is_local(target_url):
+            async for event in self.local.stream_message(message, target_url):
+                yield event
+            return
+        
+        endpoint = f"{target_url}/message/stream"
+        check(f"streaming from {message.to_agent}")
+        body = await cpu_offloader.dumps(self._payload(message))
+        logger.info(f"Streaming {message.type} from {message.from_agent} to {message.to_agent} at {endpoint}")
+        
+        # No retries: events may already have been consumed when a stream breaks
+        try:
+            async with self.client.stream(
+                "POST",
+                endpoint,
+                content=body,
+                headers={"Content-Type": "application/json"},
+                timeout=timeout_for(self.timeout)
+            ) as response:
+                response.raise_for_status()
+                async for line in response.aiter_lines():
+                    if line.strip():
+                        event = json.loads(line)
+                        # The agent ran out of the budget we sent it
+                        if event.get("event") == "error" and event.get("status") == 504:
+                            raise DeadlineExceeded(event.get("error", "Deadline exceeded"))
+                        yield event
+        except asyncio.CancelledError:
+            self._cancel_remote(message, target_url)
+            raise
+    
     async def check_health(self, agent_url: str) -> bool:
         """
         Check if agent is healthy
@@ -72,6 +264,9 @@ class NetworkTransport:
         Returns:
             True if agent is healthy, False otherwise
         """
+        if self.local.is_local(agent_url):
+            return await self.local.check_health(agent_url)
+        
         try:
             response = await self.client.get(f"{agent_url}/health", timeout=5.0)
             return response.status_code == 200
@@ -79,9 +274,27 @@ class NetworkTransport:
             logger.error(f"Health check failed for {agent_url}: {e}")
             return False
     
+    def get_metrics(self) -> Dict[str, Any]:
+        """Transport metrics"""
+        metrics = {
+            "coalescing": self.single_flight.get_metrics(),
+            "scheduler": self.scheduler.get_metrics(),
+            "hedging": self.hedger.get_metrics(),
+            "cancellation": {**self.cancel_stats, "local": self.local.cancelled},
+            "local_warm_up_errors": dict(self.local.warm_up_errors)
+        }
+        if self.recorder is not None:
+            metrics["recorder"] = self.recorder.get_stats()
+        return metrics
+    
     async def close(self):
         """Close HTTP client"""
+        if self._cancels:
+            await asyncio.wait(self._cancels, timeout=5.0)
         await self.client.aclose()
+        await self.local.close()
+        if self.recorder is not None:
+            self.recorder.close()
 
 
 class AgentRegistry:
@@ -95,6 +308,16 @@ class AgentRegistry:
         self.agents[agent_name] = url
         logger.info(f"Registered agent {agent_name} at {url}")
     
+    def register_local(self, agent_name: str, executor: Any, use_worker_pool: bool = False,
+                       transport: Optional[LocalTransport] = None):
+        """Register an agent whose executor runs in this process"""
+        transport = transport or local_transport
+        self.register(agent_name, transport.register(agent_name, executor, use_worker_pool))
+    
+    def is_local(self, agent_name: str) -> bool:
+        """Check whether an agent is served in-process"""
+        return LocalTransport.is_local(self.agents.get(agent_name))
+    
     def get_url(self, agent_name: str) -> Optional[str]:
         """Get URL for an agent"""
         return self.agents.get(agent_name)
@@ -112,5 +335,5 @@ class AgentRegistry:
 
 
 # Global instances
-network_transport = NetworkTransport()
+network_transport = NetworkTransport(local=local_transport)
 agent_registry = AgentRegistry()
@@ -0,0 +1,17 @@
+"""Runtime utilities shared by the orchestrator and agent services"""
+
+from .offload import CpuOffloader, cpu_offloader
+from .loop_monitor import LoopLagMonitor, loop_monitor
+from .profiler import SamplingProfiler, profiler
+from .memory import MemoryDiagnostics, memory_diagnostics
+
+__all__ = [
+    'CpuOffloader',
+    'cpu_offloader',
+    'LoopLagMonitor',
+    'loop_monitor',
+    'SamplingProfiler',
+    'profiler',
+    'MemoryDiagnostics',
+    'memory_diagnostics'
+]
@@ -0,0 +1,133 @@
+"""
+Admin Endpoints
+
+Operator-only routes mounted by the orchestrator and every agent service.
+Requests authenticate with `X-Admin-Token: $ADMIN_TOKEN`. When ADMIN_TOKEN
+is unset, the routes answer 404 as if they did not exist.
+
+- GET /admin/profile?seconds=10&format=collapsed|json  timed CPU profile
+- GET /admin/profiles/{id}?format=collapsed|json        a stored profile
+- GET /admin/memory                                     RSS, tracing state, snapshots
+- GET /admin/memory/conversations?limit=20              bytes held per conversation
+- POST/DELETE /admin/memory/tracing?frames=10           start/stop tracemalloc
+- POST /admin/memory/snapshots?label=...                take a snapshot
+- GET /admin/memory/snapshots/{id}?key_type=lineno      top allocation sites
+- GET /admin/memory/diff?base=ID&current=ID             growth between snapshots
+
+A single request is profiled end to end when it carries `X-Profile: 1` with a
+valid admin token. When PROFILE_ALLOW_METADATA=1, an A2A message with
+`metadata.profile` set is profiled too. The profile id comes back in the
+`X-Profile-Id` response header.
+"""
+
+import hmac
+import os
+from typing import Any, Dict, Literal, Optional
+from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi.responses import JSONResponse, PlainTextResponse
+from .profiler import ProfileSession, profiler
+from .memory import memory_diagnostics
+
+ADMIN_TOKEN = os.getenv("ADMIN_TOKEN", "")
+PROFILE_ALLOW_METADATA = os.getenv("PROFILE_ALLOW_METADATA", "0") == "1"
+MAX_PROFILE_SECONDS = float(os.getenv("PROFILE_MAX_SECONDS", "60"))
+
+# tracemalloc grouping of allocation sites
+KeyType = Literal["lineno", "filename", "traceback"]
+
+
+def is_admin(request: Request) -> bool:
+    """Whether the request carries the admin token"""
+    token = request.headers.get("x-admin-token", "")
+    return bool(ADMIN_TOKEN) and hmac.compare_digest(token, ADMIN_TOKEN)
+
+
+async def require_admin(request: Request):
+    if not ADMIN_TOKEN:
+        raise HTTPException(status_code=404, detail="Not Found")
+    if not is_admin(request):
+        raise HTTPException(status_code=403, detail="Admin token required")
+
+
+def wants_profile(request: Request, body: Optional[Dict[str, Any]] = None) -> bool:
+    """Whether a request asked to be profiled and may be"""
+    if request.headers.get("x-profile") and is_admin(request):
+        return True
+    if PROFILE_ALLOW_METADATA and isinstance(body, dict):
+        return bool((body.get("metadata") or {}).get("profile"))
+    return False
+
+
+def render(session: ProfileSession, output: str):
+    """Collapsed stacks as text, or a JSON summary"""
+    if output == "collapsed":
+        return PlainTextResponse(session.collapsed(), headers={"X-Profile-Id": session.id})
+    return JSONResponse(session.to_dict())
+
+
+def admin_router() -> APIRouter:
+    """Routes for profiling and inspection"""
+    router = APIRouter(prefix="/admin", dependencies=[Depends(require_admin)])
+
+    @router.get("/profile")
+    async def profile(seconds: float = 10.0, format: str = "collapsed"):
+        seconds = min(max(seconds, 0.1), MAX_PROFILE_SECONDS)
+        try:
+            session = await profiler.profile(seconds)
+        except RuntimeError as e:
+            raise HTTPException(status_code=409, detail=str(e))
+        return render(session, format)
+
+    @router.get("/profiles/{profile_id}")
+    async def stored_profile(profile_id: str, format: str = "json"):
+        session = profiler.get(profile_id)
+        if session is None:
+            raise HTTPException(status_code=404, detail="Profile not found")
+        return render(session, format)
+
+    @router.get("/profiler")
+    async def profiler_status():
+        return profiler.get_metrics()
+
+    @router.get("/memory")
+    async def memory():
+        return memory_diagnostics.get_metrics()
+
+    @router.get("/memory/conversations")
+    async def memory_by_conversation(limit: int = 20):
+        return await memory_diagnostics.conversation_report(limit)
+
+    @router.post("/memory/tracing")
+    async def start_tracing(frames: int = 10):
+        memory_diagnostics.start_tracing(max(1, min(frames, 100)))
+        return memory_diagnostics.get_metrics()
+
+    @router.delete("/memory/tracing")
+    async def stop_tracing():
+        memory_diagnostics.stop_tracing()
+        return memory_diagnostics.get_metrics()
+
+    @router.post("/memory/snapshots")
+    async def take_snapshot(label: str = "", limit: int = 20):
+        try:
+            snapshot = await memory_diagnostics.take_snapshot(label)
+        except RuntimeError as e:
+            raise HTTPException(status_code=409, detail=str(e))
+        return {**snapshot, "top": await memory_diagnostics.top(snapshot["id"], limit=limit)}
+
+    @router.get("/memory/snapshots/{snapshot_id}")
+    async def snapshot_top(snapshot_id: str, key_type: KeyType = "lineno", limit: int = 20):
+        if snapshot_id not in memory_diagnostics.snapshots:
+            raise HTTPException(status_code=404, detail="Snapshot not found")
+        return {
+            **memory_diagnostics.describe(snapshot_id),
+            "top": await memory_diagnostics.top(snapshot_id, key_type, limit)
+        }
+
+    @router.get("/memory/diff")
+    async def snapshot_diff(base: str, current: str, key_type: KeyType = "lineno", limit: int = 20):
+        if base not in memory_diagnostics.snapshots or current not in memory_diagnostics.snapshots:
+            raise HTTPException(status_code=404, detail="Snapshot not found")
+        return await memory_diagnostics.diff(base, current, key_type, limit)
+
+    return router
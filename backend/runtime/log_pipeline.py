@@ -0,0 +1,256 @@
+"""
+Non-blocking Structured Logging
+
+Log calls on the event loop only enqueue a record. A listener thread formats
+the records as JSON lines and writes them out, so slow disks or pipes (the
+service logs redirected by start_all.sh) never stall a request. Records are
+tagged with the conversation_id and message_id of the work being logged
+(bound per task with `log_context`).
+
+Under load, logging sheds instead of adding latency:
+- INFO and DEBUG records from hot-path loggers are sampled (LOG_SAMPLE_RATE)
+- each logging call site is rate limited (LOG_RATE_LIMIT records per second);
+  the next record that passes carries the number suppressed
+- the queue is bounded (LOG_QUEUE_SIZE) and drops records when full
+
+Warnings and errors are never sampled or rate limited.
+"""
+
+import atexit
+import contextvars
+import copy
+import json
+import logging
+import os
+import queue
+import random
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from logging.handlers import QueueHandler, QueueListener
+from typing import Any, Dict, Iterable, List, Optional
+
+# Fields of the work being logged, set per task
+_log_fields: contextvars.ContextVar[Dict[str, Any]] = contextvars.ContextVar("log_fields", default={})
+
+# Loggers on the per-message path whose INFO records are sampled
+DEFAULT_SAMPLED_LOGGERS = (
+    "protocol.transport",
+    "protocol.local_transport",
+    "a2a.server.request_handlers",
+    "uvicorn.access"
+)
+
+# Standard LogRecord attributes; anything else was passed with extra=
+_RECORD_ATTRS = set(vars(logging.LogRecord("", 0, "", 0, "", None, None))) | {"message", "asctime", "suppressed"}
+
+
+def bind_log_fields(**fields) -> contextvars.Token:
+    """Tag records logged by the current task (and tasks it starts) with fields"""
+    return _log_fields.set({**_log_fields.get(), **{k: v for k, v in fields.items() if v is not None}})
+
+
+@contextmanager
+def log_context(**fields):
+    """Tag records logged inside the block"""
+    token = bind_log_fields(**fields)
+    try:
+        yield
+    finally:
+        _log_fields.reset(token)
+
+
+class ContextFilter(logging.Filter):
+    """Copies the task's log fields onto the record, in the thread that logs"""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        for key, value in _log_fields.get().items():
+            if not hasattr(record, key):
+                setattr(record, key, value)
+        return True
+
+
+class SheddingFilter(logging.Filter):
+    """Sample hot-path records and rate limit each message template"""
+
+    def __init__(self, sampled_loggers: Iterable[str] = DEFAULT_SAMPLED_LOGGERS,
+                 sample_rate: float = 1.0, rate_limit: float = 0.0, burst: Optional[float] = None):
+        super().__init__()
+        self.sampled_loggers = tuple(sampled_loggers)
+        self.sample_rate = sample_rate
+        self.rate_limit = rate_limit
+        self.burst = burst or max(1.0, rate_limit)
+        # Token bucket and suppressed count per call site
+        self._buckets: Dict[tuple, List[float]] = {}
+        self._suppressed: Dict[tuple, int] = {}
+        self._lock = threading.Lock()
+        self.stats = {"sampled_out": 0, "rate_limited": 0}
+
+    def _is_sampled(self, name: str) -> bool:
+        return any(name == prefix or name.startswith(prefix + ".") for prefix in self.sampled_loggers)
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= logging.WARNING:
+            return True
+
+        if self.sample_rate < 1.0 and self._is_sampled(record.name) and random.random() >= self.sample_rate:
+            self.stats["sampled_out"] += 1
+            return False
+
+        if self.rate_limit <= 0:
+            return True
+        # Keyed by call site: messages are mostly f-strings, so templates vary per call
+        key = (record.pathname, record.lineno)
+        now = time.monotonic()
+        with self._lock:
+            bucket = self._buckets.setdefault(key, [self.burst, now])
+            bucket[0] = min(self.burst, bucket[0] + (now - bucket[1]) * self.rate_limit)
+            bucket[1] = now
+            if bucket[0] < 1.0:
+                self._suppressed[key] = self._suppressed.get(key, 0) + 1
+                self.stats["rate_limited"] += 1
+                return False
+            bucket[0] -= 1.0
+            suppressed = self._suppressed.pop(key, 0)
+            if len(self._buckets) > 10000:
+                self._buckets.clear()
+        if suppressed:
+            record.suppressed = suppressed
+        return True
+
+
+class DroppingQueueHandler(QueueHandler):
+    """Enqueues records without blocking; drops them when the queue is full"""
+
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.enqueued = 0
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Keep fields structured; only resolve what cannot cross threads
+        record = copy.copy(record)
+        record.message = record.getMessage()
+        if record.exc_info and not record.exc_text:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+        record.msg = record.message
+        record.args = None
+        record.exc_info = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord):
+        try:
+            self.queue.put_nowait(record)
+            self.enqueued += 1
+        except queue.Full:
+            self.dropped += 1
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line"""
+
+    def __init__(self, service: str):
+        super().__init__()
+        self.service = service
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": round(record.created, 3),
+            "level": record.levelname,
+            "service": self.service,
+            "logger": record.name,
+            "msg": record.getMessage()
+        }
+        for key, value in record.__dict__.items():
+            if key not in _RECORD_ATTRS and not key.startswith("_"):
+                entry[key] = value
+        if getattr(record, "suppressed", 0):
+            entry["suppressed"] = record.suppressed
+        if record.exc_text:
+            entry["exc"] = record.exc_text
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class TextFormatter(logging.Formatter):
+    """Human-readable lines with the context fields appended"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        line = super().format(record)
+        fields = {k: v for k, v in record.__dict__.items() if k not in _RECORD_ATTRS and not k.startswith("_")}
+        if fields:
+            line += " " + " ".join(f"{k}={v}" for k, v in fields.items())
+        if getattr(record, "suppressed", 0):
+            line += f" (+{record.suppressed} suppressed)"
+        return line
+
+
+class LogPipeline:
+    """Root logging through a bounded queue and a writer thread"""
+
+    def __init__(self, service: str, level: str = "INFO", fmt: str = "json",
+                 queue_size: int = 10000, sample_rate: float = 1.0, rate_limit: float = 0.0,
+                 sampled_loggers: Iterable[str] = DEFAULT_SAMPLED_LOGGERS, path: Optional[str] = None):
+        self.service = service
+        self.queue: queue.Queue = queue.Queue(maxsize=queue_size)
+        self.handler = DroppingQueueHandler(self.queue)
+        self.shedding = SheddingFilter(sampled_loggers, sample_rate, rate_limit)
+        self.handler.addFilter(self.shedding)
+        self.handler.addFilter(ContextFilter())
+
+        output = logging.FileHandler(path, encoding="utf-8") if path else logging.StreamHandler(sys.stderr)
+        output.setFormatter(
+            JsonFormatter(service) if fmt == "json"
+            else TextFormatter("%(asctime)s %(levelname)s %(name)s: %(message)s")
+        )
+        self.listener = QueueListener(self.queue, output, respect_handler_level=False)
+
+        root = logging.getLogger()
+        for existing in list(root.handlers):
+            root.removeHandler(existing)
+        root.addHandler(self.handler)
+        root.setLevel(level.upper())
+
+        self.listener.start()
+        self._running = True
+        atexit.register(self.stop)
+
+    def stop(self):
+        """Write out queued records and stop the writer thread"""
+        if self._running:
+            self._running = False
+            self.listener.stop()
+
+    def get_metrics(self) -> Dict[str, Any]:
+        return {
+            "enqueued": self.handler.enqueued,
+            "dropped": self.handler.dropped,
+            "queued": self.queue.qsize(),
+            **self.shedding.stats
+        }
+
+
+_pipeline: Optional[LogPipeline] = None
+
+
+def setup_logging(service: str) -> LogPipeline:
+    """Install the logging pipeline for a service, configured from LOG_* environment variables"""
+    global _pipeline
+    if _pipeline is None:
+        sampled = os.getenv("LOG_SAMPLED_LOGGERS")
+        _pipeline = LogPipeline(
+            service,
+            level=os.getenv("LOG_LEVEL", "INFO"),
+            fmt=os.getenv("LOG_FORMAT", "json"),
+            queue_size=int(os.getenv("LOG_QUEUE_SIZE", "10000")),
+            sample_rate=float(os.getenv("LOG_SAMPLE_RATE", "0.1")),
+            rate_limit=float(os.getenv("LOG_RATE_LIMIT", "20")),
+            sampled_loggers=sampled.split(",") if sampled else DEFAULT_SAMPLED_LOGGERS,
+            path=os.getenv("LOG_FILE")
+        )
+    return _pipeline
+
+
+def logging_metrics() -> Dict[str, Any]:
+    """Pipeline counters, empty when logging is not set up through the pipeline"""
+    return _pipeline.get_metrics() if _pipeline is not None else {}
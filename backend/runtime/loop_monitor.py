@@ -0,0 +1,112 @@
+"""
+Event Loop Lag Monitor
+
+A ticker coroutine measures how late the event loop wakes it up. A watchdog
+thread notices when the loop stops ticking and logs the stack the loop thread
+is stuck in, so the slow callback can be identified without asyncio debug
+mode.
+"""
+
+import asyncio
+import sys
+import threading
+import time
+import traceback
+from collections import deque
+from typing import Dict, Any, Optional
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class LoopLagMonitor:
+    """Reports event loop lag and the callbacks that cause it"""
+
+    def __init__(self, interval: float = 0.1, threshold: float = 0.1, window: int = 600,
+                 stack_depth: int = 12):
+        self.interval = interval
+        self.threshold = threshold
+        self.stack_depth = stack_depth
+        self.samples: deque = deque(maxlen=window)
+        self.slow_events: deque = deque(maxlen=50)
+        self.max_lag = 0.0
+        self.stalls = 0
+        self._last_tick = time.monotonic()
+        self._loop_thread_id: Optional[int] = None
+        self._task: Optional[asyncio.Task] = None
+        self._watchdog: Optional[threading.Thread] = None
+        self._stopped = threading.Event()
+
+    def start(self):
+        """Start monitoring the running event loop"""
+        if self._task is not None:
+            return
+        self._loop_thread_id = threading.get_ident()
+        self._last_tick = time.monotonic()
+        self._stopped.clear()
+        self._task = asyncio.get_running_loop().create_task(self._tick())
+        self._watchdog = threading.Thread(target=self._watch, name="loop-watchdog", daemon=True)
+        self._watchdog.start()
+
+    def stop(self):
+        """Stop monitoring"""
+        self._stopped.set()
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    async def _tick(self):
+        while True:
+            start = time.monotonic()
+            await asyncio.sleep(self.interval)
+            now = time.monotonic()
+            lag = max(0.0, now - start - self.interval)
+            self._last_tick = now
+            self.samples.append(lag)
+            self.max_lag = max(self.max_lag, lag)
+            if lag >= self.threshold:
+                logger.warning(f"Event loop lagged {lag * 1000:.0f} ms")
+
+    def _watch(self):
+        reported_for = None
+        while not self._stopped.wait(self.interval):
+            last_tick = self._last_tick
+            blocked = time.monotonic() - last_tick - self.interval
+            if blocked < self.threshold or reported_for == last_tick:
+                continue
+
+            # Report each stall once, with the stack the loop is executing
+            reported_for = last_tick
+            self.stalls += 1
+            frame = sys._current_frames().get(self._loop_thread_id)
+            stack = traceback.format_stack(frame, limit=self.stack_depth) if frame else []
+            self.slow_events.append({
+                "at": time.time(),
+                "blocked_ms": round(blocked * 1000, 1),
+                "stack": [line.strip() for line in stack]
+            })
+            logger.warning(
+                f"Event loop blocked for {blocked * 1000:.0f} ms in:\n{''.join(stack)}"
+            )
+
+    def get_metrics(self) -> Dict[str, Any]:
+        """Lag statistics over the recent window"""
+        ordered = sorted(self.samples)
+
+        def pct(p):
+            if not ordered:
+                return 0.0
+            return round(ordered[min(len(ordered) - 1, int(p / 100 * len(ordered)))] * 1000, 2)
+
+        return {
+            "samples": len(ordered),
+            "p50_lag_ms": pct(50),
+            "p99_lag_ms": pct(99),
+            "max_lag_ms": round(self.max_lag * 1000, 2),
+            "stalls": self.stalls,
+            "recent_stalls": list(self.slow_events)[-5:]
+        }
+
+
+# Global instance
+loop_monitor = LoopLagMonitor()
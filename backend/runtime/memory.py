@@ -0,0 +1,247 @@
+"""
+Memory Diagnostics
+
+Finds what holds memory in a long-running process without restarting it.
+tracemalloc can be switched on at runtime: snapshots are kept by id, and two
+snapshots can be diffed to find the allocation sites that grew in between.
+Components register memory sources (connection contexts, task stores,
+caches). Sources report the objects they hold, grouped by conversation, and
+the objects are measured on demand.
+"""
+
+import asyncio
+import os
+import sys
+import time
+import tracemalloc
+import uuid
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Conversation key of memory that is not owned by one conversation
+SHARED = "*"
+
+# A source returns {conversation_id or SHARED: {category: object}}
+MemorySource = Callable[[], Dict[str, Dict[str, Any]]]
+
+# Frames of these files are not allocation sites worth reporting
+_IGNORED = (tracemalloc.__file__, "<frozen importlib._bootstrap>", "<frozen importlib._bootstrap_external>", "<unknown>")
+
+
+def deep_size(obj: Any, max_objects: int = 200_000, seen: Optional[set] = None) -> int:
+    """
+    Bytes held by an object and everything reachable through containers
+
+    Args:
+        obj: Object to measure
+        max_objects: Stop once this many objects are seen (including those in `seen`)
+        seen: Ids of objects already counted, shared to count each object once
+    """
+    seen = set() if seen is None else seen
+    stack = [obj]
+    total = 0
+    while stack and len(seen) < max_objects:
+        item = stack.pop()
+        if id(item) in seen:
+            continue
+        seen.add(id(item))
+        total += sys.getsizeof(item)
+        if isinstance(item, dict):
+            stack.extend(item.keys())
+            stack.extend(item.values())
+        elif isinstance(item, (list, tuple, set, frozenset)):
+            stack.extend(item)
+        elif hasattr(item, "__dict__") and not isinstance(item, type):
+            stack.append(item.__dict__)
+    return total
+
+
+def process_rss() -> Optional[int]:
+    """Resident set size in bytes, where the platform reports it"""
+    try:
+        with open("/proc/self/statm") as statm:
+            return int(statm.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        pass
+    try:
+        import resource
+        # Peak rather than current, in KiB on Linux and bytes on macOS
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == "darwin" else peak * 1024
+    except (ImportError, OSError):
+        return None
+
+
+def _format_stat(stat) -> Dict[str, Any]:
+    frame = stat.traceback[0]
+    entry = {
+        "site": f"{frame.filename}:{frame.lineno}",
+        "size_kb": round(stat.size / 1024, 1),
+        "count": stat.count
+    }
+    if hasattr(stat, "size_diff"):
+        entry["size_diff_kb"] = round(stat.size_diff / 1024, 1)
+        entry["count_diff"] = stat.count_diff
+    if len(stat.traceback) > 1:
+        entry["traceback"] = [f"{f.filename}:{f.lineno}" for f in stat.traceback]
+    return entry
+
+
+class MemoryDiagnostics:
+    """tracemalloc snapshots and per-conversation memory accounting"""
+
+    def __init__(self, keep_snapshots: int = 5):
+        self.keep_snapshots = keep_snapshots
+        self.snapshots: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self.sources: Dict[str, MemorySource] = {}
+
+    # --- Sources --------------------------------------------------------------
+
+    def register_source(self, name: str, source: MemorySource):
+        """Report the objects a component holds, by conversation"""
+        self.sources[name] = source
+
+    async def conversation_report(self, limit: int = 20, max_objects: int = 500_000) -> Dict[str, Any]:
+        """
+        Size of what each conversation holds, largest first
+
+        Objects reachable from several conversations are counted once, for
+        the first that reports them. The walk stops after max_objects objects
+        and yields to the event loop between sources and conversations.
+
+        Returns:
+            Conversations with per-category bytes, and memory shared by all
+            conversations (caches, task stores)
+        """
+        conversations: Dict[str, Dict[str, int]] = {}
+        seen: set = set()
+        for name, source in list(self.sources.items()):
+            try:
+                owned = source()
+            except Exception as e:
+                logger.warning(f"Memory source {name} failed: {e}")
+                continue
+            for conversation_id, categories in owned.items():
+                sizes = conversations.setdefault(conversation_id, {})
+                for category, obj in categories.items():
+                    key = f"{name}.{category}"
+                    sizes[key] = sizes.get(key, 0) + deep_size(obj, max_objects, seen)
+                await asyncio.sleep(0)
+                if len(seen) >= max_objects:
+                    break
+            if len(seen) >= max_objects:
+                logger.warning(f"Memory report stopped after {max_objects} objects")
+                break
+
+        shared = conversations.pop(SHARED, {})
+        ranked = sorted(conversations.items(), key=lambda item: sum(item[1].values()), reverse=True)
+        return {
+            "rss_bytes": process_rss(),
+            "conversations": len(ranked),
+            "top": [
+                {"conversation_id": cid, "total_bytes": sum(sizes.values()), "breakdown": sizes}
+                for cid, sizes in ranked[:limit]
+            ],
+            "total_conversation_bytes": sum(sum(sizes.values()) for _, sizes in ranked),
+            "shared": shared,
+            "objects": len(seen),
+            "truncated": len(seen) >= max_objects
+        }
+
+    # --- tracemalloc ----------------------------------------------------------
+
+    @property
+    def tracing(self) -> bool:
+        return tracemalloc.is_tracing()
+
+    def start_tracing(self, frames: int = 10):
+        """Start tracing allocations (costs memory and CPU until stopped)"""
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(frames)
+            logger.info(f"tracemalloc started ({frames} frames)")
+
+    def stop_tracing(self):
+        """Stop tracing; stored snapshots are dropped with the traces"""
+        if tracemalloc.is_tracing():
+            tracemalloc.stop()
+            self.snapshots.clear()
+            logger.info("tracemalloc stopped")
+
+    async def take_snapshot(self, label: str = "") -> Dict[str, Any]:
+        """
+        Snapshot traced allocations and keep it for diffs
+
+        Raises:
+            RuntimeError: Tracing is not started
+        """
+        if not tracemalloc.is_tracing():
+            raise RuntimeError("tracemalloc is not tracing; start it first")
+
+        # Filtering and grouping walk every trace; keep that off the event loop
+        def capture():
+            snapshot = tracemalloc.take_snapshot()
+            return snapshot.filter_traces([tracemalloc.Filter(False, pattern) for pattern in _IGNORED])
+
+        snapshot = await asyncio.to_thread(capture)
+        current, peak = tracemalloc.get_traced_memory()
+        snapshot_id = uuid.uuid4().hex[:12]
+        self.snapshots[snapshot_id] = {
+            "snapshot": snapshot,
+            "label": label,
+            "taken_at": time.time(),
+            "traced_bytes": current,
+            "peak_bytes": peak
+        }
+        while len(self.snapshots) > self.keep_snapshots:
+            self.snapshots.popitem(last=False)
+        return self.describe(snapshot_id)
+
+    def describe(self, snapshot_id: str) -> Dict[str, Any]:
+        entry = self.snapshots[snapshot_id]
+        return {
+            "id": snapshot_id,
+            "label": entry["label"],
+            "taken_at": entry["taken_at"],
+            "traced_bytes": entry["traced_bytes"],
+            "peak_bytes": entry["peak_bytes"]
+        }
+
+    async def top(self, snapshot_id: str, key_type: str = "lineno", limit: int = 20) -> List[Dict[str, Any]]:
+        """Largest allocation sites of a snapshot"""
+        snapshot = self.snapshots[snapshot_id]["snapshot"]
+        stats = await asyncio.to_thread(snapshot.statistics, key_type)
+        return [_format_stat(stat) for stat in stats[:limit]]
+
+    async def diff(self, base_id: str, current_id: str, key_type: str = "lineno",
+                   limit: int = 20) -> Dict[str, Any]:
+        """Allocation sites that grew (or shrank) most between two snapshots"""
+        base = self.snapshots[base_id]
+        current = self.snapshots[current_id]
+        stats = await asyncio.to_thread(current["snapshot"].compare_to, base["snapshot"], key_type)
+        return {
+            "base": self.describe(base_id),
+            "current": self.describe(current_id),
+            "traced_growth_bytes": current["traced_bytes"] - base["traced_bytes"],
+            "top": [_format_stat(stat) for stat in stats[:limit]]
+        }
+
+    def get_metrics(self) -> Dict[str, Any]:
+        current, peak = tracemalloc.get_traced_memory() if tracemalloc.is_tracing() else (0, 0)
+        return {
+            "rss_bytes": process_rss(),
+            "tracing": tracemalloc.is_tracing(),
+            "traced_bytes": current,
+            "traced_peak_bytes": peak,
+            "snapshots": [self.describe(snapshot_id) for snapshot_id in self.snapshots]
+        }
+
+
+# Global instance
+memory_diagnostics = MemoryDiagnostics(keep_snapshots=int(os.getenv("MEMORY_SNAPSHOTS", "5")))
+
+# Trace from startup to catch growth that begins before anyone can attach
+if int(os.getenv("MEMORY_TRACE_FRAMES", "0")) > 0:
+    memory_diagnostics.start_tracing(int(os.getenv("MEMORY_TRACE_FRAMES")))
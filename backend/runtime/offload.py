@@ -0,0 +1,131 @@
+"""
+CPU Offload Executor
+
+Moves CPU-heavy work (large JSON encode/decode, code cleaning, validation)
+off the asyncio event loop so one big project does not stall every other
+session. Work below a size threshold runs inline, where handing it to a pool
+would cost more than it saves.
+"""
+
+import asyncio
+import json
+import os
+import pickle
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from functools import partial
+from typing import Any, Callable, Optional, Union
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+def estimate_size(obj: Any, max_depth: int = 4) -> int:
+    """Rough serialized size of a JSON-like object, in characters"""
+    if isinstance(obj, (str, bytes)):
+        return len(obj)
+    if max_depth <= 0:
+        return 0
+    if isinstance(obj, dict):
+        return sum(len(str(k)) + estimate_size(v, max_depth - 1) for k, v in obj.items())
+    if isinstance(obj, (list, tuple)):
+        return sum(estimate_size(v, max_depth - 1) for v in obj)
+    return 8
+
+
+def _json_dumps(obj: Any, kwargs: dict) -> str:
+    return json.dumps(obj, **kwargs)
+
+
+class CpuOffloader:
+    """Process pool for CPU-bound work with a thread-pool fallback"""
+
+    def __init__(self, max_workers: Optional[int] = None, min_size: int = 128 * 1024,
+                 use_processes: bool = True):
+        self.max_workers = max_workers or min(4, os.cpu_count() or 1)
+        self.min_size = min_size
+        self.use_processes = use_processes
+        self._process_pool: Optional[ProcessPoolExecutor] = None
+        self._thread_pool: Optional[ThreadPoolExecutor] = None
+        self.stats = {"inline": 0, "process": 0, "thread": 0, "fallbacks": 0}
+
+    def _get_process_pool(self) -> Optional[ProcessPoolExecutor]:
+        if not self.use_processes:
+            return None
+        if self._process_pool is None:
+            try:
+                self._process_pool = ProcessPoolExecutor(max_workers=self.max_workers)
+            except (OSError, NotImplementedError, ImportError) as e:
+                logger.warning(f"Process pool unavailable, offloading to threads: {e}")
+                self.use_processes = False
+                return None
+        return self._process_pool
+
+    def _get_thread_pool(self) -> ThreadPoolExecutor:
+        if self._thread_pool is None:
+            self._thread_pool = ThreadPoolExecutor(max_workers=self.max_workers,
+                                                   thread_name_prefix="cpu-offload")
+        return self._thread_pool
+
+    async def run(self, fn: Callable, *args, size: int = 0) -> Any:
+        """
+        Run `fn(*args)`, offloading when the input is large
+
+        Args:
+            fn: Module-level (picklable) function
+            size: Input size used to decide whether offloading pays off
+
+        Returns:
+            Result of the call
+        """
+        if size < self.min_size:
+            self.stats["inline"] += 1
+            return fn(*args)
+
+        loop = asyncio.get_running_loop()
+        call = partial(fn, *args)
+
+        pool = self._get_process_pool()
+        if pool is not None:
+            try:
+                result = await loop.run_in_executor(pool, call)
+                self.stats["process"] += 1
+                return result
+            except (pickle.PicklingError, AttributeError, TypeError, BrokenProcessPool) as e:
+                # Unpicklable callable/arguments or a dead pool: threads still help
+                logger.debug(f"Process offload of {getattr(fn, '__name__', fn)} failed: {e}")
+                self.stats["fallbacks"] += 1
+                if isinstance(e, BrokenProcessPool):
+                    self._process_pool = None
+
+        self.stats["thread"] += 1
+        return await loop.run_in_executor(self._get_thread_pool(), call)
+
+    async def dumps(self, obj: Any, **kwargs) -> str:
+        """json.dumps, offloaded for large objects"""
+        return await self.run(_json_dumps, obj, kwargs, size=estimate_size(obj))
+
+    async def loads(self, data: Union[str, bytes]) -> Any:
+        """json.loads, offloaded for large payloads"""
+        return await self.run(json.loads, data, size=len(data))
+
+    def get_metrics(self):
+        """How work was dispatched"""
+        return {**self.stats, "min_size": self.min_size, "processes": self.use_processes}
+
+    def shutdown(self):
+        """Stop worker pools"""
+        if self._process_pool is not None:
+            self._process_pool.shutdown(wait=False, cancel_futures=True)
+            self._process_pool = None
+        if self._thread_pool is not None:
+            self._thread_pool.shutdown(wait=False, cancel_futures=True)
+            self._thread_pool = None
+
+
+# Global instance
+cpu_offloader = CpuOffloader(
+    max_workers=int(os.getenv("CPU_OFFLOAD_WORKERS", "0")) or None,
+    min_size=int(os.getenv("CPU_OFFLOAD_MIN_BYTES", str(128 * 1024))),
+    use_processes=os.getenv("CPU_OFFLOAD_PROCESSES", "1") == "1"
+)
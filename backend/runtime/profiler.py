@@ -0,0 +1,199 @@
+"""
+Sampling CPU Profiler
+
+A sampler thread reads the stack of every thread (`sys._current_frames()`)
+at a fixed interval and counts collapsed stacks
+(`outer;inner;leaf count`), the input format of flamegraph.pl, speedscope
+and inferno. Sessions are either timed (profile the process for N seconds)
+or tied to one request. The sampler thread only runs while a session is
+active, so there is no overhead when the profiler is off.
+"""
+
+import asyncio
+import os
+import sys
+import threading
+import time
+import uuid
+from collections import Counter, OrderedDict
+from contextlib import asynccontextmanager
+from typing import Dict, Any, List, Optional
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+def collapse(frame, max_depth: int = 64) -> str:
+    """Stack of a frame as one collapsed line, outermost first"""
+    labels = []
+    while frame is not None and len(labels) < max_depth:
+        labels.append(_frame_label(frame))
+        frame = frame.f_back
+    return ";".join(reversed(labels))
+
+
+class ProfileSession:
+    """Samples collected for one timed or per-request profile"""
+
+    def __init__(self, label: str):
+        self.id = uuid.uuid4().hex[:16]
+        self.label = label
+        self.started = time.time()
+        self.duration = 0.0
+        self.samples = 0
+        self.stacks: Counter = Counter()
+        # The sampler thread adds while a session is read from the event loop
+        self._lock = threading.Lock()
+
+    def add(self, stacks: List[str]):
+        with self._lock:
+            self.samples += 1
+            self.stacks.update(stacks)
+
+    def snapshot(self) -> Counter:
+        """Copy of the stack counts, safe to read while sampling continues"""
+        with self._lock:
+            return Counter(self.stacks)
+
+    def collapsed(self) -> str:
+        """Flamegraph input: one `stack count` line per distinct stack"""
+        return "\n".join(f"{stack} {count}" for stack, count in self.snapshot().most_common()) + "\n"
+
+    def top_functions(self, limit: int = 20) -> List[Dict[str, Any]]:
+        """Functions by self samples (leaf frames)"""
+        leaves: Counter = Counter()
+        for stack, count in self.snapshot().items():
+            leaves[stack.rsplit(";", 1)[-1]] += count
+        total = sum(leaves.values()) or 1
+        return [
+            {"function": name, "samples": count, "percent": round(100 * count / total, 1)}
+            for name, count in leaves.most_common(limit)
+        ]
+
+    def to_dict(self, limit: int = 20) -> Dict[str, Any]:
+        with self._lock:
+            samples, distinct = self.samples, len(self.stacks)
+        return {
+            "id": self.id,
+            "label": self.label,
+            "started": self.started,
+            "duration_s": round(self.duration, 3),
+            "samples": samples,
+            "distinct_stacks": distinct,
+            "top_functions": self.top_functions(limit)
+        }
+
+
+class SamplingProfiler:
+    """Process-wide stack sampler shared by all active sessions"""
+
+    def __init__(self, interval: float = 0.005, max_depth: int = 64, keep: int = 20):
+        """
+        Args:
+            interval: Seconds between samples
+            max_depth: Frames kept per stack
+            keep: Finished sessions kept for later retrieval
+        """
+        self.interval = interval
+        self.max_depth = max_depth
+        self.active: Dict[str, ProfileSession] = {}
+        self.finished: "OrderedDict[str, ProfileSession]" = OrderedDict()
+        self.keep = keep
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._timed_running = False
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start_session(self, label: str) -> ProfileSession:
+        """Begin collecting samples into a new session"""
+        session = ProfileSession(label)
+        with self._lock:
+            self.active[session.id] = session
+            if not self.running:
+                self._thread = threading.Thread(target=self._sample, name="profiler", daemon=True)
+                self._thread.start()
+        return session
+
+    def stop_session(self, session: ProfileSession) -> ProfileSession:
+        """Stop collecting into a session and keep it for retrieval"""
+        session.duration = time.time() - session.started
+        with self._lock:
+            self.active.pop(session.id, None)
+            self.finished[session.id] = session
+            while len(self.finished) > self.keep:
+                self.finished.popitem(last=False)
+        return session
+
+    def get(self, session_id: str) -> Optional[ProfileSession]:
+        return self.finished.get(session_id) or self.active.get(session_id)
+
+    def _sample(self):
+        own = threading.get_ident()
+        names = {}
+        while True:
+            with self._lock:
+                sessions = list(self.active.values())
+                if not sessions:
+                    # Nothing to profile: the thread exits and costs nothing until the next session
+                    self._thread = None
+                    return
+
+            frames = sys._current_frames()
+            if any(ident not in names for ident in frames):
+                names = {t.ident: t.name for t in threading.enumerate()}
+            stacks = [
+                f"{names.get(ident, ident)};{collapse(frame, self.max_depth)}"
+                for ident, frame in frames.items()
+                if ident != own
+            ]
+            del frames
+            for session in sessions:
+                session.add(stacks)
+            time.sleep(self.interval)
+
+    async def profile(self, seconds: float, label: str = "timed") -> ProfileSession:
+        """
+        Profile the whole process for a number of seconds
+
+        Raises:
+            RuntimeError: Another timed profile is running
+        """
+        if self._timed_running:
+            raise RuntimeError("A timed profile is already running")
+        self._timed_running = True
+        session = self.start_session(label)
+        try:
+            await asyncio.sleep(seconds)
+        finally:
+            self.stop_session(session)
+            self._timed_running = False
+        return session
+
+    @asynccontextmanager
+    async def profile_request(self, label: str):
+        """Profile the process while one request runs; concurrent work shows up too"""
+        session = self.start_session(label)
+        try:
+            yield session
+        finally:
+            self.stop_session(session)
+            logger.info(f"Profiled {label}: {session.samples} samples, id {session.id}")
+
+    def get_metrics(self) -> Dict[str, Any]:
+        return {
+            "running": self.running,
+            "active_sessions": len(self.active),
+            "finished_sessions": list(self.finished)
+        }
+
+
+# Global instance
+profiler = SamplingProfiler(interval=float(os.getenv("PROFILER_INTERVAL_MS", "5")) / 1000)
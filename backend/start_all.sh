@@ -13,6 +13,9 @@ lsof -ti:8002 | xargs kill -9 2>/dev/null || true
 lsof -ti:8003 | xargs kill -9 2>/dev/null || true
 lsof -ti:8000 | xargs kill -9 2>/dev/null || true
 
+# Agent services authenticate their progress notifications to the orchestrator
+export AGENT_TOKEN="${AGENT_TOKEN:-$(python3 -c 'import secrets; print(secrets.token_hex(16))')}"
+
 # Start agent services in background
 echo ""
 echo "Current directory: $(pwd)"
@@ -0,0 +1,10 @@
+import os
+import sys
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Tests import backend packages (protocol, orchestrator, agents) and service
+# modules (checks, component_plan) the way the services do
+sys.path.insert(0, BACKEND_DIR)
+for service in ("tester-service", "developer-service"):
+    sys.path.insert(0, os.path.join(BACKEND_DIR, "agents", service))
@@ -0,0 +1,66 @@
+import asyncio
+import os
+
+from bundler.bundler import ProjectBundler, staged_path
+
+
+def test_staged_path_stays_under_root(tmp_path):
+    root = str(tmp_path / "src")
+    assert staged_path(root, "/App.js") == os.path.join(os.path.realpath(root), "App.js")
+    assert staged_path(root, "/components/List.js").endswith(os.path.join("src", "components", "List.js"))
+    assert staged_path(root, "/components/../App.js").endswith(os.path.join("src", "App.js"))
+
+
+def test_staged_path_rejects_escapes(tmp_path):
+    root = str(tmp_path / "src")
+    assert staged_path(root, "/../../../home/app/.profile.css") is None
+    assert staged_path(root, "/components/../../outside.js") is None
+    assert staged_path(root, "/") is None
+    assert staged_path(root, "/.") is None
+
+
+def test_bundle_fails_on_escaping_path_without_writing(tmp_path):
+    bundler = ProjectBundler(cache_dir=str(tmp_path / "cache"), esbuild="esbuild")
+    staging = tmp_path / "staging"
+    staging.mkdir()
+    files = {"/App.js": "export default function App() {}", "/../../escaped.css": "body {}"}
+
+    result = asyncio.run(bundler._bundle("key", files, str(staging)))
+
+    assert result.status == "failed"
+    assert "outside the project" in result.errors[0]
+    assert not (tmp_path / "escaped.css").exists()
+    assert not (staging / "src").exists()
+
+
+def _artifact(cache, key, size, used):
+    path = cache / key
+    path.mkdir(parents=True)
+    (path / "bundle.js").write_text("x" * size)
+    os.utime(path, (used, used))
+    return path
+
+
+def test_prune_evicts_least_recently_used_artifacts(tmp_path):
+    cache = tmp_path / "cache"
+    old = _artifact(cache, "a" * 32, 600, used=1000)
+    recent = _artifact(cache, "b" * 32, 600, used=2000)
+    (cache / "modules").mkdir()
+    module = cache / "modules" / "m.js"
+    module.write_text("y" * 100)
+    os.utime(module, (3000, 3000))
+
+    bundler = ProjectBundler(cache_dir=str(cache), esbuild="esbuild", max_disk_bytes=1000)
+    assert bundler.prune() == ["a" * 32]
+    assert not old.exists() and recent.exists() and module.exists()
+    assert bundler.prune() == []
+
+
+def test_pruned_artifact_is_not_served_from_memory(tmp_path):
+    from bundler.bundler import BundleResult
+
+    bundler = ProjectBundler(cache_dir=str(tmp_path / "cache"), esbuild="esbuild")
+    bundler._remember(BundleResult(key="c" * 32, status="built"))
+
+    assert bundler._recall("c" * 32) is None
+    assert "c" * 32 not in bundler.results
@@ -0,0 +1,63 @@
+import asyncio
+
+import pytest
+
+from protocol import Notification
+from protocol.bus import BrokerBackend, MessageBus
+
+
+def _note(i=0):
+    return Notification(from_agent="Developer", to_agent="Orchestrator", event="progress",
+                        data={"i": i}, conversation_id="conv")
+
+
+class SlowBroker(BrokerBackend):
+    def __init__(self, delay):
+        self.delay = delay
+        self.delivered = 0
+
+    def publish(self, topic, message):
+        pass
+
+    async def flush(self):
+        await asyncio.sleep(self.delay)
+        self.delivered += 1
+
+
+def test_bounded_flush_returns_and_delivery_continues():
+    broker = SlowBroker(0.2)
+    bus = MessageBus(broker)
+
+    async def run():
+        await bus.flush(timeout=0.01)
+        assert broker.delivered == 0
+        await asyncio.sleep(0.3)
+
+    asyncio.run(run())
+    assert broker.delivered == 1
+    assert bus.flush_timeouts == 1
+
+
+def test_flush_does_not_drop_batch_being_posted():
+    pytest.importorskip("httpx")
+    from protocol.bus import HttpForwardBroker
+
+    posted = []
+
+    class SlowClient:
+        async def post(self, url, json):
+            await asyncio.sleep(0.05)
+            posted.extend(json)
+
+    async def run():
+        broker = HttpForwardBroker("http://orchestrator/notifications", max_delay=0.01)
+        broker.client = SlowClient()
+        for i in range(3):
+            broker.publish("conv", _note(i))
+        # The delayed flush has taken the batch and is posting it
+        await asyncio.sleep(0.03)
+        broker.publish("conv", _note(3))
+        await broker.flush()
+
+    asyncio.run(run())
+    assert [m["content"]["data"]["i"] for m in posted] == [0, 1, 2, 3]
@@ -0,0 +1,36 @@
+import pytest
+
+from checks import scan_delimiters
+
+
+@pytest.mark.parametrize("code", [
+    # JSX text is not code
+    "const App = () => <p>Loading (please wait</p>;",
+    "function App() {\n  return (\n    <div className=\"box\">\n      <p>Tom's list [draft}</p>\n    </div>\n  );\n}",
+    "const a = <>{items.map(i => <li key={i}>{i} :)</li>)}</>;",
+    "const b = cond ? <Foo.Bar x={{ a: 1 }} /> : <br/>;",
+    "return (\n  <input\n    value={v}\n  />\n);",
+    # Regex literals are not code
+    "const re = /[(]/;",
+    "const parts = text.split(/[}{]+/g);",
+    "if (/^\\/\\*/.test(line)) { skip(); }",
+    # Division and comparison stay operators
+    "const half = (a + b) / 2 / scale;",
+    "for (let i = 0; i<n; i++) { total += i > 2 ? 1 : 0; }",
+    "const s = `a ${b ? `c${d}` : '}'} e`;",
+])
+def test_valid_code_has_no_delimiter_errors(code):
+    assert scan_delimiters(code) == []
+
+
+@pytest.mark.parametrize("code, error", [
+    ("function App() {\n  return <div>hi</div>;\n", "Unclosed '{'"),
+    ("const a = (1 + 2];", "Unexpected ']'"),
+    ("const x = <div><p>text</div>;", "Unexpected '</div>'"),
+    ("const y = <div>{value</div>;", "Unclosed"),
+    ("const s = 'open;\n", "Unterminated string"),
+    ("/* never closed", "Unterminated block comment"),
+])
+def test_real_errors_are_reported(code, error):
+    errors = scan_delimiters(code)
+    assert errors and errors[0].startswith(error)
@@ -0,0 +1,88 @@
+import asyncio
+
+import pytest
+
+from protocol.coalescing import SingleFlight, load_coalesce_policy, request_key
+from protocol.deadline import DeadlineExceeded, deadline_scope, remaining
+from protocol.scheduler import current_priority
+
+
+def test_waiters_share_one_execution():
+    flight = SingleFlight()
+    calls = []
+
+    async def work():
+        calls.append(1)
+        await asyncio.sleep(0.05)
+        return "done"
+
+    async def run():
+        return await asyncio.gather(*(flight.do("k", work) for _ in range(3)))
+
+    assert asyncio.run(run()) == ["done"] * 3
+    assert len(calls) == 1
+    assert flight.get_metrics()["coalesced"] == 2
+
+
+def test_shared_work_outlives_first_callers_deadline():
+    flight = SingleFlight()
+    seen = {}
+
+    async def work():
+        seen["deadline"] = remaining()
+        seen["priority"] = current_priority.get()
+        await asyncio.sleep(0.3)
+        return "done"
+
+    async def caller(budget):
+        with deadline_scope(budget):
+            current_priority.set("interactive")
+            return await flight.do("k", work)
+
+    async def run():
+        return await asyncio.gather(caller(0.1), caller(100), return_exceptions=True)
+
+    short, long = asyncio.run(run())
+    assert isinstance(short, DeadlineExceeded)
+    assert long == "done"
+    assert seen == {"deadline": None, "priority": None}
+
+
+def test_work_is_cancelled_when_last_waiter_gives_up():
+    flight = SingleFlight()
+
+    async def run():
+        started = asyncio.Event()
+        stopped = []
+
+        async def work():
+            started.set()
+            try:
+                await asyncio.sleep(10)
+            except asyncio.CancelledError:
+                stopped.append(True)
+                raise
+
+        with deadline_scope(0.05):
+            with pytest.raises(DeadlineExceeded):
+                await flight.do("k", work)
+        await asyncio.sleep(0)
+        return stopped
+
+    assert asyncio.run(run()) == [True]
+    assert flight.get_metrics()["abandoned"] == 1
+    assert flight.in_flight == {}
+
+
+def test_sampled_generation_is_not_coalesced_by_default(monkeypatch):
+    monkeypatch.delenv("COALESCE_ACTIONS", raising=False)
+    assert load_coalesce_policy() == {"analyze_request": True, "test_code": True}
+
+    monkeypatch.setenv("COALESCE_ACTIONS", "analyze_request,generate_code")
+    assert load_coalesce_policy() == {"analyze_request": True, "generate_code": True}
+
+
+def test_requests_of_different_conversations_do_not_share():
+    params = {"task": " todo app "}
+    assert request_key("a", "analyze_request", params, "conv_1") == request_key("a", "analyze_request", {"task": "todo app"}, "conv_1")
+    assert request_key("a", "analyze_request", params, "conv_1") != request_key("a", "analyze_request", params, "conv_2")
@@ -0,0 +1,77 @@
+import asyncio
+import json
+
+import pytest
+
+from component_plan import PlanError, fallback_component, parse_plan, stitch_imports
+
+PLAN = {
+    "components": [
+        {"name": "TodoInput", "description": "adds a todo", "props": {"onAdd": "(text: string) => void"}},
+        {"name": "TodoList", "description": "lists todos", "props": {"items": "Todo[]"}},
+    ],
+    "state": [{"name": "todos", "type": "Todo[]"}],
+    "layout": "input above the list",
+}
+
+
+def test_plan_contract_names_files_and_props():
+    plan = parse_plan("```json\n" + json.dumps(PLAN) + "\n```")
+    contract = plan.contract()
+    assert "/components/TodoInput.js: default export TodoInput" in contract
+    assert "onAdd: (text: string) => void" in contract
+    assert "- todos (Todo[])" in contract
+
+
+@pytest.mark.parametrize("components", [
+    [{"name": "todoList"}],
+    [{"name": "App"}],
+    [{"name": "List"}, {"name": "List"}],
+    [{"name": "List", "props": {"on click": "() => void"}}],
+])
+def test_invalid_plans_are_rejected(components):
+    with pytest.raises(PlanError):
+        parse_plan(json.dumps({"components": components}))
+
+
+def test_missing_imports_are_stitched_after_multiline_imports():
+    plan = parse_plan(json.dumps(PLAN))
+    app = "import React, {\n  useState\n} from 'react';\nimport TodoList from './components/TodoList';\n\nexport default function App() {}"
+    lines = stitch_imports(app, plan).split("\n")
+    assert lines[3:5] == ["import TodoList from './components/TodoList';",
+                          "import TodoInput from './components/TodoInput';"]
+
+
+def test_fallback_component_honours_props():
+    plan = parse_plan(json.dumps(PLAN))
+    code = fallback_component(plan.components[0])
+    assert "export default function TodoInput({ onAdd })" in code
+    assert 'className="todo-input"' in code
+
+
+def test_edits_target_the_components_a_request_names():
+    pytest.importorskip("dotenv")
+    from developer_agent import DeveloperAgentExecutor
+
+    files = {
+        "/App.js": "export default function App() {}",
+        "/components/Footer.js": "export default function Footer() { return <footer className='footer'/>; }",
+        "/components/TodoList.js": "export default function TodoList() { return <ul className='todo-items'/>; }",
+    }
+    targets = DeveloperAgentExecutor._edit_targets
+    assert targets(files, "add a counter to the footer") == ["/components/Footer.js"]
+    assert targets(files, "number the todo-items") == ["/components/TodoList.js"]
+    assert targets(files, "add a dark mode toggle") == ["/App.js", "/components/Footer.js", "/components/TodoList.js"]
+    assert targets({"/App.js": ""}, "anything") == ["/App.js"]
+
+
+def test_empty_edit_keeps_a_component_file():
+    pytest.importorskip("dotenv")
+    from context_packer import PackedContext
+    from developer_agent import DeveloperAgentExecutor
+
+    developer = object.__new__(DeveloperAgentExecutor)
+    current = "export default function Footer({ count }) { return <footer>{count}</footer>; }"
+    packed = PackedContext(text=current, complete=True, tokens=20)
+    code = asyncio.run(developer._apply_edit("/components/Footer.js", current, "```\n\n```", packed))
+    assert code == current
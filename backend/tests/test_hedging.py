@@ -0,0 +1,45 @@
+import asyncio
+
+from protocol import Request
+from protocol.hedging import Hedger
+from protocol.scheduler import FairScheduler, QuotaTracker
+
+
+def _request():
+    return Request(from_agent="Orchestrator", to_agent="Analyst", action="analyze_request",
+                   parameters={"task": "x"}, conversation_id="conv_a")
+
+
+def test_losing_primary_is_recorded_with_its_elapsed_time():
+    hedger = Hedger(min_delay=0.01, budget=1.0, min_samples=1)
+    hedger.latency.record("Analyst:analyze_request", 0.01)
+
+    async def send(message, url):
+        if message.metadata.get("hedge"):
+            return {"ok": "hedge"}
+        await asyncio.sleep(0.2)
+        return {"ok": "primary"}
+
+    async def run():
+        result = await hedger.run("analyze_request", "Analyst:analyze_request", "http://analyst", _request(), send)
+        await asyncio.sleep(0)
+        return result
+
+    assert asyncio.run(run()) == {"ok": "hedge"}
+    samples = list(hedger.latency.samples["Analyst:analyze_request"])
+    # The cancelled primary ran at least as long as the hedge delay
+    assert len(samples) == 2 and samples[1] >= 0.01
+
+
+def test_duplicate_takes_a_slot_without_charging_the_quota():
+    scheduler = FairScheduler(capacity=1, quotas=QuotaTracker(max_requests=1))
+
+    async def run():
+        async with scheduler.slot(_request(), "http://analyst"):
+            pass
+        # Over quota, yet the duplicate is still admitted and not counted
+        async with scheduler.slot(_request(), "http://replica", charge=False):
+            assert scheduler.queues["http://replica"].in_flight == 1
+        return scheduler.quotas.get_usage("conv_a")
+
+    assert asyncio.run(run())["requests"] == 1
@@ -0,0 +1,104 @@
+import asyncio
+import threading
+
+from protocol import Request
+from protocol.local_transport import LocalTransport
+
+
+class ThreadRecordingExecutor:
+    def __init__(self):
+        self.threads = set()
+        self.warm_thread = None
+        self.cancelled = threading.Event()
+
+    async def warm_up(self):
+        self.warm_thread = threading.get_ident()
+
+    async def execute(self, task_data):
+        self.threads.add(threading.get_ident())
+        if task_data["content"]["action"] == "hang":
+            try:
+                await asyncio.sleep(10)
+            except asyncio.CancelledError:
+                self.cancelled.set()
+                raise
+        await asyncio.sleep(0.01)
+        return {"status": "ok"}
+
+
+def _request(action="analyze_request"):
+    return Request(from_agent="Orchestrator", to_agent="Analyst", action=action, conversation_id="conv")
+
+
+def test_pooled_agent_is_pinned_to_one_worker_thread():
+    transport = LocalTransport()
+    executor = ThreadRecordingExecutor()
+    url = transport.register("Analyst", executor, use_worker_pool=True)
+
+    async def run():
+        await transport.warm_up()
+        results = await asyncio.gather(*(transport.send_message(_request(), url) for _ in range(8)))
+        await transport.close()
+        return results
+
+    assert asyncio.run(run()) == [{"status": "ok"}] * 8
+    assert len(executor.threads) == 1
+    assert executor.threads == {executor.warm_thread}
+    assert threading.get_ident() not in executor.threads
+
+
+def test_cancelling_the_caller_cancels_pooled_work():
+    transport = LocalTransport()
+    executor = ThreadRecordingExecutor()
+    url = transport.register("Analyst", executor, use_worker_pool=True)
+
+    async def run():
+        task = asyncio.ensure_future(transport.send_message(_request("hang"), url))
+        await asyncio.sleep(0.05)
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+        await asyncio.to_thread(executor.cancelled.wait, 2)
+        await transport.close()
+
+    asyncio.run(run())
+    assert executor.cancelled.is_set()
+    assert transport.cancelled == 1
+
+
+class SlowWarmUpExecutor:
+    def __init__(self, fail=False):
+        self.fail = fail
+        self.warm = False
+
+    async def warm_up(self):
+        await asyncio.sleep(0.05)
+        if self.fail:
+            raise RuntimeError("no API key")
+        self.warm = True
+
+    async def execute(self, task_data):
+        return {"warm": self.warm}
+
+
+def test_first_dispatch_waits_for_warm_up():
+    transport = LocalTransport()
+    url = transport.register("Analyst", SlowWarmUpExecutor())
+
+    async def run():
+        transport.start_warm_up()
+        return await transport.send_message(_request(), url)
+
+    assert asyncio.run(run()) == {"warm": True}
+
+
+def test_failed_warm_up_is_reported():
+    transport = LocalTransport()
+    url = transport.register("Analyst", SlowWarmUpExecutor(fail=True))
+
+    async def run():
+        transport.start_warm_up()
+        await transport.warm_up_task
+        return await transport.check_health(url)
+
+    assert asyncio.run(run()) is False
+    assert transport.warm_up_errors == {url: "no API key"}
@@ -0,0 +1,28 @@
+import asyncio
+
+from runtime.memory import SHARED, MemoryDiagnostics, deep_size
+
+
+def test_object_shared_by_conversations_is_counted_once():
+    files = {"/App.js": "x" * 10_000}
+    diagnostics = MemoryDiagnostics()
+    diagnostics.register_source("connections", lambda: {
+        "conv_a": {"files": files},
+        "conv_b": {"files": files},
+        SHARED: {"cache": files}
+    })
+
+    report = asyncio.run(diagnostics.conversation_report())
+    assert report["total_conversation_bytes"] + sum(report["shared"].values()) == deep_size(files)
+    assert not report["truncated"]
+
+
+def test_report_stops_at_the_object_budget():
+    diagnostics = MemoryDiagnostics()
+    diagnostics.register_source("connections", lambda: {
+        f"conv_{i}": {"history": [str(n) for n in range(100)]} for i in range(50)
+    })
+
+    report = asyncio.run(diagnostics.conversation_report(max_objects=500))
+    assert report["truncated"]
+    assert report["objects"] <= 500 and report["conversations"] < 50
@@ -0,0 +1,33 @@
+import asyncio
+import gc
+import json
+
+from orchestrator.outbound import OutboundChannel, OutboundMetrics
+
+
+class _Socket:
+    def __init__(self):
+        self.frames = []
+
+    async def send_text(self, text):
+        await asyncio.sleep(0.01)
+        self.frames.append(json.loads(text))
+
+
+def test_timer_flush_keeps_its_task():
+    socket = _Socket()
+    channel = OutboundChannel(socket, protocol=2, window=0.01, metrics=OutboundMetrics())
+
+    async def run():
+        await channel.send({"role": "system", "agent": "System", "content": "a"})
+        await channel.send({"role": "system", "agent": "System", "content": "b"})
+        await asyncio.sleep(0.015)
+        gc.collect()
+        assert channel._flush_task is not None
+        await channel._flush_task
+
+    asyncio.run(run())
+    assert socket.frames == [{"type": "batch", "messages": [
+        {"role": "system", "agent": "System", "content": "a"},
+        {"role": "system", "agent": "System", "content": "b"}
+    ]}]
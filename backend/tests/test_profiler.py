@@ -0,0 +1,28 @@
+import threading
+import time
+
+from runtime.profiler import ProfileSession
+
+
+def test_running_session_can_be_read_while_sampling():
+    session = ProfileSession("test")
+    stop = threading.Event()
+
+    def sample():
+        i = 0
+        while not stop.is_set():
+            # New distinct stacks grow the counter under the reader
+            session.add([f"main;work{i % 5000}"])
+            i += 1
+            time.sleep(0)
+
+    sampler = threading.Thread(target=sample)
+    sampler.start()
+    try:
+        for _ in range(50):
+            session.collapsed()
+            session.to_dict()
+    finally:
+        stop.set()
+        sampler.join()
+    assert sum(session.snapshot().values()) == session.samples
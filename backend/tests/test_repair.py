@@ -0,0 +1,91 @@
+import asyncio
+
+from orchestrator.repair import RepairEngine
+from protocol.deadline import deadline_scope
+
+
+class StubRegistry:
+    def get_url(self, name):
+        return f"http://{name.lower()}"
+
+
+class StubTransport:
+    """Developer returns a candidate per temperature; the Tester passes only fixed code"""
+
+    def __init__(self, fixing_temperature=None):
+        self.fixing_temperature = fixing_temperature
+        self.sent = []
+
+    async def send_message(self, request, url):
+        action = request.content["action"]
+        params = request.content["parameters"]
+        self.sent.append(action)
+        if action == "fix_bug":
+            fixed = params["temperature"] == self.fixing_temperature
+            code = "fixed" if fixed else "still broken"
+            return {"files": {"/App.js": code}, "usage": {"total_tokens": 100}}
+        if params["files"]["/App.js"] == "fixed":
+            return {"status": "passed", "errors": []}
+        return {"status": "failed", "errors": ["/App.js: broken"]}
+
+
+def _repair(engine, **kwargs):
+    failing = {"status": "failed", "errors": ["/App.js: broken"]}
+    return asyncio.run(engine.repair({"/App.js": "broken"}, failing, "conv", **kwargs))
+
+
+def test_repair_accepts_passing_candidate():
+    transport = StubTransport(fixing_temperature=0.6)
+    result = _repair(RepairEngine(transport, StubRegistry(), candidates=3, max_iterations=1))
+
+    assert result.passed
+    assert result.files == {"/App.js": "fixed"}
+    assert result.accepted_candidate == 1
+    assert result.iterations == 1
+
+
+def test_repair_keeps_best_attempt_when_nothing_passes():
+    transport = StubTransport()
+    result = _repair(RepairEngine(transport, StubRegistry(), candidates=2, max_iterations=2))
+
+    assert result.status == "failed"
+    assert result.iterations == 2
+    assert result.candidates_tried == 4
+    assert result.tokens_used == 400
+
+
+def test_repair_stops_on_token_budget():
+    transport = StubTransport()
+    result = _repair(RepairEngine(transport, StubRegistry(), token_budget=10))
+
+    assert result.status == "budget_exhausted"
+    assert transport.sent == []
+
+
+def test_repair_stops_near_deadline():
+    transport = StubTransport(fixing_temperature=0.2)
+    engine = RepairEngine(transport, StubRegistry(), min_iteration_seconds=15)
+
+    async def run():
+        with deadline_scope(5):
+            return await engine.repair({"/App.js": "broken"}, {"status": "failed", "errors": []}, "conv")
+
+    result = asyncio.run(run())
+    assert result.status == "deadline_exceeded"
+    assert transport.sent == []
+
+
+def test_unfinished_tests_are_not_repaired():
+    transport = StubTransport(fixing_temperature=0.2)
+    incomplete = {"status": "incomplete", "errors": [], "warnings": ["Test suite time budget exceeded"]}
+    result = asyncio.run(RepairEngine(transport, StubRegistry()).repair({"/App.js": "code"}, incomplete, "conv"))
+
+    assert result.status == "not_verified"
+    assert transport.sent == []
+
+
+def test_token_estimate_covers_component_files():
+    single = {"/App.js": "x" * 4000, "/index.js": "y" * 4000, "/styles.css": "z" * 4000}
+    split = {**single, "/App.js": "x" * 400, "/components/TodoList.js": "x" * 3600}
+
+    assert RepairEngine._estimate_tokens(split, []) == RepairEngine._estimate_tokens(single, []) == 2200
@@ -0,0 +1,52 @@
+import asyncio
+
+import pytest
+
+from protocol import Request
+from protocol.scheduler import FairScheduler, QuotaExceeded, QuotaTracker, current_user
+
+
+def _request(conversation_id):
+    return Request(from_agent="Orchestrator", to_agent="Analyst", action="analyze_request",
+                   parameters={"task": "x"}, conversation_id=conversation_id)
+
+
+def test_flow_is_the_client_not_the_conversation():
+    token = current_user.set("ip:10.0.0.5")
+    try:
+        assert FairScheduler.classify(_request("conv_a"))[0] == "ip:10.0.0.5"
+        assert FairScheduler.classify(_request("conv_b"))[0] == "ip:10.0.0.5"
+    finally:
+        current_user.reset(token)
+    assert FairScheduler.classify(_request("conv_a"))[0] == "conv_a"
+
+
+def test_new_conversation_does_not_reset_quota():
+    scheduler = FairScheduler(quotas=QuotaTracker(max_requests=1))
+
+    async def send(conversation_id):
+        async with scheduler.slot(_request(conversation_id), "http://analyst") as grant:
+            grant["tokens"] = 10
+
+    async def run():
+        current_user.set("ip:10.0.0.5")
+        await send("conv_a")
+        with pytest.raises(QuotaExceeded):
+            await send("conv_b")
+
+    asyncio.run(run())
+
+
+def test_quota_usage_is_forgotten_after_the_window(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr("protocol.scheduler.time.monotonic", lambda: now[0])
+    quotas = QuotaTracker(max_requests=5, window=60)
+    quotas._last_sweep = now[0]
+    for i in range(3):
+        quotas.record(f"conv_{i}", 10)
+    assert len(quotas.usage) == 3
+
+    now[0] += 61
+    assert quotas.get_usage("conv_0") == {"requests": 0, "tokens": 0}
+    quotas.record("conv_new", 10)
+    assert list(quotas.usage) == ["conv_new"]
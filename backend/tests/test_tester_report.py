@@ -0,0 +1,29 @@
+import pytest
+
+pytest.importorskip("dotenv")
+
+import tester_agent
+
+
+def _check(name, status, errors=()):
+    return {"name": name, "file": "/App.js", "category": "syntax", "status": status,
+            "errors": list(errors), "duration_ms": None if status == "timeout" else 1.0}
+
+
+def _report(results):
+    return object.__new__(tester_agent.TesterAgentExecutor)._report(results, 10.0)
+
+
+def test_timeouts_alone_leave_the_suite_incomplete():
+    report = _report([_check("imports", "passed"), _check("bundle_build", "timeout")])
+
+    assert report["status"] == "incomplete"
+    assert report["errors"] == []
+    assert report["tests_failed"] == 0 and report["tests_timed_out"] == 1
+
+
+def test_real_errors_still_fail_the_suite():
+    report = _report([_check("delimiters", "failed", ["Unclosed {"]), _check("bundle_build", "timeout")])
+
+    assert report["status"] == "failed"
+    assert report["errors"] == ["/App.js: Unclosed {"]
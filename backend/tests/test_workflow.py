@@ -0,0 +1,49 @@
+import asyncio
+import os
+
+import pytest
+
+from orchestrator.checkpoints import CheckpointStore
+from orchestrator.workflow import AUTO_RESUME_STATUSES, BACKEND_DIR, PipelineWorkflow, workflow_from_env
+
+
+class _HangingGraph:
+    async def ainvoke(self, state, config):
+        await asyncio.sleep(10)
+
+
+async def _noop(*args):
+    pass
+
+
+@pytest.mark.parametrize("reason, status", [
+    ("client", "cancelled"),
+    ("superseded", "cancelled"),
+    ("disconnect", "interrupted"),
+    (None, "interrupted")
+])
+def test_cancel_reason_decides_whether_a_run_resumes(reason, status):
+    store = CheckpointStore()
+    workflow = PipelineWorkflow(transport=None, registry=None, repair_engine=None, store=store)
+    workflow._graph = _HangingGraph()
+
+    async def run():
+        turn = asyncio.ensure_future(workflow.start(
+            {"conversation_id": "conv"}, _noop, _noop, cancel_reason=lambda: reason
+        ))
+        await asyncio.sleep(0.05)
+        turn.cancel()
+        await asyncio.gather(turn, return_exceptions=True)
+        return await store.alatest_run("conv")
+
+    run = asyncio.run(run())
+    assert run["status"] == status
+    assert (run["status"] in AUTO_RESUME_STATUSES) == (reason not in ("client", "superseded"))
+
+
+def test_checkpoints_live_under_the_backend_dir(monkeypatch, tmp_path):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv("WORKFLOW_CHECKPOINT_PATH", "cache/runs.sqlite3")
+    store = workflow_from_env(None, None, None).store
+
+    assert store.path == os.path.join(BACKEND_DIR, "cache", "runs.sqlite3")
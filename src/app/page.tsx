@@ -13,6 +13,7 @@ export default function Home() {
     role: 'user' | 'assistant' | 'system';
     content: string;
     agent?: string;
+    streamId?: string;
   }>>([
     {
       role: 'system',
@@ -22,30 +23,100 @@ export default function Home() {
   ]);
 
   const wsRef = useRef<WebSocket | null>(null);
+  const conversationIdRef = useRef<string | null>(null);
+  // File versions received, kept until the server diffs against a newer one
+  const snapshotsRef = useRef<Map<number, Record<string, string>>>(new Map());
+
+  const applyFiles = (ws: WebSocket, data: any) => {
+    const snapshots = snapshotsRef.current;
+    let next: Record<string, string>;
+    let version: number;
+    
+    if (data.files_delta) {
+      const delta = data.files_delta;
+      const base = snapshots.get(delta.base);
+      if (!base) {
+        ws.send(JSON.stringify({ type: 'resync' }));
+        return;
+      }
+      next = { ...base, ...delta.changed };
+      delta.removed.forEach((path: string) => delete next[path]);
+      version = delta.version;
+      // Deltas are never based on versions older than the last acknowledged one
+      Array.from(snapshots.keys()).forEach(v => v < delta.base && snapshots.delete(v));
+    } else {
+      next = data.files;
+      version = data.files_version;
+    }
+    
+    setFiles(next);
+    if (version !== undefined) {
+      snapshots.set(version, next);
+      ws.send(JSON.stringify({ type: 'ack', files_version: version }));
+    }
+  };
 
   useEffect(() => {
     // Connect to WebSocket
     const connectWebSocket = () => {
-      const ws = new WebSocket('ws://localhost:8000/ws');
+      // Reconnects (and reloads) rejoin the same conversation so unfinished runs resume
+      conversationIdRef.current = conversationIdRef.current || sessionStorage.getItem('conversationId');
+      const query = conversationIdRef.current
+        ? `&conversation_id=${encodeURIComponent(conversationIdRef.current)}`
+        : '';
+      // protocol=2: batched status frames and per-file deltas
+      const ws = new WebSocket(`ws://localhost:8000/ws?protocol=2${query}`);
       
       ws.onopen = () => {
         console.log('Connected to backend');
       };
       
-      ws.onmessage = (event) => {
-        const data = JSON.parse(event.data);
+      // Applies one chat/status message; batch frames carry several
+      const handleMessage = (data: any) => {
+        if (data.type === 'session') {
+          conversationIdRef.current = data.conversation_id;
+          sessionStorage.setItem('conversationId', data.conversation_id);
+          // A new connection starts a new file version sequence
+          snapshotsRef.current.clear();
+          return;
+        }
         
-        // Add message to chat
-        setMessages(prev => [...prev, {
-          role: data.role,
-          content: data.content,
-          agent: data.agent
-        }]);
+        // Update files if provided (whole, or as a delta against a version we hold)
+        if (data.files || data.files_delta) {
+          applyFiles(ws, data);
+        }
+        if (data.type === 'files') {
+          return;
+        }
         
-        // Update files if provided
-        if (data.files) {
-          console.log('Updating files:', data.files);
-          setFiles(data.files);
+        // Add message to chat; streamed messages merge into one entry by stream_id
+        setMessages(prev => {
+          if (data.stream_id) {
+            const index = prev.findIndex(m => m.streamId === data.stream_id);
+            if (index !== -1) {
+              const next = [...prev];
+              next[index] = {
+                ...next[index],
+                content: data.delta ? next[index].content + data.content : data.content
+              };
+              return next;
+            }
+          }
+          return [...prev, {
+            role: data.role,
+            content: data.content,
+            agent: data.agent,
+            streamId: data.stream_id
+          }];
+        });
+      };
+      
+      ws.onmessage = (event) => {
+        const data = JSON.parse(event.data);
+        if (data.type === 'batch') {
+          data.messages.forEach(handleMessage);
+        } else {
+          handleMessage(data);
         }
       };
       